@@ -0,0 +1,222 @@
+"""
+Analytics for Udo
+Columnar views of timer sessions and day tracker entries (day ordinal,
+duration in seconds, category code) with group-by, rolling average, streak
+and percentile queries. Columns are NumPy arrays when NumPy is installed
+and plain lists otherwise; both give the same results (NumPy is an
+optional accelerator, see requirements.txt). Built columns are cached
+until their source changes.
+"""
+
+import heapq
+import threading
+from datetime import date
+from typing import Callable, Dict, List, Any
+
+try:
+    import numpy as np
+except ImportError:  # optional: fall back to pure Python loops
+    np = None
+
+PERCENTILES = (50, 75, 90, 95)
+
+
+class Columns:
+    """Parallel columns over a list of records, plus the records themselves"""
+
+    def __init__(self, records: List[Dict[str, Any]], days: List[int], durations: List[float],
+                 categories: List[str]):
+        self.records = records
+        # Whole-second durations are summed back to ints, as without NumPy
+        self.integral = all(type(d) is int for d in durations)
+        self.names = sorted(set(categories))
+        codes = {name: code for code, name in enumerate(self.names)}
+        category_codes = [codes[c] for c in categories]
+        if np is not None:
+            self.day = np.asarray(days, dtype=np.int64)
+            self.duration = np.asarray(durations, dtype=np.float64)
+            self.category = np.asarray(category_codes, dtype=np.int64)
+        else:
+            self.day = days
+            self.duration = durations
+            self.category = category_codes
+
+    def __len__(self):
+        return len(self.day)
+
+    def between(self, start: date = None, end: date = None) -> 'Columns':
+        """Rows whose day falls in [start, end]"""
+        lo = start.toordinal() if start else None
+        hi = end.toordinal() if end else None
+        if lo is None and hi is None:
+            return self
+        if np is not None:
+            mask = np.ones(len(self.day), dtype=bool)
+            if lo is not None:
+                mask &= self.day >= lo
+            if hi is not None:
+                mask &= self.day <= hi
+            keep = np.nonzero(mask)[0]
+        else:
+            keep = [i for i, d in enumerate(self.day)
+                    if (lo is None or d >= lo) and (hi is None or d <= hi)]
+        view = Columns.__new__(Columns)
+        view.records = [self.records[i] for i in keep]
+        view.integral = self.integral
+        view.names = self.names
+        if np is not None:
+            view.day, view.duration, view.category = self.day[keep], self.duration[keep], self.category[keep]
+        else:
+            view.day = [self.day[i] for i in keep]
+            view.duration = [self.duration[i] for i in keep]
+            view.category = [self.category[i] for i in keep]
+        return view
+
+
+_cache = {}  # source name -> (key, value)
+_cache_lock = threading.Lock()
+
+
+def cached(source: str, key: Any, build: Callable[[], Any]) -> Any:
+    """Columns (or anything else) built from a source, rebuilt when its key (e.g. a file stamp) changes"""
+    with _cache_lock:
+        cached = _cache.get(source)
+        if cached and cached[0] == key:
+            return cached[1]
+    built = build()
+    with _cache_lock:
+        _cache[source] = (key, built)
+    return built
+
+
+def day_ordinal(timestamp: str) -> int:
+    """Ordinal of the calendar date a timestamp string starts with"""
+    return date.fromisoformat(timestamp[:10]).toordinal()
+
+
+def _group(keys, durations, label: Callable[[int], str], integral: bool) -> Dict[str, Dict[str, Any]]:
+    """Count and total duration per key (an int total if every duration is an int)"""
+    if np is not None:
+        if not len(keys):
+            return {}
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        totals = np.bincount(inverse, weights=durations)
+        cast = (lambda t: int(round(t))) if integral else float
+        return {label(int(k)): {'count': int(c), 'duration': cast(t)}
+                for k, c, t in zip(unique, counts, totals)}
+    groups = {}
+    for k, duration in zip(keys, durations):
+        group = groups.setdefault(k, [0, 0])
+        group[0] += 1
+        group[1] += duration
+    return {label(k): {'count': c, 'duration': t} for k, (c, t) in sorted(groups.items())}
+
+
+def by_day(cols: Columns) -> Dict[str, Dict[str, Any]]:
+    """Count and duration per calendar day (YYYY-MM-DD)"""
+    return _group(cols.day, cols.duration, lambda d: date.fromordinal(d).isoformat(), cols.integral)
+
+
+def _week_label(week: int) -> str:
+    year, number, _ = date.fromordinal(week * 7 + 1).isocalendar()
+    return f'{year}-W{number:02d}'
+
+
+def by_week(cols: Columns) -> Dict[str, Dict[str, Any]]:
+    """Count and duration per ISO week (ordinal 1 is a Monday)"""
+    weeks = (cols.day - 1) // 7 if np is not None else [(d - 1) // 7 for d in cols.day]
+    return _group(weeks, cols.duration, _week_label, cols.integral)
+
+
+def by_category(cols: Columns) -> Dict[str, Dict[str, Any]]:
+    """Count and duration per category (subject or session type)"""
+    return _group(cols.category, cols.duration, lambda c: cols.names[c], cols.integral)
+
+
+def _daily_totals(cols: Columns, first: int, last: int):
+    """Dense per-day duration totals for days first..last"""
+    size = last - first + 1
+    if np is not None:
+        return np.bincount(cols.day - first, weights=cols.duration, minlength=size)
+    totals = [0.0] * size
+    for d, duration in zip(cols.day, cols.duration):
+        totals[d - first] += duration
+    return totals
+
+
+def rolling_average(cols: Columns, window: int = 7, days: int = 30, today: date = None) -> List[Dict[str, Any]]:
+    """Average daily duration over the trailing window, for each of the last `days` days"""
+    end = (today or date.today()).toordinal()
+    first = end - days - window + 2
+    view = cols.between(date.fromordinal(first), date.fromordinal(end))
+    totals = _daily_totals(view, first, end)
+    if np is not None:
+        sums = np.convolve(totals, np.ones(window), mode='valid')
+        averages = (sums / window).tolist()
+    else:
+        averages = []
+        running = sum(totals[:window - 1])
+        for i in range(window - 1, len(totals)):
+            running += totals[i]
+            averages.append(running / window)
+            running -= totals[i - window + 1]
+    return [{'date': date.fromordinal(end - len(averages) + 1 + i).isoformat(), 'average': round(a, 2)}
+            for i, a in enumerate(averages)]
+
+
+def streaks(cols: Columns, today: date = None) -> Dict[str, int]:
+    """Longest run of consecutive active days, and the run ending today (or yesterday)"""
+    if not len(cols):
+        return {'current': 0, 'longest': 0}
+    end = (today or date.today()).toordinal()
+    first = int(min(cols.day))
+    last = max(int(max(cols.day)), end)
+    if np is not None:
+        active = np.zeros(last - first + 3, dtype=np.int8)
+        active[np.unique(cols.day) - first + 1] = 1
+        edges = np.diff(active)
+        starts, stops = np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]
+        runs = stops - starts
+        longest = int(runs.max(initial=0))
+        # Runs are [start, stop) in day offsets; find one covering today or yesterday
+        ends = stops + first - 1
+        covering = np.nonzero((ends == end) | (ends == end - 1))[0]
+        current = int(runs[covering[-1]]) if len(covering) else 0
+        return {'current': current, 'longest': longest}
+    days = set(cols.day)
+    longest = 0
+    for d in days:
+        if d - 1 not in days:
+            run = 1
+            while d + run in days:
+                run += 1
+            longest = max(longest, run)
+    current = 0
+    d = end if end in days else end - 1
+    while d in days:
+        current += 1
+        d -= 1
+    return {'current': current, 'longest': longest}
+
+
+def percentiles(cols: Columns, points=PERCENTILES) -> Dict[str, float]:
+    """Duration percentiles (linear interpolation, as numpy.percentile)"""
+    if not len(cols):
+        return {}
+    if np is not None:
+        values = np.percentile(cols.duration, points)
+        return {f'p{p}': round(float(v), 2) for p, v in zip(points, values)}
+    ordered = sorted(cols.duration)
+    result = {}
+    for p in points:
+        rank = (len(ordered) - 1) * p / 100
+        low = int(rank)
+        high = min(low + 1, len(ordered) - 1)
+        result[f'p{p}'] = round(ordered[low] + (ordered[high] - ordered[low]) * (rank - low), 2)
+    return result
+
+
+def most_recent(records: List[Dict[str, Any]], n: int, key: str = 'startTime') -> List[Dict[str, Any]]:
+    """The n records with the largest key, without sorting them all"""
+    return heapq.nlargest(n, records, key=lambda r: r.get(key, ''))
@@ -3,59 +3,109 @@ Udo Backend - Flask Application
 Local-first task management system with file-based storage
 """
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 import os
+import time
+from importlib import import_module
+
+_phase_started = time.perf_counter()
+
+# (phase, seconds) for each step of building the app, reported by start.py --fast
+STARTUP_TIMINGS = []
+
+
+def _phase_done(name):
+    global _phase_started
+    now = time.perf_counter()
+    STARTUP_TIMINGS.append((name, now - _phase_started))
+    _phase_started = now
+
+
+from backend import http_cache, metrics, static_assets
+from backend.file_manager import ensure_directories, get_page_cache_stats
+from backend.lazy_routes import LazyRoutes
+from backend.overdue import start_overdue_scheduler
+from backend.storage import recover_journal
+_phase_done("core imports")
+
+# Route modules: (path prefix, module, blueprint, url_prefix)
+ROUTE_MODULES = [
+    ('/api/page', 'backend.routes.pages', 'pages_bp', '/api'),
+    ('/api/task', 'backend.routes.tasks', 'tasks_bp', '/api'),
+    ('/api/settings', 'backend.routes.settings', 'settings_bp', '/api'),
+    ('/api/search', 'backend.routes.search', 'search_bp', '/api'),
+    ('/api/dashboard', 'backend.routes.dashboard', 'dashboard_bp', '/api'),
+    ('/api/events', 'backend.routes.events', 'events_bp', '/api'),
+    ('/api/timer', 'backend.routes.timer', 'timer_bp', None),
+    ('/api/countdown', 'backend.routes.countdown', 'countdown_bp', None),
+    ('/api/daytracker', 'backend.routes.daytracker', 'daytracker_bp', None),
+    ('/api/metrics', 'backend.routes.metrics', 'metrics_bp', '/api'),
+]
+
+# Import each route module on the first request it serves (set by start.py --fast)
+LAZY_ROUTES = os.environ.get('UDO_LAZY_ROUTES') == '1'
+
+
+def setup_app(flask_app):
+    """Metrics, CORS and response compression, shared by the main app and lazily loaded route apps"""
+    # First, so its after_request hook runs last and request latency includes the others
+    metrics.init_app(flask_app)
+    CORS(flask_app)
+    http_cache.init_app(flask_app)
 
-from backend.file_manager import ensure_directories
-from backend.routes.pages import pages_bp
-from backend.routes.tasks import tasks_bp
-from backend.routes.settings import settings_bp
-from backend.routes.timer import timer_bp
-from backend.routes.countdown import countdown_bp
-from backend.routes.daytracker import daytracker_bp
 
 app = Flask(__name__)
-CORS(app)
+setup_app(app)
 
 # Ensure data directories exist
 ensure_directories()
 
+# Re-apply writes left in the journal by a crash before serving anything
+recover_journal()
+_phase_done("storage")
+
+# Promote overdue tasks in the background (at startup and every midnight)
+start_overdue_scheduler()
+_phase_done("overdue scheduler")
+
 # Register blueprints
-app.register_blueprint(pages_bp, url_prefix='/api')
-app.register_blueprint(tasks_bp, url_prefix='/api')
-app.register_blueprint(settings_bp, url_prefix='/api')
-app.register_blueprint(timer_bp)
-app.register_blueprint(countdown_bp)
-app.register_blueprint(daytracker_bp)
-
-# Serve React frontend
+if LAZY_ROUTES:
+    app.wsgi_app = LazyRoutes(app, ROUTE_MODULES, setup_app)
+else:
+    for _, module_name, blueprint, url_prefix in ROUTE_MODULES:
+        app.register_blueprint(getattr(import_module(module_name), blueprint), url_prefix=url_prefix)
+_phase_done("routes")
+
+# Serve React frontend (read into memory once)
 FRONTEND_DIST = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'dist')
+static_assets.configure(FRONTEND_DIST)
+_phase_done("frontend assets")
 
 
 @app.route('/')
 def serve_frontend():
     """Serve the React frontend"""
-    if os.path.exists(os.path.join(FRONTEND_DIST, 'index.html')):
-        return send_from_directory(FRONTEND_DIST, 'index.html')
+    response = static_assets.serve('index.html')
+    if response:
+        return response
     return {"message": "Udo Backend is running. Frontend not built yet."}, 200
 
 
 @app.route('/<path:path>')
 def serve_static(path):
     """Serve static files from React build"""
-    if os.path.exists(os.path.join(FRONTEND_DIST, path)):
-        return send_from_directory(FRONTEND_DIST, path)
     # For client-side routing, serve index.html
-    if os.path.exists(os.path.join(FRONTEND_DIST, 'index.html')):
-        return send_from_directory(FRONTEND_DIST, 'index.html')
+    response = static_assets.serve(path) or static_assets.serve('index.html')
+    if response:
+        return response
     return {"error": "Not found"}, 404
 
 
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
-    return {"status": "ok", "app": "Udo"}
+    return {"status": "ok", "app": "Udo", "page_cache": get_page_cache_stats()}
 
 
 if __name__ == '__main__':
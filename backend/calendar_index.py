@@ -0,0 +1,206 @@
+"""
+Calendar Index for Udo
+Sorted endpoint index over the date ranges of all tasks, answering "which
+tasks overlap [start, end]" with binary searches. Tasks are grouped by how
+many days they span; each group is a list sorted by start date, so for a
+group of spans up to N days only starts in [start - N, end] are looked at.
+The few tasks longer than the largest group are checked one by one. Task
+creates, updates and deletes are applied one task at a time through the
+page listener; other saves and pages edited outside the app re-index the
+whole page. Only the date entries are kept; the tasks of a result are
+looked up in task_index.
+"""
+
+import bisect
+import sys
+import threading
+from typing import Dict, List, Any, Optional
+
+from backend import task_index
+from backend.dates import task_ordinals
+from backend.file_manager import (
+    add_page_listener, get_page, get_page_summary_map, page_stamp
+)
+
+# Span groups by (end - start) in days. Doubling limits keep the starts a
+# query looks at within about twice the tasks it returns
+SPAN_GROUPS = (0, 1, 3, 7, 15, 31, 63, 127, 255, 511)
+
+_lock = threading.Lock()
+_stamps = {}      # page_id -> stamp the page was indexed at
+_page_keys = {}   # page_id -> {key} indexed for the page
+_entries = {}     # (page_id, task_id) -> (start, end, page_id, task_id)
+_groups = {span: [] for span in SPAN_GROUPS}  # span -> [entry] sorted by start
+_groups_dirty = False  # whole pages were appended; sort before the next use
+_long = set()     # keys of tasks spanning more than the largest group
+
+
+def _span_group(entry: tuple) -> Optional[int]:
+    """The group an entry belongs to (None for long tasks)"""
+    span = entry[1] - entry[0]
+    for limit in SPAN_GROUPS:
+        if span <= limit:
+            return limit
+    return None
+
+
+def _entry(page_id: str, task: Dict[str, Any]) -> Optional[tuple]:
+    """The (start, end, page_id, task_id) entry of a task; None if it has no date"""
+    task_id = task.get('id')
+    start, end = task_ordinals(task)
+    if not start or not isinstance(task_id, str):
+        return None  # no date (or no id to key it by), not on the calendar
+    return (start, end, sys.intern(page_id), task_id)
+
+
+def _sorted_groups() -> Dict[int, list]:
+    """The span groups, sorted first if needed (caller holds _lock)"""
+    global _groups_dirty
+    if _groups_dirty:
+        for entries in _groups.values():
+            entries.sort()
+        _groups_dirty = False
+    return _groups
+
+
+def _index(entry: tuple) -> Optional[int]:
+    """Hold one entry; returns its group, to which the caller adds it"""
+    key = entry[2:]
+    _entries[key] = entry
+    _page_keys.setdefault(entry[2], set()).add(key)
+    group = _span_group(entry)
+    if group is None:
+        _long.add(key)
+    return group
+
+
+def _remove(key: tuple):
+    entry = _entries.pop(key, None)
+    if entry is None:
+        return
+    _page_keys.get(key[0], set()).discard(key)
+    group = _span_group(entry)
+    if group is None:
+        _long.discard(key)
+        return
+    entries = _sorted_groups()[group]
+    i = bisect.bisect_left(entries, entry)
+    if i < len(entries) and entries[i] == entry:
+        del entries[i]
+
+
+def _add(page_id: str, task: Dict[str, Any]):
+    _remove((page_id, task.get('id')))
+    entry = _entry(page_id, task)
+    group = _index(entry) if entry else None
+    if group is not None:
+        bisect.insort(_sorted_groups()[group], entry)
+
+
+def _apply_page(page_id: str, page: Dict[str, Any], stamp: tuple):
+    """Re-index every task of a page, or drop it if page is None (caller holds _lock)
+
+    The page's entries are filtered out of and appended to the groups,
+    which are sorted once before their next use rather than once per task.
+    """
+    global _groups_dirty
+    keys = _page_keys.pop(page_id, set())
+    if keys - _long:
+        for entries in _groups.values():
+            entries[:] = [entry for entry in entries if entry[2] != page_id]
+    for key in keys:
+        del _entries[key]
+        _long.discard(key)
+    _stamps.pop(page_id, None)
+    if page is None:
+        return
+
+    # A repeated task id replaces the earlier task, as a later update would
+    indexed = {}
+    for task in page.get('tasks', []):
+        indexed[(page_id, task.get('id'))] = _entry(page_id, task)
+    for entry in indexed.values():
+        group = _index(entry) if entry else None
+        if group is not None:
+            _groups[group].append(entry)
+    _groups_dirty = True
+    _stamps[page_id] = stamp
+
+
+def _apply_changes(page_id: str, page: Dict[str, Any], changes: List[tuple], stamp: tuple):
+    """Apply the (op, task) changes of one save (caller holds _lock)"""
+    for op, task in changes:
+        if op == 'delete':
+            _remove((page_id, task.get('id')))
+        else:
+            _add(page_id, task)
+    _stamps[page_id] = stamp
+
+
+def _on_page_changed(page_id: str, page: Dict[str, Any], summary: Dict[str, Any],
+                     changes: List[tuple] = None):
+    """Page listener: apply task changes in place, re-index other saves
+
+    Changes are only applied on their own if the index holds the version
+    just before this save; otherwise (a save from another process was
+    missed) the whole page is re-indexed.
+    """
+    stamp = page_stamp(summary) if summary else None
+    with _lock:
+        indexed = _stamps.get(page_id)
+        if (page is not None and changes is not None and indexed is not None
+                and indexed[0] == page.get('version', 0) - 1):
+            _apply_changes(page_id, page, changes, stamp)
+        else:
+            _apply_page(page_id, page, stamp)
+
+
+def sync():
+    """Re-index pages whose manifest stamp differs from the indexed one
+
+    As in search_index, pages are read without holding the index lock and
+    only applied if no save indexed them in the meantime.
+    """
+    summaries = get_page_summary_map()
+    with _lock:
+        for page_id in [page_id for page_id in _stamps if page_id not in summaries]:
+            _apply_page(page_id, None, None)
+        stale = {page_id: _stamps.get(page_id) for page_id, summary in summaries.items()
+                 if _stamps.get(page_id) != page_stamp(summary)}
+
+    for page_id, seen in stale.items():
+        page = get_page(page_id)
+        with _lock:
+            if _stamps.get(page_id) == seen:
+                _apply_page(page_id, page, page_stamp(summaries[page_id]))
+
+
+def overlapping_keys(start: int, end: int) -> List[tuple]:
+    """(page_id, task_id) of the tasks overlapping [start, end] (date ordinals), by start date
+
+    The caller holds _lock.
+    """
+    hits = []
+    for span, entries in _sorted_groups().items():
+        lo = bisect.bisect_left(entries, (start - span,))
+        hi = bisect.bisect_left(entries, (end + 1,))
+        hits.extend(entry for entry in entries[lo:hi] if entry[1] >= start)
+    hits.extend(entry for entry in map(_entries.__getitem__, _long)
+                if entry[0] <= end and entry[1] >= start)
+    hits.sort()
+    return [entry[2:] for entry in hits]
+
+
+def overlapping(start: int, end: int) -> List[Dict[str, Any]]:
+    """Tasks whose date range overlaps [start, end] (date ordinals), by start date
+
+    Each task is tagged with its page id and name. The tasks themselves
+    are looked up in task_index.
+    """
+    sync()
+    with _lock:
+        keys = overlapping_keys(start, end)
+    return [task.to_dict(page_name) for task, page_name in filter(None, task_index.tasks_by_id(keys))]
+
+
+add_page_listener(_on_page_changed)
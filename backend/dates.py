@@ -0,0 +1,119 @@
+"""
+Date helpers for Udo
+Parses task timestamps ("YYYY-MM-DD", "start:end" or "start-end" ranges,
+ISO datetimes) into date ordinals. Parsing is memoized per timestamp
+string, and saved tasks carry the parsed range, so callers compare
+integers instead of re-splitting strings.
+"""
+
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Any
+
+# A calendar date anywhere in a timestamp (months and days may lack the leading zero)
+DATE_RE = re.compile(r'(?<!\d)(\d{4})-(\d{1,2})-(\d{1,2})(?!\d)')
+
+# Distinct timestamp strings whose parse is kept
+RANGE_CACHE_SIZE = 65536
+
+# Task field holding the parsed [start, end] ordinals, written on every save
+DATE_RANGE_FIELD = "date_range"
+
+
+@lru_cache(maxsize=RANGE_CACHE_SIZE)
+def parse_date_range(timestamp: str) -> tuple:
+    """(start, end) date ordinals of a timestamp, (0, 0) if it holds no date
+
+    The first two valid dates found are the range, whatever separates them
+    ("2026-01-20:2026-01-30", "2026-01-20-2026-01-30", "2026-01-20 - 2026-1-30");
+    one date, or an ISO datetime, is a single-day range. A reversed range
+    is put in order.
+    """
+    ordinals = []
+    for match in DATE_RE.finditer(timestamp or ''):
+        try:
+            ordinals.append(date(*map(int, match.groups())).toordinal())
+        except ValueError:
+            continue
+        if len(ordinals) == 2:
+            break
+    if not ordinals:
+        return (0, 0)
+    return (min(ordinals), max(ordinals))
+
+
+@lru_cache(maxsize=RANGE_CACHE_SIZE)
+def date_ordinal(value: str) -> int:
+    """Ordinal of a YYYY-MM-DD date (or the date of an ISO datetime), 0 if it is not one"""
+    if not isinstance(value, str):
+        return 0
+    match = DATE_RE.match(value)
+    try:
+        return date(*map(int, match.groups())).toordinal() if match else 0
+    except ValueError:
+        return 0
+
+
+def ordinal_date(ordinal: int) -> str:
+    """YYYY-MM-DD of an ordinal ("" for 0)"""
+    return date.fromordinal(ordinal).isoformat() if ordinal else ''
+
+
+def _parsed_ordinals(task: Dict[str, Any]) -> tuple:
+    """The (start, end) date ordinals parsed from a task's timestamp"""
+    timestamp = task.get("timestamp")
+    return parse_date_range(timestamp) if isinstance(timestamp, str) else (0, 0)
+
+
+def task_ordinals(task: Dict[str, Any]) -> tuple:
+    """The (start, end) date ordinals of a task, (0, 0) if it has no valid timestamp
+
+    The range stored on the task by stamp_date_range is used as is; the
+    timestamp is only parsed for tasks without a well-formed stored range.
+    """
+    stored = task.get(DATE_RANGE_FIELD)
+    if type(stored) is list and len(stored) == 2:
+        start, end = stored
+        if type(start) is int and type(end) is int and 0 < start <= end:
+            return (start, end)
+    return _parsed_ordinals(task)
+
+
+def task_date_range(task: Dict[str, Any]) -> tuple:
+    """Get the normalized (start, end) dates (YYYY-MM-DD, "" if none) of a task"""
+    start, end = task_ordinals(task)
+    return ordinal_date(start), ordinal_date(end)
+
+
+def task_end_date(task: Dict[str, Any]) -> str:
+    """Get the end date (YYYY-MM-DD) of a task from its timestamp"""
+    return ordinal_date(task_ordinals(task)[1])
+
+
+def stamp_date_range(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Store the task's parsed range as [start, end] ordinals next to its timestamp
+
+    Called whenever a task is saved, so the stored range always follows the
+    timestamp (it is re-parsed here, never taken from the old range); a task
+    without a valid date has no range field.
+    """
+    start, end = _parsed_ordinals(task)
+    if start:
+        task[DATE_RANGE_FIELD] = [start, end]
+    else:
+        task.pop(DATE_RANGE_FIELD, None)
+    return task
+
+
+def duration_timestamp(start: str, duration_days: int) -> str:
+    """Timestamp of a duration_days long range ("start:end") from the date in start
+
+    start may be an ISO datetime; it is returned unchanged if it holds no date.
+    """
+    ordinal = date_ordinal(start)
+    if not ordinal:
+        return start
+    if duration_days <= 1:
+        return ordinal_date(ordinal)
+    return f"{ordinal_date(ordinal)}:{ordinal_date(ordinal + duration_days - 1)}"
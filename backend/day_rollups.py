@@ -0,0 +1,308 @@
+"""
+Day Tracker Rollups for Udo
+Per-day, per-ISO-week and per-month totals of tracked time, updated by
+every save_day_data. Range totals are answered from Fenwick trees over day
+indices, reading O(log n) nodes instead of every day file.
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Any
+
+from backend.file_manager import db, USERDATA_DIR
+from backend.locks import write_lock
+from backend.storage import write_json
+
+DAYTRACKER_DIR = os.path.join(USERDATA_DIR, 'daytracker')
+ROLLUP_FILE = os.path.join(USERDATA_DIR, 'daytracker_rollups.json')
+
+# Durations are summed as whole microseconds so updates never drift
+MICROSECOND = timedelta(microseconds=1)
+MICROS_PER_MINUTE = 60 * 1000 * 1000
+
+
+class _Fenwick:
+    """Binary indexed tree of prefix sums over day indices"""
+
+    def __init__(self, size: int):
+        self.tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int):
+        index += 1
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        """Sum of days [0, index)"""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def range(self, start: int, end: int) -> int:
+        """Sum of days [start, end]"""
+        return self.prefix(end + 1) - self.prefix(start)
+
+
+_lock = threading.Lock()
+_days = {}            # date -> {"micros", "entries", "subjects", "stamp"}
+_weeks = {}           # "YYYY-Www" -> totals
+_months = {}          # "YYYY-MM" -> totals
+_base = 0             # ordinal of day index 0
+_capacity = 0
+_trees = {}           # "micros" / "entries" / "days" -> _Fenwick
+_subject_trees = {}   # subject -> _Fenwick of micros
+_loaded_stat = False  # ROLLUP_FILE stat the in-memory rollups match
+
+
+def entry_duration(entry: Dict[str, Any]) -> int:
+    """Duration of an entry in microseconds, None if it lacks a valid ISO start or end time"""
+    start, end = entry.get('startTime'), entry.get('endTime')
+    if not (start and end):
+        return None
+    try:
+        return (datetime.fromisoformat(end) - datetime.fromisoformat(start)) // MICROSECOND
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize_day(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Total duration (microseconds), entry count and per-subject durations of a day
+
+    Entries without valid times (say, from a hand-edited day file) count
+    as entries but add no time.
+    """
+    micros = 0
+    subjects = {}
+    for entry in entries:
+        duration = entry_duration(entry)
+        if duration is not None:
+            micros += duration
+            subject = entry.get('subject', 'Other')
+            subjects[subject] = subjects.get(subject, 0) + duration
+    return {"micros": micros, "entries": len(entries), "subjects": subjects}
+
+
+def _period_keys(date_str: str) -> tuple:
+    year, week, _ = date.fromisoformat(date_str).isocalendar()
+    return f'{year}-W{week:02d}', date_str[:7]
+
+
+def _apply_period(periods: Dict[str, Any], key: str, summary: Dict[str, Any], sign: int):
+    totals = periods.setdefault(key, {"micros": 0, "entries": 0, "days": 0, "subjects": {}})
+    totals["micros"] += sign * summary["micros"]
+    totals["entries"] += sign * summary["entries"]
+    totals["days"] += sign
+    for subject, micros in summary["subjects"].items():
+        totals["subjects"][subject] = totals["subjects"].get(subject, 0) + sign * micros
+        if not totals["subjects"][subject]:
+            del totals["subjects"][subject]
+    if not totals["days"]:
+        del periods[key]
+
+
+def _apply_trees(date_str: str, summary: Dict[str, Any], sign: int):
+    index = date.fromisoformat(date_str).toordinal() - _base
+    _trees["micros"].add(index, sign * summary["micros"])
+    _trees["entries"].add(index, sign * summary["entries"])
+    _trees["days"].add(index, sign)
+    for subject, micros in summary["subjects"].items():
+        tree = _subject_trees.get(subject)
+        if tree is None:
+            tree = _subject_trees[subject] = _Fenwick(_capacity)
+        tree.add(index, sign * micros)
+
+
+def _rebuild():
+    """Rebuild week/month totals and the trees from the per-day rollups"""
+    global _base, _capacity
+    _weeks.clear()
+    _months.clear()
+    _subject_trees.clear()
+    ordinals = [date.fromisoformat(d).toordinal() for d in _days]
+    _base = min(ordinals, default=date.today().toordinal())
+    # Leave room for a year of new days before the trees have to grow
+    _capacity = max(ordinals, default=_base) - _base + 366
+    for name in ('micros', 'entries', 'days'):
+        _trees[name] = _Fenwick(_capacity)
+    for date_str, summary in _days.items():
+        week, month = _period_keys(date_str)
+        _apply_period(_weeks, week, summary, 1)
+        _apply_period(_months, month, summary, 1)
+        _apply_trees(date_str, summary, 1)
+
+
+def _day_stamp(date_str: str):
+    try:
+        st = os.stat(os.path.join(DAYTRACKER_DIR, f'day_{date_str}.json'))
+        return [st.st_mtime_ns, st.st_size]
+    except FileNotFoundError:
+        return None
+
+
+def _scan_day_files():
+    """Bring _days in line with the day files"""
+    seen = set()
+    if os.path.isdir(DAYTRACKER_DIR):
+        for entry in os.scandir(DAYTRACKER_DIR):
+            if not (entry.name.startswith('day_') and entry.name.endswith('.json')):
+                continue
+            date_str = entry.name[len('day_'):-len('.json')]
+            st = entry.stat()
+            stamp = [st.st_mtime_ns, st.st_size]
+            seen.add(date_str)
+            if _days.get(date_str, {}).get("stamp") == stamp:
+                continue
+            try:
+                date.fromisoformat(date_str)
+                with open(entry.path, 'r') as f:
+                    entries = json.load(f).get('entries', [])
+            except (ValueError, OSError) as e:
+                print(f"Skipping day file {entry.name}: {e}")
+                continue
+            _days[date_str] = {**summarize_day(entries), "stamp": stamp}
+    for date_str in set(_days) - seen:
+        del _days[date_str]
+
+
+def _rollup_stat():
+    try:
+        st = os.stat(ROLLUP_FILE)
+        return (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return None
+
+
+def _write():
+    global _loaded_stat
+    write_json(ROLLUP_FILE, {"days": _days}, indent=None)
+    _loaded_stat = _rollup_stat()
+
+
+def _ensure_loaded():
+    """Load the rollups, re-reading them if another process rewrote the file (caller holds _lock)
+
+    The first load in a process also reconciles them with the day files, so
+    days edited while the server was stopped are picked up.
+    """
+    global _loaded_stat
+    stat = _rollup_stat()
+    if _loaded_stat is not False and stat == _loaded_stat:
+        return
+
+    first_load = _loaded_stat is False
+    _days.clear()
+    if stat:
+        try:
+            with open(ROLLUP_FILE, 'r') as f:
+                _days.update(json.load(f).get("days", {}))
+        except (ValueError, OSError) as e:
+            print(f"Rebuilding day tracker rollups: {e}")
+            stat = None
+
+    # Reconciled rollups are only written back by the next update_day, which
+    # holds the rollup file lock
+    if db:
+        if not stat:
+            for date_str in db.get_tracked_dates():
+                _days[date_str] = {**summarize_day(db.get_day_data(date_str)['entries']), "stamp": None}
+    elif first_load or not stat:
+        _scan_day_files()
+
+    _rebuild()
+    _loaded_stat = stat
+
+
+def update_day(date_str: str, data: Dict[str, Any]):
+    """Replace the rollup of one day after it was saved"""
+    summary = {**summarize_day(data.get('entries', [])), "stamp": None if db else _day_stamp(date_str)}
+    with write_lock(ROLLUP_FILE), _lock:
+        _ensure_loaded()
+        old = _days.get(date_str)
+        week, month = _period_keys(date_str)
+        if old:
+            _apply_period(_weeks, week, old, -1)
+            _apply_period(_months, month, old, -1)
+        _apply_period(_weeks, week, summary, 1)
+        _apply_period(_months, month, summary, 1)
+        _days[date_str] = summary
+
+        index = date.fromisoformat(date_str).toordinal() - _base
+        if 0 <= index < _capacity:
+            if old:
+                _apply_trees(date_str, old, -1)
+            _apply_trees(date_str, summary, 1)
+        else:
+            _rebuild()
+        _write()
+
+
+def version():
+    """Stamp of the rollup file, which changes with every day save (in any process)"""
+    with _lock:
+        _ensure_loaded()
+        return _loaded_stat
+
+
+def tracked_dates() -> List[str]:
+    """All tracked dates in order"""
+    with _lock:
+        _ensure_loaded()
+        return sorted(_days)
+
+
+def _format(micros: int, entries: int, days: int, subjects: Dict[str, int]) -> Dict[str, Any]:
+    total_minutes = micros / MICROS_PER_MINUTE
+    return {
+        'totalMinutes': int(total_minutes),
+        'totalHours': round(total_minutes / 60, 2),
+        'totalEntries': entries,
+        'trackedDays': days,
+        'subjectBreakdown': {subject: value / MICROS_PER_MINUTE for subject, value in subjects.items()}
+    }
+
+
+def range_stats(start_date: str, end_date: str) -> Dict[str, Any]:
+    """Totals over [start_date, end_date] from O(log n) tree nodes per column
+
+    Raises ValueError if a date is not YYYY-MM-DD.
+    """
+    start = date.fromisoformat(start_date).toordinal()
+    end = date.fromisoformat(end_date).toordinal()
+    with _lock:
+        _ensure_loaded()
+        start = max(start - _base, 0)
+        end = min(end - _base, _capacity - 1)
+        if start > end:
+            return _format(0, 0, 0, {})
+        subjects = {}
+        for subject, tree in _subject_trees.items():
+            micros = tree.range(start, end)
+            if micros:
+                subjects[subject] = micros
+        return _format(_trees["micros"].range(start, end), _trees["entries"].range(start, end),
+                       _trees["days"].range(start, end), subjects)
+
+
+def period_stats(period: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Per-day, per-ISO-week or per-month totals for the periods touching [start_date, end_date]
+
+    Raises ValueError if a date is not YYYY-MM-DD.
+    """
+    first, last = (_period_keys(start_date), _period_keys(end_date))
+    with _lock:
+        _ensure_loaded()
+        if period == 'day':
+            rows = [(d, s["micros"], s["entries"], 1, s["subjects"])
+                    for d, s in _days.items() if start_date <= d <= end_date]
+        else:
+            periods = _weeks if period == 'week' else _months
+            index = 0 if period == 'week' else 1
+            rows = [(key, t["micros"], t["entries"], t["days"], dict(t["subjects"]))
+                    for key, t in periods.items() if first[index] <= key <= last[index]]
+    return [{'period': key, **_format(micros, entries, days, subjects)}
+            for key, micros, entries, days, subjects in sorted(rows)]
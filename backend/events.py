@@ -0,0 +1,73 @@
+"""
+Change Events for Udo
+In-process publish/subscribe bus for store changes. Every save publishes an
+event (type, operation, ids and the store generation), and the most recent
+ones are kept in a ring buffer so a reconnecting /api/events client can
+resume from its Last-Event-ID instead of reloading everything.
+"""
+
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Any
+
+EVENT_BUFFER_SIZE = int(os.environ.get('UDO_EVENT_BUFFER', 1000))
+
+# Event ids are "<epoch>-<sequence>"; the epoch changes with every process,
+# so a cursor from another process (or before a restart) is recognised
+EPOCH = uuid.uuid4().hex[:8]
+
+_cond = threading.Condition()
+_buffer = deque(maxlen=EVENT_BUFFER_SIZE)
+_last_seq = 0
+
+
+def publish(event_type: str, op: str, **fields) -> Dict[str, Any]:
+    """Record a change and wake every subscriber"""
+    global _last_seq
+    with _cond:
+        _last_seq += 1
+        event = {
+            "id": f"{EPOCH}-{_last_seq}",
+            "seq": _last_seq,
+            "type": event_type,
+            "op": op,
+            "time": datetime.now().isoformat(),
+            **fields
+        }
+        _buffer.append(event)
+        _cond.notify_all()
+    return event
+
+
+def last_seq() -> int:
+    """Sequence number of the latest event"""
+    with _cond:
+        return _last_seq
+
+
+def parse_cursor(event_id: str) -> int:
+    """Sequence number of an event id from this process, or None if it cannot be resumed from"""
+    epoch, _, seq = (event_id or '').partition('-')
+    if epoch != EPOCH or not seq.isdigit():
+        return None
+    return int(seq)
+
+
+def _since(seq: int) -> List[Dict[str, Any]]:
+    """Buffered events after seq, or None if some were already dropped (caller holds _cond)"""
+    if seq > _last_seq:
+        return None
+    missed = _last_seq - seq
+    if missed > len(_buffer):
+        return None
+    return list(_buffer)[len(_buffer) - missed:] if missed else []
+
+
+def wait(seq: int, timeout: float) -> List[Dict[str, Any]]:
+    """Events after seq, waiting up to timeout for one; None if the client has to resync"""
+    with _cond:
+        _cond.wait_for(lambda: _last_seq != seq, timeout)
+        return _since(seq)
@@ -1,17 +1,156 @@
 """
 File Manager for Udo
-Handles all file system operations for local JSON storage
+Handles all file system operations for local JSON storage, or hands them to
+the SQLite store when UDO_STORAGE_BACKEND=sqlite
 """
 
-import json
 import os
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any
 import uuid
 
+from backend import events, page_reader
+from backend.dates import date_ordinal, stamp_date_range, task_date_range, task_ordinals
+from backend.locks import read_lock, write_lock
+from backend.storage import (
+    read_json, write_json, write_json_files, atomic_write_text, place_file, PageVersionConflict
+)
+
 USERDATA_DIR = os.path.join(os.path.dirname(__file__), 'userdata')
 PAGES_DIR = os.path.join(USERDATA_DIR, 'pages')
 MAINDATA_FILE = os.path.join(USERDATA_DIR, 'maindata.json')
+MANIFEST_FILE = os.path.join(USERDATA_DIR, 'pages_manifest.json')
+GENERATION_FILE = os.path.join(USERDATA_DIR, 'generation')
+
+# Under a multi-process server the generation is shared through
+# GENERATION_FILE, so a save in one worker invalidates the others' views
+SHARED_GENERATION = int(os.environ.get('UDO_WORKERS', '1')) > 1
+
+# Storage backend: "json" (files under userdata/) or "sqlite"
+STORAGE_BACKEND = os.environ.get('UDO_STORAGE_BACKEND', 'json').lower()
+if STORAGE_BACKEND == 'sqlite':
+    from backend import sqlite_store as db
+else:
+    db = None
+
+# Parsed pages keyed by page id, validated against the file's mtime and size.
+# The on-disk size is used as the memory cost of an entry.
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('UDO_PAGE_CACHE_BYTES', 64 * 1024 * 1024))
+
+# Pages at least this large are read through page_reader (mmap, one task at
+# a time) when only a task, the header or a summary is needed, and single
+# task updates splice the file instead of re-serializing the whole page
+STREAM_PAGE_BYTES = int(os.environ.get('UDO_STREAM_PAGE_BYTES', 8 * 1024 * 1024))
+
+# On-disk layout of page and maindata files: "pretty" (indented JSON) or
+# "compact" (minified JSON, about 30% smaller for large boards; parse time
+# changes little). Both are read either way; tools/migrate_storage.py
+# rewrites existing files
+STORAGE_FORMAT = os.environ.get('UDO_STORAGE_FORMAT', 'pretty').lower()
+STORE_INDENT = None if STORAGE_FORMAT == 'compact' else 2
+
+_page_cache = OrderedDict()  # page_id -> (mtime_ns, size, page_data)
+_page_cache_bytes = 0
+_page_cache_lock = threading.Lock()
+_page_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+# Per-page summaries (name, counts, date span) so listing pages does not
+# have to parse every page file. Entries are validated by mtime and size.
+_manifest = None  # page_id -> summary
+_manifest_stat = None
+_manifest_lock = threading.Lock()
+
+# Bumped by every save function; memoized views (e.g. the dashboard) are
+# valid while it is unchanged
+_generation = 0
+_generation_lock = threading.Lock()
+
+# Callbacks run after a page is saved or deleted: listener(page_id, page, summary),
+# with page and summary None when the page was deleted
+_page_listeners = []
+
+
+def bump_generation() -> int:
+    """Record that some store changed"""
+    global _generation
+    if SHARED_GENERATION:
+        with write_lock(GENERATION_FILE):
+            _generation = get_generation() + 1
+            atomic_write_text(GENERATION_FILE, str(_generation), fsync=False)
+            return _generation
+    with _generation_lock:
+        _generation += 1
+        return _generation
+
+
+def get_generation() -> int:
+    """Current store generation"""
+    if SHARED_GENERATION:
+        try:
+            with open(GENERATION_FILE, 'r') as f:
+                return int(f.read() or 0)
+        except (OSError, ValueError):
+            return 0
+    return _generation
+
+
+def add_page_listener(listener):
+    """Register a callback for page saves and deletes
+
+    It is called as listener(page_id, page, summary, changes) with page
+    None for a deleted page and changes as in _notify_page_listeners.
+    """
+    _page_listeners.append(listener)
+
+
+def record_change(event_type: str, op: str, **fields) -> int:
+    """Bump the store generation and publish a change event carrying it"""
+    generation = bump_generation()
+    events.publish(event_type, op, generation=generation, **fields)
+    return generation
+
+
+def _publish_page_change(page_id: str, page: Dict[str, Any], changes: List[tuple]):
+    """Publish one event per changed task, or a page event if the changes are unknown"""
+    generation = bump_generation()
+    if page is None:
+        events.publish("page", "delete", generation=generation, page_id=page_id)
+    elif changes is None:
+        events.publish("page", "save", generation=generation, page_id=page_id,
+                       name=page.get("name"), version=page.get("version"))
+    else:
+        for op, task in changes:
+            events.publish("task", op, generation=generation, page_id=page_id, task_id=task.get("id"),
+                           version=page.get("version"), **({} if op == "delete" else {"task": task}))
+
+
+def _notify_page_listeners(page_id: str, page: Dict[str, Any], summary: Dict[str, Any],
+                           changes: List[tuple] = None):
+    """Publish the change and run page listeners; a failing listener never fails the save
+
+    changes lists the (op, task) pairs behind the save, op being "create",
+    "update" or "delete"; without it a page-level save event is published.
+    """
+    _publish_page_change(page_id, page, changes)
+    for listener in _page_listeners:
+        try:
+            listener(page_id, page, summary, changes)
+        except Exception as e:
+            print(f"Error in page listener: {e}")
+
+
+def _notify_db_page_changed(page_id: str, changes: List[tuple]):
+    """Notify listeners after a row-level change in the SQLite store"""
+    page = db.get_page(page_id)
+    _notify_page_listeners(page_id, page, {"version": page["version"]} if page else None, changes)
+
+
+def page_stamp(summary: Dict[str, Any]) -> tuple:
+    """Identify a page revision from its summary (version plus file mtime/size)"""
+    return (summary.get("version"), summary.get("mtime_ns"), summary.get("size"))
 
 
 def ensure_directories():
@@ -21,28 +160,34 @@ def ensure_directories():
 
 def get_maindata() -> Dict[str, Any]:
     """Load main application data"""
-    if not os.path.exists(MAINDATA_FILE):
-        default_data = {
-            "theme": "light",
-            "sidebar_collapsed": False,
-            "tags": [
-                {"id": "urgent", "name": "Urgent", "color": "#000000"},
-                {"id": "important", "name": "Important", "color": "#404040"},
-                {"id": "low-priority", "name": "Low Priority", "color": "#808080"}
-            ]
-        }
-        save_maindata(default_data)
-        return default_data
+    if db:
+        data = db.get_maindata()
+        if data is not None:
+            return data
+    elif os.path.exists(MAINDATA_FILE):
+        return read_json(MAINDATA_FILE)
     
-    with open(MAINDATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    default_data = {
+        "theme": "light",
+        "sidebar_collapsed": False,
+        "tags": [
+            {"id": "urgent", "name": "Urgent", "color": "#000000"},
+            {"id": "important", "name": "Important", "color": "#404040"},
+            {"id": "low-priority", "name": "Low Priority", "color": "#808080"}
+        ]
+    }
+    save_maindata(default_data)
+    return default_data
 
 
 def save_maindata(data: Dict[str, Any]) -> bool:
     """Save main application data"""
     try:
-        with open(MAINDATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if db:
+            db.save_maindata(data)
+        else:
+            write_json(MAINDATA_FILE, data, indent=STORE_INDENT)
+        record_change("maindata", "update")
         return True
     except Exception as e:
         print(f"Error saving maindata: {e}")
@@ -51,48 +196,350 @@ def save_maindata(data: Dict[str, Any]) -> bool:
 
 def get_all_pages() -> List[Dict[str, Any]]:
     """Get list of all pages (metadata only)"""
-    pages = []
+    return [
+        {
+            "id": summary["id"],
+            "name": summary["name"],
+            "task_count": summary["task_count"]
+        }
+        for summary in get_page_summaries()
+    ]
+
+
+def _cache_put(page_id: str, mtime_ns: int, size: int, data: Dict[str, Any]):
+    """Store a parsed page in the cache, evicting least recently used pages"""
+    global _page_cache_bytes
+    with _page_cache_lock:
+        old = _page_cache.pop(page_id, None)
+        if old:
+            _page_cache_bytes -= old[1]
+        if size > PAGE_CACHE_MAX_BYTES:
+            return
+        _page_cache[page_id] = (mtime_ns, size, data)
+        _page_cache_bytes += size
+        while _page_cache_bytes > PAGE_CACHE_MAX_BYTES:
+            _, (_, evicted_size, _) = _page_cache.popitem(last=False)
+            _page_cache_bytes -= evicted_size
+            _page_cache_stats['evictions'] += 1
+
+
+def _cache_drop(page_id: str):
+    """Remove a page from the cache"""
+    global _page_cache_bytes
+    with _page_cache_lock:
+        old = _page_cache.pop(page_id, None)
+        if old:
+            _page_cache_bytes -= old[1]
+
+
+def get_page_cache_stats() -> Dict[str, Any]:
+    """Get page cache counters and current memory use"""
+    with _page_cache_lock:
+        return {
+            **_page_cache_stats,
+            'entries': len(_page_cache),
+            'bytes': _page_cache_bytes,
+            'max_bytes': PAGE_CACHE_MAX_BYTES
+        }
+
+
+def clear_page_cache():
+    """Drop every cached page"""
+    global _page_cache_bytes
+    with _page_cache_lock:
+        _page_cache.clear()
+        _page_cache_bytes = 0
+
+
+def get_page(page_id: str) -> Dict[str, Any]:
+    """Load a specific page
+
+    The returned dict is shared with the page cache and must be treated as
+    read-only; use _get_page_for_update() before modifying a page.
+    """
+    if db:
+        return db.get_page(page_id)
     
-    if not os.path.exists(PAGES_DIR):
-        return pages
+    page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
+    
+    try:
+        st = os.stat(page_file)
+    except FileNotFoundError:
+        _cache_drop(page_id)
+        return None
+    
+    with _page_cache_lock:
+        entry = _page_cache.get(page_id)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            _page_cache.move_to_end(page_id)
+            _page_cache_stats['hits'] += 1
+            return entry[2]
+        _page_cache_stats['misses'] += 1
     
-    for filename in os.listdir(PAGES_DIR):
-        if filename.endswith('.json'):
-            page_id = filename[:-5]  # Remove .json extension
-            page_data = get_page(page_id)
-            if page_data:
-                pages.append({
-                    "id": page_data.get("id"),
-                    "name": page_data.get("name"),
-                    "task_count": len(page_data.get("tasks", []))
-                })
+    with read_lock(page_file):
+        try:
+            st = os.stat(page_file)
+            data = read_json(page_file)
+        except FileNotFoundError:
+            _cache_drop(page_id)
+            return None
     
-    return pages
+    _cache_put(page_id, st.st_mtime_ns, st.st_size, data)
+    return data
 
 
-def get_page(page_id: str) -> Dict[str, Any]:
-    """Load a specific page"""
+def _is_large(page_file: str) -> bool:
+    """Whether a page file is read through page_reader"""
+    try:
+        return os.path.getsize(page_file) >= STREAM_PAGE_BYTES
+    except OSError:
+        return False
+
+
+def get_page_lazy(page_id: str) -> Dict[str, Any]:
+    """Load a page; the tasks of a large page are a TaskStream parsed as they are iterated
+
+    A large page that page_reader cannot scan is parsed whole instead, so
+    a damaged file fails (or loads) as it would through get_page.
+    """
     page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
+    if db or not _is_large(page_file):
+        return get_page(page_id)
+    try:
+        with read_lock(page_file):
+            return page_reader.read_page(page_file)
+    except FileNotFoundError:
+        return None
+    except page_reader.PageFormatError:
+        return get_page(page_id)
+
+
+def get_task(page_id: str, task_id: str) -> Dict[str, Any]:
+    """Load one task of a page (None if missing), without parsing a large page whole"""
+    if db:
+        return db.get_task(page_id, task_id)
     
-    if not os.path.exists(page_file):
+    page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
+    if _is_large(page_file):
+        try:
+            with read_lock(page_file):
+                return page_reader.find_task(page_file, task_id)
+        except FileNotFoundError:
+            return None
+        except page_reader.PageFormatError:
+            pass  # parsed whole below
+    
+    for task in (get_page(page_id) or {}).get("tasks", []):
+        if task.get("id") == task_id:
+            return task
+    return None
+
+
+def _get_page_for_update(page_id: str) -> Dict[str, Any]:
+    """Load a page as a private copy that is safe to modify"""
+    page = get_page(page_id)
+    if not page:
         return None
     
-    with open(page_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    page = dict(page)
+    page["tasks"] = [dict(task) for task in page.get("tasks", [])]
+    return page
+
+
+def page_etag(page: Dict[str, Any]) -> str:
+    """Get the ETag for a page's current version"""
+    return f'"{page.get("version", 0)}"'
 
 
-def save_page(page_id: str, data: Dict[str, Any]) -> bool:
-    """Save page data"""
+def get_page_version(page_id: str) -> int:
+    """A page's version without loading it, or None if it is not known cheaply
+
+    Read from the page cache or the manifest when their stamp matches the
+    file, so a page edited outside the app is never reported unchanged.
+    """
+    if db:
+        return db.get_page_version(page_id)
+    
     try:
+        st = os.stat(os.path.join(PAGES_DIR, f"{page_id}.json"))
+    except FileNotFoundError:
+        return None
+    
+    with _page_cache_lock:
+        entry = _page_cache.get(page_id)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2].get("version", 0)
+    with _manifest_lock:
+        summary = _load_manifest().get(page_id)
+    if summary and summary.get("mtime_ns") == st.st_mtime_ns and summary.get("size") == st.st_size:
+        return summary.get("version", 0)
+    return None
+
+
+def save_page(page_id: str, data: Dict[str, Any], changes: List[tuple] = None) -> bool:
+    """Save page data, bumping its version
+
+    changes lists the (op, task) pairs made, for the change events; see
+    _notify_page_listeners.
+    """
+    try:
+        if db:
+            db.save_page(page_id, data)
+            _notify_page_listeners(page_id, data, {"version": data["version"]}, changes)
+            return True
+        
+        for task in data.get("tasks", []):
+            stamp_date_range(task)
         page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
-        with open(page_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with write_lock(page_file):
+            data["version"] = data.get("version", 0) + 1
+            write_json(page_file, data, indent=STORE_INDENT)
+            _page_written(page_id, page_file, data, changes)
         return True
     except Exception as e:
+        _cache_drop(page_id)
         print(f"Error saving page {page_id}: {e}")
         return False
 
 
+def _page_written(page_id: str, page_file: str, data: Dict[str, Any], changes: List[tuple] = None):
+    """Update the cache, manifest and listeners after a page file was written (caller holds its lock)"""
+    st = os.stat(page_file)
+    summary = _page_summary(data, st)
+    _cache_put(page_id, st.st_mtime_ns, st.st_size, data)
+    _manifest_put(page_id, summary)
+    _notify_page_listeners(page_id, data, summary, changes)
+
+
+def tally_tasks(tasks: Iterable[Dict[str, Any]], counts: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Add tasks to the counts of a page summary (task_count, status_counts, min_date, max_date)
+
+    Pass the returned counts back in to tally a page a chunk of tasks at a time.
+    """
+    counts = counts or {"task_count": 0, "status_counts": {}, "min_date": None, "max_date": None}
+    status_counts = counts["status_counts"]
+    min_date, max_date = counts["min_date"], counts["max_date"]
+    task_count = counts["task_count"]
+    
+    for task in tasks:
+        task_count += 1
+        status = task.get("status", "todo")
+        status_counts[status] = status_counts.get(status, 0) + 1
+        start_date, end_date = task_date_range(task)
+        if start_date and (min_date is None or start_date < min_date):
+            min_date = start_date
+        if end_date and (max_date is None or end_date > max_date):
+            max_date = end_date
+    
+    counts.update(task_count=task_count, min_date=min_date, max_date=max_date)
+    return counts
+
+
+def _page_summary(data: Dict[str, Any], st: os.stat_result, counts: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Build the manifest entry for a page (counts, if given, are its tally_tasks())"""
+    counts = counts or tally_tasks(data.get("tasks", []))
+    return {
+        "id": data.get("id"),
+        "name": data.get("name"),
+        "task_count": counts["task_count"],
+        "version": data.get("version", 0),
+        "status_counts": counts["status_counts"],
+        "min_date": counts["min_date"],
+        "max_date": counts["max_date"],
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size
+    }
+
+
+def _load_manifest() -> Dict[str, Any]:
+    """Get the manifest, re-reading the file only if it changed on disk"""
+    global _manifest, _manifest_stat
+    try:
+        st = os.stat(MANIFEST_FILE)
+        stat_key = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        stat_key = None
+    
+    if _manifest is not None and stat_key == _manifest_stat:
+        return _manifest
+    
+    _manifest = {}
+    if stat_key:
+        try:
+            _manifest = read_json(MANIFEST_FILE).get("pages", {})
+        except (ValueError, OSError) as e:
+            print(f"Rebuilding page manifest: {e}")
+    _manifest_stat = stat_key
+    return _manifest
+
+
+def _write_manifest(pages: Dict[str, Any]):
+    """Write the manifest file"""
+    global _manifest, _manifest_stat
+    try:
+        write_json(MANIFEST_FILE, {"pages": pages}, indent=None)
+        st = os.stat(MANIFEST_FILE)
+        _manifest = pages
+        _manifest_stat = (st.st_mtime_ns, st.st_size)
+    except Exception as e:
+        print(f"Error saving page manifest: {e}")
+
+
+def _manifest_put(page_id: str, summary: Dict[str, Any]):
+    """Replace (or remove, if summary is None) one page in the manifest"""
+    with _manifest_lock, write_lock(MANIFEST_FILE):
+        pages = dict(_load_manifest())
+        if summary is None:
+            if pages.pop(page_id, None) is None:
+                return
+        else:
+            pages[page_id] = summary
+        _write_manifest(pages)
+
+
+def get_page_summaries() -> List[Dict[str, Any]]:
+    """Get manifest summaries of all pages"""
+    return list(get_page_summary_map().values())
+
+
+def get_page_summary_map() -> Dict[str, Dict[str, Any]]:
+    """Get manifest summaries keyed by page id, refreshing entries whose files changed"""
+    if db:
+        return db.get_page_summary_map()
+    
+    if not os.path.exists(PAGES_DIR):
+        return {}
+    
+    with _manifest_lock:
+        pages = _load_manifest()
+    
+    # Page files are parsed without holding the manifest lock, since
+    # save_page takes the page lock before the manifest lock
+    fresh = {}
+    changed = False
+    with os.scandir(PAGES_DIR) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            page_id = entry.name[:-5]
+            st = entry.stat()
+            summary = pages.get(page_id)
+            if (not summary or summary.get("mtime_ns") != st.st_mtime_ns
+                    or summary.get("size") != st.st_size):
+                page_data = get_page_lazy(page_id)
+                if not page_data:
+                    continue
+                summary = _page_summary(page_data, st)
+                changed = True
+            fresh[page_id] = summary
+    
+    if changed or len(fresh) != len(pages):
+        with _manifest_lock, write_lock(MANIFEST_FILE):
+            _write_manifest(fresh)
+    
+    return fresh
+
+
 def create_page(name: str) -> Dict[str, Any]:
     """Create a new empty page"""
     page_id = str(uuid.uuid4())
@@ -110,23 +557,30 @@ def create_page(name: str) -> Dict[str, Any]:
 def delete_page(page_id: str) -> bool:
     """Delete a page"""
     try:
+        if db:
+            deleted = db.delete_page(page_id)
+            if deleted:
+                _notify_page_listeners(page_id, None, None)
+            return deleted
+        
         page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
-        if os.path.exists(page_file):
-            os.remove(page_file)
-            return True
+        with write_lock(page_file):
+            if os.path.exists(page_file):
+                os.remove(page_file)
+                _cache_drop(page_id)
+                page_reader.forget(page_file)
+                _manifest_put(page_id, None)
+                _notify_page_listeners(page_id, None, None)
+                return True
         return False
     except Exception as e:
         print(f"Error deleting page {page_id}: {e}")
         return False
 
 
-def create_task(page_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a new task in a page"""
-    page = get_page(page_id)
-    if not page:
-        return None
-    
-    task = {
+def _new_task(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a task with a fresh id and defaults for missing fields"""
+    return {
         "id": str(uuid.uuid4()),
         "title": task_data.get("title", ""),
         "description": task_data.get("description", ""),
@@ -134,116 +588,369 @@ def create_task(page_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         "timestamp": task_data.get("timestamp", datetime.now().strftime("%Y-%m-%d")),
         "status": task_data.get("status", "todo")
     }
+
+
+def create_task(page_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a new task in a page"""
+    task = _new_task(task_data)
     
-    page["tasks"].append(task)
-    
-    if save_page(page_id, page):
+    if db:
+        if not db.create_task(page_id, task):
+            return None
+        _notify_db_page_changed(page_id, [("create", task)])
         return task
+    
+    with write_lock(os.path.join(PAGES_DIR, f"{page_id}.json")):
+        page = _get_page_for_update(page_id)
+        if not page:
+            return None
+        
+        page["tasks"].append(task)
+        
+        if save_page(page_id, page, [("create", task)]):
+            return task
     return None
 
 
-def update_task(page_id: str, task_id: str, updates: Dict[str, Any]) -> bool:
-    """Update an existing task"""
-    page = get_page(page_id)
-    if not page:
-        return False
+def update_task(page_id: str, task_id: str, updates: Dict[str, Any],
+                if_match: str = None) -> int:
+    """Update an existing task
+
+    If if_match is given it must equal the page's current ETag, otherwise
+    PageVersionConflict is raised and nothing is written. Returns the page
+    version written (read while the page is still locked, so it is the
+    version this update made), or False if nothing was updated.
+    """
+    if db:
+        updated = db.update_task(page_id, task_id, updates, if_match)
+        if updated:
+            _notify_db_page_changed(page_id, [("update", db.get_task(page_id, task_id))])
+        return updated
     
-    for i, task in enumerate(page["tasks"]):
-        if task["id"] == task_id:
-            page["tasks"][i].update(updates)
-            return save_page(page_id, page)
+    page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
+    with write_lock(page_file):
+        if _is_large(page_file):
+            updated = _update_large_page_task(page_id, page_file, task_id, updates, if_match)
+            if updated is not None:
+                return updated
+        
+        page = _get_page_for_update(page_id)
+        if not page:
+            return False
+        
+        if if_match and if_match != '*' and if_match != page_etag(page):
+            raise PageVersionConflict(page_etag(page))
+        
+        for i, task in enumerate(page["tasks"]):
+            if task["id"] == task_id:
+                page["tasks"][i].update(updates)
+                if save_page(page_id, page, [("update", page["tasks"][i])]):
+                    return page["version"]
+                return False
     
     return False
 
 
-def delete_task(page_id: str, task_id: str) -> bool:
-    """Delete a task from a page"""
-    page = get_page(page_id)
-    if not page:
+def _update_large_page_task(page_id: str, page_file: str, task_id: str,
+                            updates: Dict[str, Any], if_match: str) -> int:
+    """update_task for a large page: only the task and the version are parsed and rewritten
+
+    The caller holds the page lock. Returns the version written, or None if
+    the page has no version field to splice or cannot be scanned, so the
+    caller falls back to saving the whole page.
+    """
+    try:
+        before = os.stat(page_file)
+        page = page_reader.read_page(page_file)
+    except FileNotFoundError:
         return False
+    except page_reader.PageFormatError:
+        return None
     
-    page["tasks"] = [task for task in page["tasks"] if task["id"] != task_id]
-    return save_page(page_id, page)
-
-
-def get_all_tasks() -> List[Dict[str, Any]]:
-    """Get all tasks from all pages"""
-    all_tasks = []
+    if if_match and if_match != '*' and if_match != page_etag(page):
+        raise PageVersionConflict(page_etag(page))
+    
+    old_task = page_reader.find_task(page_file, task_id)
+    if old_task is None:
+        return False
+    task = stamp_date_range({**old_task, **updates})
+    version = page.get("version", 0) + 1
     
-    for filename in os.listdir(PAGES_DIR):
-        if filename.endswith('.json'):
-            page_id = filename[:-5]
-            page_data = get_page(page_id)
-            if page_data and "tasks" in page_data:
-                for task in page_data["tasks"]:
-                    task_copy = task.copy()
-                    task_copy["page_id"] = page_id
-                    task_copy["page_name"] = page_data.get("name", "Unknown")
-                    all_tasks.append(task_copy)
+    try:
+        if not page_reader.replace_task(page_file, task_id, task, version):
+            return None
+    except Exception as e:
+        page_reader.forget(page_file)
+        print(f"Error saving page {page_id}: {e}")
+        return False
     
-    return all_tasks
+    page["version"] = version
+    st = os.stat(page_file)
+    summary = _spliced_summary(page_id, page, before, old_task, task, st)
+    _cache_drop(page_id)
+    _manifest_put(page_id, summary)
+    _notify_page_listeners(page_id, page, summary, [("update", task)])
+    return version
 
 
-def import_page_from_json(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Import a page from JSON data"""
-    # Validate structure
-    if "name" not in data:
-        return None
+def _spliced_summary(page_id: str, page: Dict[str, Any], before: os.stat_result,
+                     old_task: Dict[str, Any], task: Dict[str, Any], st: os.stat_result) -> Dict[str, Any]:
+    """The manifest entry of a page after one task changed, adjusted from the previous entry
+
+    The page is only re-read if the old task held the page's earliest start
+    or latest end date and that date changed.
+    """
+    with _manifest_lock:
+        old = _load_manifest().get(page_id)
+    old_start, old_end = task_date_range(old_task)
+    start, end = task_date_range(task)
+    if (not old or old.get("mtime_ns") != before.st_mtime_ns or old.get("size") != before.st_size
+            or (old_start and old_start == old["min_date"] and start != old_start)
+            or (old_end and old_end == old["max_date"] and end != old_end)):
+        return _page_summary(page, st)
     
-    # Generate new ID if not present or if ID already exists
-    page_id = data.get("id", str(uuid.uuid4()))
-    if get_page(page_id):
-        page_id = str(uuid.uuid4())
+    status_counts = dict(old["status_counts"])
+    old_status = old_task.get("status", "todo")
+    status_counts[old_status] -= 1
+    if not status_counts[old_status]:
+        del status_counts[old_status]
+    status = task.get("status", "todo")
+    status_counts[status] = status_counts.get(status, 0) + 1
     
-    page_data = {
-        "id": page_id,
-        "name": data["name"],
-        "tasks": data.get("tasks", [])
+    return {
+        **old,
+        "version": page["version"],
+        "status_counts": status_counts,
+        "min_date": min(filter(None, (old["min_date"], start)), default=None),
+        "max_date": max(filter(None, (old["max_date"], end)), default=None),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size
     }
+
+
+def delete_task(page_id: str, task_id: str) -> bool:
+    """Delete a task from a page"""
+    if db:
+        deleted = db.delete_task(page_id, task_id)
+        if deleted:
+            _notify_db_page_changed(page_id, [("delete", {"id": task_id})])
+        return deleted
     
-    # Ensure all tasks have IDs
-    for task in page_data["tasks"]:
-        if "id" not in task:
-            task["id"] = str(uuid.uuid4())
+    with write_lock(os.path.join(PAGES_DIR, f"{page_id}.json")):
+        page = _get_page_for_update(page_id)
+        if not page:
+            return False
+        
+        page["tasks"] = [task for task in page["tasks"] if task["id"] != task_id]
+        return save_page(page_id, page, [("delete", {"id": task_id})])
+
+
+class TaskBatchError(Exception):
+    """Raised when an operation of a task batch is invalid or cannot be applied"""
+
+    def __init__(self, index: int, message: str, status: int = 400):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+        self.status = status
+
+
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+
+def _check_batch(operations: List[Dict[str, Any]]) -> List[str]:
+    """Validate the shape of batch operations; returns the touched page ids in lock order"""
+    page_ids = set()
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in BATCH_OPERATIONS:
+            raise TaskBatchError(index, f"op must be one of: {', '.join(BATCH_OPERATIONS)}")
+        if not isinstance(operation.get("page_id"), str):
+            raise TaskBatchError(index, "page_id is required")
+        if operation["op"] != "create" and not isinstance(operation.get("task_id"), str):
+            raise TaskBatchError(index, "task_id is required")
+        field = {"create": "task", "update": "updates"}.get(operation["op"])
+        if field and not isinstance(operation.get(field, {}), dict):
+            raise TaskBatchError(index, f"{field} must be an object")
+        page_ids.add(operation["page_id"])
+    return sorted(page_ids)
+
+
+def _apply_batch(pages: Dict[str, Any], operations: List[Dict[str, Any]],
+                 if_match: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Apply batch operations, in order, to loaded pages (modified in place)"""
+    for page_id, etag in (if_match or {}).items():
+        page = pages.get(page_id)
+        if page and etag != '*' and etag != page_etag(page):
+            raise PageVersionConflict(page_etag(page))
     
-    if save_page(page_id, page_data):
-        return page_data
-    return None
+    results = []
+    for index, operation in enumerate(operations):
+        page = pages[operation["page_id"]]
+        if page is None:
+            raise TaskBatchError(index, "page not found", 404)
+        
+        if operation["op"] == "create":
+            task = stamp_date_range(_new_task(operation.get("task", {})))
+            page["tasks"].append(task)
+            results.append({"op": "create", "page_id": operation["page_id"], "task": task})
+            continue
+        
+        matches = [i for i, task in enumerate(page["tasks"]) if task["id"] == operation["task_id"]]
+        if not matches:
+            raise TaskBatchError(index, "task not found", 404)
+        if operation["op"] == "update":
+            page["tasks"][matches[0]].update(operation.get("updates", {}))
+            stamp_date_range(page["tasks"][matches[0]])
+            results.append({"op": "update", "page_id": operation["page_id"],
+                            "task": page["tasks"][matches[0]]})
+        else:
+            page["tasks"] = [task for task in page["tasks"] if task["id"] != operation["task_id"]]
+            results.append({"op": "delete", "page_id": operation["page_id"],
+                            "task_id": operation["task_id"]})
+    return results
+
+
+def _batch_changes(results: List[Dict[str, Any]]) -> Dict[str, List[tuple]]:
+    """Per-page (op, task) change lists of applied batch operations"""
+    changes = {}
+    for result in results:
+        task = result.get("task") or {"id": result.get("task_id")}
+        changes.setdefault(result["page_id"], []).append((result["op"], task))
+    return changes
 
 
-def update_overdue_tasks():
-    """Automatically update task statuses based on timestamps"""
-    today = datetime.now().strftime("%Y-%m-%d")
+def apply_task_batch(operations: List[Dict[str, Any]], if_match: Dict[str, str] = None) -> Dict[str, Any]:
+    """Create, update and delete tasks across pages, all or nothing
+
+    Operations are applied in order. Every touched page is read once,
+    changed in memory and written once, and the pages are committed
+    together. if_match maps page ids to the ETag each page must still have.
+    Raises TaskBatchError or PageVersionConflict without writing anything.
+    """
+    page_ids = _check_batch(operations)
     
-    for filename in os.listdir(PAGES_DIR):
-        if filename.endswith('.json'):
-            page_id = filename[:-5]
-            page_data = get_page(page_id)
+    if db:
+        pages = {}
+        
+        def apply(loaded):
+            pages.update(loaded)
+            return _apply_batch(loaded, operations, if_match)
+        
+        results = db.modify_pages(page_ids, apply)
+        changes = _batch_changes(results)
+        for page_id, page in pages.items():
+            _notify_page_listeners(page_id, page, {"version": page["version"]}, changes[page_id])
+    else:
+        page_files = {page_id: os.path.join(PAGES_DIR, f"{page_id}.json") for page_id in page_ids}
+        with ExitStack() as locks:
+            # Locks are taken in page id order so concurrent batches cannot deadlock
+            for page_file in page_files.values():
+                locks.enter_context(write_lock(page_file))
             
-            if page_data and "tasks" in page_data:
-                updated = False
-                for task in page_data["tasks"]:
-                    # Parse end date from timestamp
-                    end_date = task.get("timestamp", "")
-                    
-                    # Handle date ranges: "2026-01-20:2026-01-30" or "2026-01-20-2026-01-30"
-                    if ':' in end_date:
-                        end_date = end_date.split(':')[1]
-                    elif '-' in end_date and len(end_date) > 10:
-                        # Check if it's a range like "2026-01-20-2026-01-30"
-                        parts = end_date.split('-')
-                        if len(parts) == 6:
-                            end_date = f"{parts[3]}-{parts[4]}-{parts[5]}"
-                    
-                    # If task has an end date and it's in the past, and not completed, mark as overdue
-                    if (end_date and 
-                        end_date < today and 
-                        task.get("status") not in ["completed", "overdue"]):
-                        task["status"] = "overdue"
-                        updated = True
-                
-                if updated:
-                    save_page(page_id, page_data)
+            pages = {page_id: _get_page_for_update(page_id) for page_id in page_ids}
+            results = _apply_batch(pages, operations, if_match)
+            for page in pages.values():
+                page["version"] = page.get("version", 0) + 1
+            try:
+                write_json_files({page_files[page_id]: page for page_id, page in pages.items()},
+                                 indent=STORE_INDENT)
+            except Exception:
+                for page_id in page_ids:
+                    _cache_drop(page_id)
+                raise
+            changes = _batch_changes(results)
+            for page_id, page in pages.items():
+                _page_written(page_id, page_files[page_id], page, changes[page_id])
+    
+    return {
+        "results": results,
+        "etags": {page_id: page_etag(page) for page_id, page in pages.items()}
+    }
+
+
+def page_exists(page_id: str) -> bool:
+    """Whether a page exists, without loading it"""
+    if db:
+        return db.get_page_version(page_id) is not None
+    return os.path.exists(os.path.join(PAGES_DIR, f"{page_id}.json"))
+
+
+def add_page_file(path: str, page_id: str, name: str, counts: Dict[str, Any]) -> Dict[str, Any]:
+    """Add a new page from a complete page file written elsewhere (by the importer)
+
+    path must be in PAGES_DIR and hold the page with this id and name and a
+    version of 1; counts is the tally_tasks() of its tasks. In JSON mode the
+    file is moved into place; with SQLite its tasks are streamed into the
+    database and the file removed. Raises FileExistsError if page_id is
+    taken. Returns the page's id, name, task count and version.
+    """
+    page_file = os.path.join(PAGES_DIR, f"{page_id}.json")
+    with write_lock(page_file):
+        if page_exists(page_id):
+            raise FileExistsError(f"Page {page_id} already exists")
+        
+        if db:
+            # Imports run in one transaction each; queue them rather than
+            # let one wait out the busy timeout behind another
+            with write_lock(db.DB_FILE):
+                db.save_page(page_id, {"name": name, "tasks": page_reader.iter_tasks(path)})
+            os.remove(path)
+            _notify_db_page_changed(page_id, None)
+            version = db.get_page_version(page_id)
+        else:
+            place_file(path, page_file)
+            page = {"id": page_id, "name": name, "version": 1,
+                    "tasks": page_reader.TaskStream(page_file, counts["task_count"])}
+            summary = _page_summary(page, os.stat(page_file), counts)
+            _manifest_put(page_id, summary)
+            _notify_page_listeners(page_id, page, summary)
+            version = 1
+    
+    return {"id": page_id, "name": name, "task_count": counts["task_count"], "version": version}
+
+
+def list_page_ids() -> List[str]:
+    """Get the ids of all page files"""
+    if db:
+        return db.list_page_ids()
+    if not os.path.exists(PAGES_DIR):
+        return []
+    return [filename[:-5] for filename in os.listdir(PAGES_DIR) if filename.endswith('.json')]
+
+
+def is_task_overdue(task: Dict[str, Any], today: str) -> bool:
+    """Check whether a task's end date has passed and it is still open"""
+    end_date = task_ordinals(task)[1]
+    return bool(end_date and
+                end_date < date_ordinal(today) and
+                task.get("status") not in ["completed", "overdue"])
+
+
+def mark_tasks_overdue(page_id: str, task_ids: List[str], today: str = None) -> int:
+    """Set status to overdue for the given tasks that are actually past due"""
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    page = get_page(page_id)
+    if not page:
+        return 0
+    
+    wanted = set(task_ids)
+    if not any(task.get("id") in wanted and is_task_overdue(task, today)
+               for task in page.get("tasks", [])):
+        return 0
+    
+    with write_lock(os.path.join(PAGES_DIR, f"{page_id}.json")):
+        page = _get_page_for_update(page_id)
+        if not page:
+            return 0
+        
+        changes = []
+        for task in page["tasks"]:
+            if task.get("id") in wanted and is_task_overdue(task, today):
+                task["status"] = "overdue"
+                changes.append(("update", task))
+        
+        if changes and save_page(page_id, page, changes):
+            return len(changes)
+    return 0
 
 
 def sync_tags_from_page(page_id: str) -> Dict[str, Any]:
@@ -252,30 +959,31 @@ def sync_tags_from_page(page_id: str) -> Dict[str, Any]:
     if not page:
         return {'success': False, 'error': 'Page not found'}
     
-    maindata = get_maindata()
-    existing_tags = {tag['id']: tag for tag in maindata.get('tags', [])}
-    
     # Extract unique tags from all tasks in the page
     page_tags = set()
     for task in page.get('tasks', []):
         page_tags.update(task.get('tags', []))
     
-    # Add new tags to maindata
-    new_tags_added = []
-    for tag_name in page_tags:
-        tag_id = tag_name.lower().replace(' ', '-')
-        if tag_id not in existing_tags:
-            new_tag = {
-                'id': tag_id,
-                'name': tag_name,
-                'color': '#808080'  # Default gray
-            }
-            existing_tags[tag_id] = new_tag
-            new_tags_added.append(new_tag)
-    
-    if new_tags_added:
-        maindata['tags'] = list(existing_tags.values())
-        save_maindata(maindata)
+    with write_lock(MAINDATA_FILE):
+        maindata = get_maindata()
+        existing_tags = {tag['id']: tag for tag in maindata.get('tags', [])}
+        
+        # Add new tags to maindata
+        new_tags_added = []
+        for tag_name in page_tags:
+            tag_id = tag_name.lower().replace(' ', '-')
+            if tag_id not in existing_tags:
+                new_tag = {
+                    'id': tag_id,
+                    'name': tag_name,
+                    'color': '#808080'  # Default gray
+                }
+                existing_tags[tag_id] = new_tag
+                new_tags_added.append(new_tag)
+        
+        if new_tags_added:
+            maindata['tags'] = list(existing_tags.values())
+            save_maindata(maindata)
     
     return {
         'success': True,
@@ -286,43 +994,46 @@ def sync_tags_from_page(page_id: str) -> Dict[str, Any]:
 
 def update_page_name(page_id: str, new_name: str) -> Dict[str, Any]:
     """Update a page's name"""
-    page = get_page(page_id)
-    if not page:
-        return {'success': False, 'error': 'Page not found'}
-    
-    page['name'] = new_name
-    save_page(page_id, page)
+    with write_lock(os.path.join(PAGES_DIR, f"{page_id}.json")):
+        page = _get_page_for_update(page_id)
+        if not page:
+            return {'success': False, 'error': 'Page not found'}
+        
+        page['name'] = new_name
+        save_page(page_id, page)
     
     # Update in maindata
-    maindata = get_maindata()
-    for p in maindata.get('pages', []):
-        if p['id'] == page_id:
-            p['name'] = new_name
-            break
-    save_maindata(maindata)
+    with write_lock(MAINDATA_FILE):
+        maindata = get_maindata()
+        for p in maindata.get('pages', []):
+            if p['id'] == page_id:
+                p['name'] = new_name
+                break
+        save_maindata(maindata)
     
     return {'success': True, 'page': page}
 
 
 def update_tag(tag_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
     """Update a tag's properties (name, color)"""
-    maindata = get_maindata()
-    tags = maindata.get('tags', [])
-    
-    tag_found = False
-    for tag in tags:
-        if tag['id'] == tag_id:
-            if 'name' in updates:
-                tag['name'] = updates['name']
-            if 'color' in updates:
-                tag['color'] = updates['color']
-            tag_found = True
-            break
-    
-    if not tag_found:
-        return {'success': False, 'error': 'Tag not found'}
-    
-    maindata['tags'] = tags
-    save_maindata(maindata)
+    with write_lock(MAINDATA_FILE):
+        maindata = get_maindata()
+        tags = maindata.get('tags', [])
+        
+        tag_found = False
+        for tag in tags:
+            if tag['id'] == tag_id:
+                if 'name' in updates:
+                    tag['name'] = updates['name']
+                if 'color' in updates:
+                    tag['color'] = updates['color']
+                tag_found = True
+                break
+        
+        if not tag_found:
+            return {'success': False, 'error': 'Tag not found'}
+        
+        maindata['tags'] = tags
+        save_maindata(maindata)
     
     return {'success': True, 'tags': tags}
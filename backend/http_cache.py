@@ -0,0 +1,158 @@
+"""
+HTTP Caching for Udo
+Conditional GET and response compression for the API. Read endpoints
+declare a validator that derives the ETag from file stats (inode, mtime,
+size), the store generation or the SQLite change stamp, so a matching
+If-None-Match is answered with 304 before any JSON is loaded. Large bodies are compressed with
+brotli (when installed) or gzip.
+"""
+
+import gzip
+import hashlib
+import os
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import make_response, request
+
+from backend.file_manager import db, get_generation
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller responses are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get('UDO_COMPRESS_MIN_BYTES', 1024))
+
+# Dynamic responses are compressed once per request, so favour speed over ratio
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'image/svg+xml')
+
+
+def file_stamp(path: str) -> Optional[tuple]:
+    """(inode, mtime_ns, size) of a file, or None if it does not exist
+
+    Files are replaced atomically on save, so the inode alone changes with
+    every write even within the filesystem's timestamp granularity.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def make_etag(*parts) -> str:
+    """Short opaque ETag value (unquoted) for a tuple of validator parts"""
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def store_validator(*paths: str, generation: bool = False) -> tuple:
+    """(etag, last_modified) for a response built from the given files
+
+    With the SQLite backend the files are not used; the database's change
+    stamp (persisted, so it never repeats across restarts) and the store
+    generation are the validator. generation=True adds it in JSON mode as well, for
+    responses built from a directory of files whose listing can change
+    without any single file's stamp telling.
+    """
+    if db:
+        return make_etag(*db.change_stamp(), get_generation()), None
+    stamps = [file_stamp(path) for path in paths]
+    parts = stamps + [get_generation()] if generation else stamps
+    mtimes = [stamp[1] for stamp in stamps if stamp]
+    return make_etag(*parts), max(mtimes) / 1e9 if mtimes else None
+
+
+def strong_etag(value: Optional[str]) -> Optional[str]:
+    """An ETag from a request header with any weak prefix dropped
+
+    Compressed responses carry the weak form of their ETag, which clients
+    echo back in If-Match.
+    """
+    if value and value.startswith('W/'):
+        return value[2:]
+    return value
+
+
+def _not_modified(etag: str, last_modified: Optional[float]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def conditional(validator: Callable[..., Optional[tuple]]):
+    """Decorate a GET view with a validator(**view_args) -> (etag, last_modified) or None
+
+    The validator is evaluated before the view, so a request whose
+    If-None-Match (or If-Modified-Since) still matches gets a 304 without
+    the view running. None skips caching for that request. The validator
+    is computed before the data is read, so a save racing the view can
+    only make the ETag older than the body, never newer.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            validated = validator(**kwargs)
+            if validated is None:
+                return view(**kwargs)
+            etag, last_modified = validated
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = int(last_modified)
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+
+def _encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """after_request hook: compress large text responses the client accepts"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    mimetype = response.mimetype or ''
+    if not (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES) or mimetype == 'text/event-stream':
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _encoding()
+    if encoding is None or (response.content_length or 0) < COMPRESS_MIN_BYTES:
+        return response
+
+    body = response.get_data()
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(body, compresslevel=GZIP_LEVEL))
+    response.headers['Content-Encoding'] = encoding
+    # The compressed bytes differ from the identity representation
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Enable response compression for every route"""
+    app.after_request(compress_response)
@@ -0,0 +1,435 @@
+"""
+Page Import for Udo
+Streams board exports ("page" plus "columns" of tasks, as in data.json) and
+Udo page files into new pages without loading them whole. Tasks pass one at
+a time through a chain of generators (validate, convert board tasks, assign
+ids) and are written to a staged page file in chunks. When importing
+a file, a checkpoint after each chunk lets an interrupted import resume
+where it stopped.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+from backend import file_manager
+from backend.dates import duration_timestamp, ordinal_date, parse_date_range, stamp_date_range
+from backend.json_stream import iter_values
+from backend.storage import atomic_write_text
+
+# Board column ids -> task statuses
+STATUS_MAP = {
+    'todo': 'todo',
+    'inprogress': 'in-progress',
+    'in-progress': 'in-progress',
+    'done': 'completed',
+    'completed': 'completed',
+    'overdue': 'overdue'
+}
+
+# Tasks written (and checkpointed) at a time
+CHUNK_TASKS = int(os.environ.get('UDO_IMPORT_CHUNK_TASKS', 1000))
+
+# Minimum seconds between progress callbacks
+PROGRESS_SECONDS = 1.0
+
+# Invalid tasks described in a report (all of them are counted)
+MAX_REPORTED_ERRORS = 20
+
+# Staged page files and checkpoints live in PAGES_DIR under this prefix,
+# without the .json suffix that would make them pages
+STAGING_PREFIX = '.import-'
+
+# Page ids that are safe as file names
+PAGE_ID_RE = re.compile(r'[A-Za-z0-9][\w-]*')
+
+_TEXT_FIELDS = ('title', 'description', 'timestamp', 'status')
+
+
+class ImportFormatError(ValueError):
+    """Raised when a document is neither a board export nor a page file"""
+
+
+class ImportReport:
+    """Progress and outcome of one import"""
+
+    def __init__(self, source: str, total_bytes: int = None):
+        self.source = source
+        self.total_bytes = total_bytes
+        self.bytes_read = 0
+        self.items = 0          # source tasks consumed
+        self.tasks = 0          # tasks written
+        self.invalid = 0        # source tasks skipped as invalid
+        self.errors = []        # descriptions of the first invalid tasks
+        self.resumed_from = 0   # source tasks already imported by an earlier run
+        self.counts = None      # file_manager.tally_tasks() of the tasks written
+        self.page = None        # {"id", "name", "task_count", "version"} once added
+        self.error = None       # why the import failed (import_files only)
+
+    @property
+    def fraction(self) -> float:
+        """Share of the source read so far (0 when its size is unknown)"""
+        if not self.total_bytes:
+            return 1.0 if self.page else 0.0
+        return min(1.0, self.bytes_read / self.total_bytes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "page": self.page,
+            "imported": self.tasks,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "resumed_from": self.resumed_from,
+            "error": self.error
+        }
+
+
+def _expand(path: tuple) -> bool:
+    """Containers walked into: the document, "columns", each column and the task arrays"""
+    depth = len(path)
+    return (depth == 0
+            or (depth == 1 and path[0] in ('columns', 'tasks'))
+            or (depth == 2 and path[0] == 'columns')
+            or (depth == 3 and path[0] == 'columns' and path[2] == 'tasks'))
+
+
+def column_ids(f) -> Dict[int, Any]:
+    """Column index -> column id of a board export, read in one streaming pass"""
+    return {path[1]: value for path, value in iter_values(f, _expand)
+            if len(path) == 3 and path[0] == 'columns' and path[2] == 'id'}
+
+
+class BoardSource:
+    """Tasks read one at a time from a board export or a Udo page file
+
+    page_id and page_name are filled in as the document is read, so they are
+    only final once tasks() is exhausted. Board tasks take their status from
+    their column; if a column's tasks come before its id, the column ids are
+    looked up in one extra pass over reopen() (without it, the task's own
+    status is kept).
+    """
+
+    def __init__(self, f, reopen: Callable = None):
+        self.board = False
+        self.page_id = None
+        self.page_name = None
+        self._reopen = reopen
+        self._columns = {}
+        self._readers = []
+        self._values = iter_values(f, _expand, reader_out=self._readers)
+
+    @property
+    def bytes_read(self) -> int:
+        return self._readers[0].bytes_read if self._readers else 0
+
+    def tasks(self) -> Iterator[Any]:
+        for path, value in self._values:
+            if not path or isinstance(path[0], int):
+                raise ImportFormatError("Expected a page or board object")
+            depth = len(path)
+            if path[0] == 'columns':
+                self.board = True
+                if depth == 4:
+                    yield self._board_task(path[1], value)
+                elif depth == 3 and path[2] == 'id':
+                    self._columns[path[1]] = value
+            elif path[0] == 'tasks' and depth == 2:
+                yield value
+            elif depth == 1:
+                self._header(path[0], value)
+
+    def _header(self, key: str, value: Any):
+        if key == 'page' and isinstance(value, dict):
+            self.board = True
+            self.page_id = value.get('id') or self.page_id
+            self.page_name = value.get('name') or self.page_name
+        elif key == 'id' and not self.board:
+            self.page_id = value
+        elif key == 'name' and not self.board:
+            self.page_name = value
+
+    def _board_task(self, column: int, task: Any) -> Any:
+        """A board task in page form, with its column's id as status"""
+        if not isinstance(task, dict):
+            return task
+        if column not in self._columns and self._reopen:
+            with self._reopen() as f:
+                self._columns.update(column_ids(f))
+            self._reopen = None
+
+        page_task = {
+            "id": task.get("id"),
+            "title": task.get("title", ""),
+            "description": task.get("description", ""),
+            "tags": task.get("tags", []),
+            "timestamp": task.get("timestamp", ""),
+            "status": self._columns.get(column) or task.get("status")
+        }
+        if "priority" in task:
+            page_task["priority"] = task["priority"]
+        if task.get("meta"):
+            page_task["meta"] = task["meta"]
+        return page_task
+
+
+def _task_error(task: Any) -> str:
+    """Why a task cannot be imported (None if it can)"""
+    if not isinstance(task, dict):
+        return "not an object"
+    for field in _TEXT_FIELDS:
+        if task.get(field) is not None and not isinstance(task[field], str):
+            return f'"{field}" is not a string'
+    tags = task.get("tags")
+    if tags is not None and not (isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)):
+        return '"tags" is not a list of strings'
+    return None
+
+
+def validate(tasks: Iterable[Any], report: ImportReport) -> Iterator[Dict[str, Any]]:
+    """Drop tasks that cannot be imported, counting and describing them in report"""
+    for task in tasks:
+        report.items += 1
+        error = _task_error(task)
+        if error is None:
+            yield task
+            continue
+        report.invalid += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(f"Task {report.items}: {error}")
+
+
+def board_status(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate a board column id to a status ("done" becomes "completed"), defaulting to todo"""
+    status = (task.get("status") or "todo").lower()
+    task["status"] = STATUS_MAP.get(status, status)
+    return task
+
+
+def board_dates(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a single date or ISO datetime to YYYY-MM-DD
+
+    A single date with meta.duration_days becomes a range of that many days.
+    """
+    timestamp = task.get("timestamp") or ""
+    start, end = parse_date_range(timestamp)
+    if start and start == end:
+        timestamp = ordinal_date(start)
+        meta = task.get("meta")
+        duration_days = meta.get("duration_days") if isinstance(meta, dict) else None
+        if duration_days:
+            try:
+                timestamp = duration_timestamp(timestamp, int(duration_days))
+            except (TypeError, ValueError):
+                pass  # keep the single date
+        task["timestamp"] = timestamp
+    return task
+
+
+def convert(tasks: Iterable[Dict[str, Any]], source: BoardSource) -> Iterator[Dict[str, Any]]:
+    """Bring board export tasks into page form and stamp each task's date range
+
+    Only tasks of a board export get their status and dates converted; the
+    tasks of a Udo page file (such as a page export) are kept as given.
+    """
+    for task in tasks:
+        if source.board:
+            task = board_dates(board_status(task))
+        yield stamp_date_range(task)
+
+
+def assign_ids(tasks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Give tasks without a (string) id a new one"""
+    for task in tasks:
+        if not task.get("id") or not isinstance(task["id"], str):
+            task["id"] = str(uuid.uuid4())
+        yield task
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group items into lists of up to size"""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _dumps(task: Dict[str, Any]) -> bytes:
+    """One task, on a line of its own and minified if pages are stored compact"""
+    separators = (',', ':') if file_manager.STORE_INDENT is None else None
+    return json.dumps(task, ensure_ascii=False, separators=separators).encode('utf-8')
+
+
+def _page_identity(source: BoardSource) -> tuple:
+    """(page_id, name) of the new page, with a fresh id if the source's is missing or taken"""
+    if source.board:
+        page_id = source.page_id or f"imported-{int(time.time())}"
+        name = source.page_name or page_id
+    else:
+        if not isinstance(source.page_name, str) or not source.page_name:
+            raise ImportFormatError("Page name is required")
+        page_id, name = source.page_id, source.page_name
+    if not isinstance(page_id, str) or not PAGE_ID_RE.fullmatch(page_id) or file_manager.page_exists(page_id):
+        page_id = str(uuid.uuid4())
+    return page_id, str(name)
+
+
+def _staging_paths(key: str) -> tuple:
+    base = os.path.join(file_manager.PAGES_DIR, f"{STAGING_PREFIX}{key}")
+    return base + '.part', base + '.checkpoint'
+
+
+def _load_checkpoint(checkpoint_file: str, staged: str, stamp: list) -> Dict[str, Any]:
+    """The checkpoint of an interrupted import of the same source file, or None"""
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get("source") != stamp or os.path.getsize(staged) < state["bytes"]:
+            return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return state
+
+
+def _save_checkpoint(checkpoint_file: str, stamp: list, report: ImportReport, written: int):
+    atomic_write_text(checkpoint_file, json.dumps({
+        "source": stamp,
+        "bytes": written,
+        "items": report.items,
+        "tasks": report.tasks,
+        "counts": report.counts,
+        "invalid": report.invalid,
+        "errors": report.errors
+    }))
+
+
+def _import(f, report: ImportReport, key: str, stamp: list = None, resume: bool = False,
+            chunk_tasks: int = CHUNK_TASKS, progress: Callable = None,
+            reopen: Callable = None) -> ImportReport:
+    """Stream one source into a staged page file and add it as a new page
+
+    With a source stamp, a checkpoint is written after each chunk and (with
+    resume) an earlier checkpoint for the same stamp is continued from.
+    """
+    staged, checkpoint_file = _staging_paths(key)
+    os.makedirs(file_manager.PAGES_DIR, exist_ok=True)
+    state = _load_checkpoint(checkpoint_file, staged, stamp) if stamp and resume else None
+
+    source = BoardSource(f, reopen)
+    tasks = source.tasks()
+    if state:
+        report.items = report.resumed_from = state["items"]
+        report.tasks = state["tasks"]
+        report.counts = state["counts"]
+        report.invalid = state["invalid"]
+        report.errors = state["errors"]
+        tasks = itertools.islice(tasks, state["items"], None)
+
+    pipeline = chunked(assign_ids(convert(validate(tasks, report), source)), chunk_tasks)
+    try:
+        with open(staged, 'r+b' if state else 'wb') as out:
+            if state:
+                out.truncate(state["bytes"])
+                out.seek(state["bytes"])
+            else:
+                out.write(b'{"tasks": [')
+            last_progress = time.monotonic()
+            for chunk in pipeline:
+                out.write((b',' if report.tasks else b'') + b','.join(b'\n' + _dumps(task) for task in chunk))
+                report.tasks += len(chunk)
+                report.counts = file_manager.tally_tasks(chunk, report.counts)
+                report.bytes_read = source.bytes_read
+                if stamp:
+                    out.flush()
+                    os.fsync(out.fileno())
+                    _save_checkpoint(checkpoint_file, stamp, report, out.tell())
+                if progress and time.monotonic() - last_progress >= PROGRESS_SECONDS:
+                    progress(report)
+                    last_progress = time.monotonic()
+
+            report.bytes_read = source.bytes_read
+            page_id, name = _page_identity(source)
+            header = json.dumps({"id": page_id, "name": name, "version": 1}, ensure_ascii=False)
+            out.write(b'\n], ' + header[1:].encode('utf-8') + b'\n')
+
+        report.page = file_manager.add_page_file(staged, page_id, name,
+                                                 report.counts or file_manager.tally_tasks([]))
+    except BaseException:
+        if not stamp:
+            try:
+                os.remove(staged)
+            except OSError:
+                pass
+        raise
+
+    if stamp:
+        try:
+            os.remove(checkpoint_file)
+        except OSError:
+            pass
+    if progress:
+        progress(report)
+    return report
+
+
+def import_stream(f, source: str = "upload", chunk_tasks: int = CHUNK_TASKS,
+                  progress: Callable = None) -> ImportReport:
+    """Import a board export or page file read from binary stream f as a new page
+
+    Raises ValueError (JSONStreamError, ImportFormatError) for a document
+    that cannot be imported; invalid tasks are skipped and listed in the
+    returned report.
+    """
+    return _import(f, ImportReport(source), uuid.uuid4().hex,
+                   chunk_tasks=chunk_tasks, progress=progress)
+
+
+def import_file(path: str, chunk_tasks: int = CHUNK_TASKS, resume: bool = True,
+                progress: Callable = None) -> ImportReport:
+    """Import a board export or page file as a new page
+
+    Progress is checkpointed per chunk; with resume, an import of the same
+    (unchanged) file that was interrupted continues where it stopped.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = hashlib.blake2b(path.encode('utf-8'), digest_size=8).hexdigest()
+    with open(path, 'rb') as f:
+        return _import(f, ImportReport(os.path.basename(path), st.st_size), key,
+                       stamp=[st.st_size, st.st_mtime_ns], resume=resume,
+                       chunk_tasks=chunk_tasks, progress=progress,
+                       reopen=lambda: open(path, 'rb'))
+
+
+def _import_file_report(path: str, chunk_tasks: int, resume: bool, progress: Callable) -> ImportReport:
+    """import_file for a worker process; a failure is returned in the report"""
+    try:
+        return import_file(path, chunk_tasks, resume, progress)
+    except Exception as e:
+        report = ImportReport(os.path.basename(path))
+        report.error = str(e)
+        return report
+
+
+def import_files(paths: List[str], workers: int = None, chunk_tasks: int = CHUNK_TASKS,
+                 resume: bool = True, progress: Callable = None) -> List[ImportReport]:
+    """Import several files, each in its own worker process, returning their reports in order
+
+    progress, if given, must be a module-level function so it can be sent
+    to the workers.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [_import_file_report(path, chunk_tasks, resume, progress) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_import_file_report, path, chunk_tasks, resume, progress)
+                   for path in paths]
+        return [future.result() for future in futures]
@@ -0,0 +1,147 @@
+"""
+Streaming JSON Parser for Udo
+Reads a JSON document from a file object in chunks and yields its values
+one at a time, so a large export is never held in memory as a whole. The
+caller picks which objects and arrays are walked into; every other value
+is decoded on its own by the json module's C scanner.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, Callable, Iterator, Tuple
+
+# Bytes read from the file at a time
+CHUNK_BYTES = 1024 * 1024
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# What is left of a buffer ending part way into a number's fraction or exponent
+_NUMBER_TAIL_RE = re.compile(r'[.eE][+-]?')
+_decoder = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    """Raised when the document is not valid JSON"""
+
+
+class _Reader:
+    """A text buffer over a binary file, refilled as values are consumed"""
+
+    def __init__(self, f, chunk_bytes: int):
+        self.f = f
+        self.chunk_bytes = chunk_bytes
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self, size: int):
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        self.eof = not data
+        # Consumed text is dropped, so the buffer only holds the value being decoded
+        self.buf = self.buf[self.pos:] + self.decoder.decode(data, final=self.eof)
+        self.pos = 0
+
+    def peek(self) -> str:
+        """The next non-whitespace character ('' at the end of the document)"""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ''
+            self._fill(self.chunk_bytes)
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            self.error(f"expected '{char}'")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        """Decode the value at the current position, reading more of the file as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise JSONStreamError(f"Invalid JSON near byte {self.bytes_read}: {e.msg}")
+                # Read at least as much again, so a value spanning many chunks is
+                # decoded O(log n) times rather than once per chunk
+                self._fill(max(self.chunk_bytes, len(self.buf)))
+                continue
+            if not self.eof and (end == len(self.buf) or (
+                    isinstance(value, (int, float)) and _NUMBER_TAIL_RE.fullmatch(self.buf, end))):
+                self._fill(self.chunk_bytes)  # a number may go on in the next chunk
+                continue
+            self.pos = end
+            return value
+
+    def error(self, message: str):
+        raise JSONStreamError(f"Invalid JSON near byte {self.bytes_read}: {message}")
+
+
+def iter_values(f, expand: Callable[[tuple], bool], chunk_bytes: int = CHUNK_BYTES,
+                reader_out: list = None) -> Iterator[Tuple[tuple, Any]]:
+    """Yield (path, value) for the values of a JSON document read from binary file f
+
+    path is the tuple of object keys and array indexes leading to a value.
+    Objects and arrays for which expand(path) is true are walked into (and
+    not yielded themselves); every other value is yielded whole. Memory use
+    is bounded by the chunk size plus the largest value yielded.
+
+    If reader_out is a list, the reader is appended to it so the caller can
+    follow reader.bytes_read for progress.
+    """
+    reader = _Reader(f, chunk_bytes)
+    if reader_out is not None:
+        reader_out.append(reader)
+    stack = []  # [is_object, path, next array index] of the containers walked into
+    path = ()
+
+    while True:
+        char = reader.peek()
+        if char in ('{', '[') and expand(path):
+            reader.pos += 1
+            frame = [char == '{', path, 0]
+            if reader.peek() == ('}' if frame[0] else ']'):
+                reader.pos += 1
+            else:
+                stack.append(frame)
+                path = _member_path(reader, frame)
+                continue
+        elif char:
+            yield path, reader.decode()
+        else:
+            reader.error("unexpected end of document")
+
+        # After a value: move to the next member, closing finished containers
+        while stack:
+            frame = stack[-1]
+            char = reader.peek()
+            reader.pos += 1
+            if char == ',':
+                path = _member_path(reader, frame)
+                break
+            if char != ('}' if frame[0] else ']'):
+                reader.error("expected ',' or a closing bracket")
+            stack.pop()
+        else:
+            if reader.peek():
+                reader.error("unexpected data after the document")
+            return
+
+
+def _member_path(reader: _Reader, frame: list) -> tuple:
+    """Read up to the next member of a container; returns its path"""
+    if frame[0]:
+        if reader.peek() != '"':
+            reader.error("expected an object key")
+        key = reader.decode()
+        reader.expect(':')
+        return frame[1] + (key,)
+    index = frame[2]
+    frame[2] += 1
+    return frame[1] + (index,)
@@ -0,0 +1,64 @@
+"""
+Lazy Route Loading for Udo
+WSGI middleware that defers importing a route module until a request
+under its path prefix arrives. Flask does not allow registering
+blueprints once the app has served a request, so each module gets a
+small app of its own, set up like the main one, and requests its rules
+do not match fall through to the main app.
+"""
+
+import threading
+from importlib import import_module
+from typing import Callable, List
+
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+
+class LazyRoutes:
+    """Dispatch requests to route modules, importing each on its first hit
+
+    modules is a list of (path prefix, module name, blueprint attribute,
+    url_prefix); setup(app) is applied to every module app (CORS,
+    compression) before it serves anything.
+    """
+
+    def __init__(self, app: Flask, modules: List[tuple], setup: Callable[[Flask], None]):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.modules = modules
+        self.setup = setup
+        self._apps = {}
+        self._lock = threading.Lock()
+
+    def loaded(self) -> List[str]:
+        """Names of the route modules imported so far"""
+        return list(self._apps)
+
+    def _module_app(self, module: str, blueprint: str, url_prefix: str) -> Flask:
+        module_app = self._apps.get(module)
+        if module_app is not None:
+            return module_app
+        with self._lock:
+            if module not in self._apps:
+                module_app = Flask(module)
+                module_app.config.update(self.app.config)
+                self.setup(module_app)
+                module_app.register_blueprint(getattr(import_module(module), blueprint), url_prefix=url_prefix)
+                self._apps[module] = module_app
+            return self._apps[module]
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        for prefix, module, blueprint, url_prefix in self.modules:
+            if not path.startswith(prefix):
+                continue
+            module_app = self._module_app(module, blueprint, url_prefix)
+            try:
+                module_app.url_map.bind_to_environ(environ).match()
+            except NotFound:
+                break
+            except Exception:
+                pass  # wrong method or a redirect; the module app answers those
+            return module_app.wsgi_app(environ, start_response)
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,127 @@
+"""
+File Locks for Udo
+Per-file reader/writer locks shared by threads and, via fcntl, by processes
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover threads of this process
+    fcntl = None
+
+LOCKS_DIR = os.path.join(os.path.dirname(__file__), 'userdata', '.locks')
+
+
+class _RWLock:
+    """Reader/writer lock; the writing thread may re-enter as reader or writer"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = None
+        self._depth = 0
+
+    def acquire_read(self) -> bool:
+        """Acquire shared access; returns True if this is a nested writer acquire"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._depth += 1
+                return True
+            while self._writer is not None:
+                self._cond.wait()
+            self._readers += 1
+            return False
+
+    def release_read(self, nested: bool):
+        with self._cond:
+            if nested:
+                self._depth -= 1
+                return
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> bool:
+        """Acquire exclusive access; returns True if already held by this thread"""
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._depth += 1
+                return True
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._writer = me
+            self._depth = 1
+            return False
+
+    def release_write(self):
+        with self._cond:
+            self._depth -= 1
+            if self._depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str):
+    """Get the thread lock and lock file path for a data file"""
+    path = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(path)
+        if lock is None:
+            lock = _locks[path] = _RWLock()
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+    return lock, os.path.join(LOCKS_DIR, f'{os.path.basename(path)}.{digest}.lock')
+
+
+@contextmanager
+def _flock(lock_path: str, mode: int):
+    """Hold an fcntl lock on lock_path (no-op without fcntl)"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(LOCKS_DIR, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, mode)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the lock
+
+
+@contextmanager
+def read_lock(path: str):
+    """Shared lock on a data file"""
+    lock, lock_path = _lock_for(path)
+    nested = lock.acquire_read()
+    try:
+        if nested:
+            yield
+        else:
+            with _flock(lock_path, fcntl.LOCK_SH if fcntl else 0):
+                yield
+    finally:
+        lock.release_read(nested)
+
+
+@contextmanager
+def write_lock(path: str):
+    """Exclusive lock on a data file, held across a read-modify-write"""
+    lock, lock_path = _lock_for(path)
+    nested = lock.acquire_write()
+    try:
+        if nested:
+            yield
+        else:
+            with _flock(lock_path, fcntl.LOCK_EX if fcntl else 0):
+                yield
+    finally:
+        lock.release_write()
@@ -0,0 +1,310 @@
+"""
+Metrics for Udo
+Request latency histograms per endpoint, storage bytes read and written,
+and JSON parse/serialize time per store, rendered in the Prometheus text
+format at /api/metrics. An opt-in sampling profiler records the stacks of
+requests in flight and writes those of slow requests as folded stacks
+(one "frame;frame;frame count" line each), the input format of
+flamegraph.pl and speedscope.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+from typing import Dict
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), 'userdata', 'profiles')
+
+# Latency histogram bucket bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Profiler: start enabled with UDO_PROFILE=1 (or toggle at /api/metrics/profiler)
+PROFILE_INTERVAL_SECONDS = int(os.environ.get('UDO_PROFILE_INTERVAL_MS', 5)) / 1000
+SLOW_REQUEST_SECONDS = int(os.environ.get('UDO_SLOW_REQUEST_MS', 250)) / 1000
+PROFILE_MAX_FILES = 100
+
+_lock = threading.Lock()
+_requests = {}    # (endpoint, method, status) -> count
+_latency = {}     # (endpoint, method) -> [bucket counts..., sum, count]
+_endpoint_io = {}  # endpoint -> [response bytes, storage read bytes, storage written bytes, json parse seconds]
+_storage = {}     # (store, "read" | "written") -> bytes
+_json = {}        # (store, "parse" | "serialize") -> [seconds, count, bytes]
+_operations = {}  # operation -> [seconds, count]
+_slow_requests = 0
+
+# Storage counters of the request being handled by this thread
+_local = threading.local()
+
+_profile_lock = threading.Lock()
+_profiled = {}  # thread id -> {folded stack: samples} for requests in flight
+_profiler = None
+
+
+def store_label(path: str) -> str:
+    """Metric label for a data file: its directory for per-item stores, else its name"""
+    parent = os.path.basename(os.path.dirname(path))
+    if parent in ('pages', 'daytracker'):
+        return parent
+    return os.path.basename(path).split('.')[0] or 'other'
+
+
+def _request_io():
+    return getattr(_local, 'io', None)
+
+
+def record_read(path: str, nbytes: int):
+    """Count bytes read from a data file"""
+    with _lock:
+        key = (store_label(path), 'read')
+        _storage[key] = _storage.get(key, 0) + nbytes
+    io = _request_io()
+    if io is not None:
+        io[1] += nbytes
+
+
+def record_write(path: str, nbytes: int):
+    """Count bytes written to a data file"""
+    with _lock:
+        key = (store_label(path), 'written')
+        _storage[key] = _storage.get(key, 0) + nbytes
+    io = _request_io()
+    if io is not None:
+        io[2] += nbytes
+
+
+def record_json(store: str, kind: str, seconds: float, nbytes: int):
+    """Time spent parsing ("parse") or producing ("serialize") a JSON document"""
+    with _lock:
+        entry = _json.setdefault((store, kind), [0.0, 0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+        entry[2] += nbytes
+    io = _request_io()
+    if io is not None and kind == 'parse':
+        io[3] += seconds
+
+
+def record_operation(operation: str, seconds: float):
+    """Time spent in a named background or maintenance operation"""
+    with _lock:
+        entry = _operations.setdefault(operation, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that records response serialization time"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        text = super().dumps(obj, **kwargs)
+        record_json('response', 'serialize', time.perf_counter() - started, len(text))
+        return text
+
+
+def _observe(endpoint: str, method: str, status: int, seconds: float, io: list):
+    with _lock:
+        key = (endpoint, method, status)
+        _requests[key] = _requests.get(key, 0) + 1
+        buckets = _latency.get((endpoint, method))
+        if buckets is None:
+            buckets = _latency[(endpoint, method)] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+        buckets[-2] += seconds
+        buckets[-1] += 1
+        totals = _endpoint_io.setdefault(endpoint, [0, 0, 0, 0.0])
+        for i, value in enumerate(io):
+            totals[i] += value
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    _local.io = [0, 0, 0, 0.0]
+    if _profiler is not None:
+        with _profile_lock:
+            _profiled[threading.get_ident()] = {}
+
+
+def _after_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    io = _request_io() or [0, 0, 0, 0.0]
+    io[0] = response.content_length or 0
+    _observe(endpoint, request.method, response.status_code, seconds, io)
+    _finish_profile(endpoint, seconds)
+    return response
+
+
+def _teardown_request(_exc):
+    _local.io = None
+    with _profile_lock:
+        _profiled.pop(threading.get_ident(), None)
+
+
+def init_app(app):
+    """Record every request of app; register before other after_request hooks so latency includes them"""
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+# --- Sampling profiler ---
+
+def _fold(frame) -> str:
+    """A frame and its callers as one folded stack line, outermost first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def _sample():
+    profiler = threading.current_thread()
+    while _profiler is profiler:
+        time.sleep(PROFILE_INTERVAL_SECONDS)
+        frames = sys._current_frames()
+        with _profile_lock:
+            for thread_id, stacks in _profiled.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = _fold(frame)
+                    stacks[stack] = stacks.get(stack, 0) + 1
+
+
+def _finish_profile(endpoint: str, seconds: float):
+    """Write the stacks sampled during a slow request to PROFILE_DIR"""
+    global _slow_requests
+    with _profile_lock:
+        stacks = _profiled.pop(threading.get_ident(), None)
+    if seconds < SLOW_REQUEST_SECONDS:
+        return
+    with _lock:
+        _slow_requests += 1
+    if not stacks:
+        return
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', endpoint).strip('_') or 'root'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(seconds * 1000)}ms-{slug}.folded"
+        with open(os.path.join(PROFILE_DIR, name), 'w', encoding='utf-8') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+        profiles = sorted(os.listdir(PROFILE_DIR))
+        for old in profiles[:-PROFILE_MAX_FILES]:
+            os.remove(os.path.join(PROFILE_DIR, old))
+    except OSError as e:
+        print(f"Error writing request profile: {e}")
+
+
+def set_profiling(enabled: bool):
+    """Start or stop the sampling profiler"""
+    global _profiler
+    with _profile_lock:
+        if enabled and _profiler is None:
+            _profiler = threading.Thread(target=_sample, name='udo-profiler', daemon=True)
+            _profiler.start()
+        elif not enabled:
+            _profiler = None  # the sampler thread exits after its current tick
+            _profiled.clear()
+
+
+def profiling_status() -> Dict[str, object]:
+    return {
+        "enabled": _profiler is not None,
+        "interval_ms": PROFILE_INTERVAL_SECONDS * 1000,
+        "slow_request_ms": SLOW_REQUEST_SECONDS * 1000,
+        "directory": PROFILE_DIR
+    }
+
+
+if os.environ.get('UDO_PROFILE', '').lower() in ('1', 'true', 'yes'):
+    set_profiling(True)
+
+
+# --- Prometheus text format ---
+
+def _labels(**labels) -> str:
+    def escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _family(lines: list, name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        requests = dict(_requests)
+        latency = {key: list(value) for key, value in _latency.items()}
+        endpoint_io = {key: list(value) for key, value in _endpoint_io.items()}
+        storage = dict(_storage)
+        json_times = {key: list(value) for key, value in _json.items()}
+        operations = {key: list(value) for key, value in _operations.items()}
+        slow_requests = _slow_requests
+
+    lines = []
+    _family(lines, 'udo_requests_total', 'counter', 'Requests handled, by endpoint, method and status')
+    for (endpoint, method, status), count in sorted(requests.items()):
+        lines.append(f"udo_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}")
+
+    _family(lines, 'udo_request_duration_seconds', 'histogram', 'Request latency by endpoint and method')
+    for (endpoint, method), buckets in sorted(latency.items()):
+        for bound, count in zip(LATENCY_BUCKETS, buckets):
+            lines.append(f"udo_request_duration_seconds_bucket"
+                         f"{_labels(endpoint=endpoint, method=method, le=bound)} {count}")
+        lines.append(f"udo_request_duration_seconds_bucket"
+                     f"{_labels(endpoint=endpoint, method=method, le='+Inf')} {buckets[-1]}")
+        lines.append(f"udo_request_duration_seconds_sum{_labels(endpoint=endpoint, method=method)} {buckets[-2]:.6f}")
+        lines.append(f"udo_request_duration_seconds_count{_labels(endpoint=endpoint, method=method)} {buckets[-1]}")
+
+    for index, name, help_text in ((0, 'udo_response_bytes_total', 'Response body bytes by endpoint'),
+                                   (1, 'udo_request_storage_read_bytes_total', 'Data file bytes read while handling requests'),
+                                   (2, 'udo_request_storage_written_bytes_total', 'Data file bytes written while handling requests'),
+                                   (3, 'udo_request_json_parse_seconds_total', 'JSON parse time while handling requests')):
+        _family(lines, name, 'counter', help_text)
+        for endpoint, totals in sorted(endpoint_io.items()):
+            value = f"{totals[index]:.6f}" if index == 3 else totals[index]
+            lines.append(f"{name}{_labels(endpoint=endpoint)} {value}")
+
+    _family(lines, 'udo_storage_bytes_total', 'counter', 'Data file bytes read and written, by store')
+    for (store, direction), nbytes in sorted(storage.items()):
+        lines.append(f"udo_storage_bytes_total{_labels(store=store, direction=direction)} {nbytes}")
+
+    _family(lines, 'udo_json_seconds_total', 'counter', 'Time spent parsing and serializing JSON, by store')
+    for (store, kind), (seconds, _, _) in sorted(json_times.items()):
+        lines.append(f"udo_json_seconds_total{_labels(store=store, kind=kind)} {seconds:.6f}")
+    _family(lines, 'udo_json_documents_total', 'counter', 'JSON documents parsed and serialized, by store')
+    for (store, kind), (_, count, _) in sorted(json_times.items()):
+        lines.append(f"udo_json_documents_total{_labels(store=store, kind=kind)} {count}")
+    _family(lines, 'udo_json_bytes_total', 'counter', 'Size of the JSON parsed and serialized, by store')
+    for (store, kind), (_, _, nbytes) in sorted(json_times.items()):
+        lines.append(f"udo_json_bytes_total{_labels(store=store, kind=kind)} {nbytes}")
+
+    _family(lines, 'udo_operation_seconds_total', 'counter', 'Time spent in background operations')
+    for operation, (seconds, _) in sorted(operations.items()):
+        lines.append(f"udo_operation_seconds_total{_labels(operation=operation)} {seconds:.6f}")
+    _family(lines, 'udo_operations_total', 'counter', 'Background operations run')
+    for operation, (_, count) in sorted(operations.items()):
+        lines.append(f"udo_operations_total{_labels(operation=operation)} {count}")
+
+    _family(lines, 'udo_slow_requests_total', 'counter',
+            f'Requests slower than {SLOW_REQUEST_SECONDS * 1000:g} ms')
+    lines.append(f"udo_slow_requests_total {slow_requests}")
+    _family(lines, 'udo_profiler_enabled', 'gauge', 'Whether the sampling profiler is running')
+    lines.append(f"udo_profiler_enabled {int(_profiler is not None)}")
+    return '\n'.join(lines) + '\n'
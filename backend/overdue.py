@@ -0,0 +1,134 @@
+"""
+Overdue Scheduler for Udo
+Promotes tasks to "overdue" in the background instead of on every read
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+from backend import metrics
+from backend.dates import date_ordinal, task_ordinals
+from backend.file_manager import (
+    db, list_page_ids, get_page_lazy, get_task, mark_tasks_overdue, record_change
+)
+
+# Min-heap of (end date ordinal, page_id, task_id). Entries go stale when a
+# task is edited; _scheduled holds the current end date per task and stale
+# heap entries are skipped when they are popped.
+_heap = []
+_scheduled = {}
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_thread = None
+
+
+def track_task(page_id: str, task: Dict[str, Any]):
+    """Add or move a task in the deadline heap"""
+    if db:
+        return
+    key = (page_id, task.get("id"))
+    end_date = task_ordinals(task)[1]
+
+    with _lock:
+        if not end_date or task.get("status") in ["completed", "overdue"]:
+            _scheduled.pop(key, None)
+            return
+        if _scheduled.get(key) == end_date:
+            return
+        _scheduled[key] = end_date
+        heapq.heappush(_heap, (end_date, page_id, task.get("id")))
+
+
+def track_page(page_id: str):
+    """Add every task of a page to the deadline heap"""
+    page = get_page_lazy(page_id)
+    if page:
+        for task in page.get("tasks", []):
+            track_task(page_id, task)
+
+
+def refresh_task(page_id: str, task_id: str) -> int:
+    """Re-schedule a task after it was created or updated and promote it if due"""
+    task = get_task(page_id, task_id)
+    if task:
+        track_task(page_id, task)
+    return promote_due_tasks()
+
+
+def rebuild():
+    """Rebuild the deadline heap from all pages"""
+    started = time.perf_counter()
+    with _lock:
+        _heap.clear()
+        _scheduled.clear()
+    if db:
+        return  # the SQLite store answers due tasks from its end_date index
+    for page_id in list_page_ids():
+        track_page(page_id)
+    metrics.record_operation('overdue_rebuild', time.perf_counter() - started)
+
+
+def promote_due_tasks() -> int:
+    """Mark tasks whose end date has passed as overdue, touching only those tasks"""
+    started = time.perf_counter()
+    today = datetime.now().strftime("%Y-%m-%d")
+    if db:
+        updated = db.mark_overdue_before(today)
+        if updated:
+            record_change('tasks', 'overdue', count=updated)
+        metrics.record_operation('overdue_promote', time.perf_counter() - started)
+        return updated
+
+    due = {}
+    today_ordinal = date_ordinal(today)
+
+    with _lock:
+        while _heap and _heap[0][0] < today_ordinal:
+            end_date, page_id, task_id = heapq.heappop(_heap)
+            key = (page_id, task_id)
+            if _scheduled.get(key) != end_date:
+                continue
+            del _scheduled[key]
+            due.setdefault(page_id, []).append(task_id)
+
+    updated = 0
+    for page_id, task_ids in due.items():
+        updated += mark_tasks_overdue(page_id, task_ids, today)
+    metrics.record_operation('overdue_promote', time.perf_counter() - started)
+    return updated
+
+
+def _seconds_until_midnight() -> float:
+    """Seconds until the next local midnight"""
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds() + 1
+
+
+def _run():
+    """Scheduler loop: one full scan at startup, then a run every midnight"""
+    try:
+        rebuild()
+        promote_due_tasks()
+    except Exception as e:
+        print(f"Error building overdue schedule: {e}")
+
+    while True:
+        _wakeup.wait(_seconds_until_midnight())
+        _wakeup.clear()
+        try:
+            promote_due_tasks()
+        except Exception as e:
+            print(f"Error promoting overdue tasks: {e}")
+
+
+def start_overdue_scheduler():
+    """Start the background overdue scheduler (once per process)"""
+    global _thread
+    if _thread and _thread.is_alive():
+        return
+    _thread = threading.Thread(target=_run, name='udo-overdue', daemon=True)
+    _thread.start()
@@ -0,0 +1,223 @@
+"""
+Page Reader for Udo
+Streaming access to large page files: tasks are parsed one at a time from
+an mmap of the file instead of loading the whole document, and a per-file
+index of task id -> byte span lets a single task be read or replaced
+without materializing the others.
+"""
+
+import json
+import mmap
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Any
+
+from backend.storage import write_chunks
+
+# Strings (matched whole, so brackets inside them are skipped) and brackets.
+# A lone quote only matches where a string has no closing quote. Every
+# pattern here matches in linear time, even on truncated files
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_TOKEN_RE = re.compile(_STRING + rb'|[{}\[\]"]', re.S)
+_COLON_RE = re.compile(rb'\s*:\s*')
+_NUMBER_RE = re.compile(rb'-?\d+')
+
+# Unchanged parts of a file are copied in slices of this size when a task is replaced
+COPY_CHUNK_BYTES = 1024 * 1024
+
+_lock = threading.Lock()
+_indexes = {}  # path -> (stamp, layout, {task_id: (start, end)})
+
+
+class PageFormatError(ValueError):
+    """Raised when a page file has no top-level "tasks" array or is truncated or damaged"""
+
+
+@contextmanager
+def _mapped(path: str):
+    """Map a file read-only; yields (mmap, (mtime_ns, size))"""
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if not st.st_size:
+            raise PageFormatError(f"{path} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm, (st.st_mtime_ns, st.st_size)
+
+
+def _task_spans(mm, layout: Dict[str, Any]) -> Iterator[tuple]:
+    """Yield the (start, end) byte span of every task object
+
+    Also records in layout the span of the tasks array ("tasks") and of the
+    top-level version number ("version": (start, end, value)). Raises
+    PageFormatError if the brackets do not balance or a string is not
+    closed (a truncated or damaged file).
+    """
+    stack = bytearray()  # open brackets
+    tasks_key = in_tasks = False
+    task_start = tasks_start = 0
+    for match in _TOKEN_RE.finditer(mm):
+        start, pos = match.span()
+        char = mm[start]
+        depth = len(stack)
+        if char == ord('"'):
+            if pos - start == 1:
+                raise PageFormatError("Page has an unterminated string")
+            colon = _COLON_RE.match(mm, pos) if depth == 1 else None
+            tasks_key = False
+            if colon:
+                key = mm[start:pos]
+                tasks_key = key == b'"tasks"'
+                if key == b'"version"':
+                    number = _NUMBER_RE.match(mm, colon.end())
+                    if number:
+                        layout["version"] = (number.start(), number.end(), int(number.group()))
+            continue
+        if char in b'{[':
+            stack.append(char)
+            if depth == 1 and char == ord('[') and tasks_key:
+                in_tasks = True
+                tasks_start = start
+            elif depth == 2 and in_tasks and char == ord('{'):
+                task_start = start
+            tasks_key = False
+        else:
+            if not stack or stack.pop() != (ord('{') if char == ord('}') else ord('[')):
+                raise PageFormatError("Page has unbalanced brackets")
+            if depth == 3 and in_tasks and char == ord('}'):
+                yield task_start, pos
+            elif depth == 2 and in_tasks and char == ord(']'):
+                in_tasks = False
+                layout["tasks"] = (tasks_start, pos)
+    if stack:
+        raise PageFormatError("Page file is truncated")
+    if "tasks" not in layout:
+        raise PageFormatError("Page has no tasks array")
+
+
+def _build_index(mm, stamp: tuple) -> tuple:
+    layout = {}
+    spans = {}
+    count = 0
+    for start, end in _task_spans(mm, layout):
+        spans.setdefault(json.loads(mm[start:end]).get('id'), (start, end))
+        count += 1
+    layout["count"] = count
+    return (stamp, layout, spans)
+
+
+def _index(path: str, mm, stamp: tuple) -> tuple:
+    """The task index of a mapped file, rebuilt if the file changed since it was built"""
+    with _lock:
+        index = _indexes.get(path)
+    if index and index[0] == stamp:
+        return index
+    index = _build_index(mm, stamp)
+    with _lock:
+        _indexes[path] = index
+    return index
+
+
+def forget(path: str):
+    """Drop the index of a file (after it was rewritten or deleted)"""
+    with _lock:
+        _indexes.pop(path, None)
+
+
+class TaskStream:
+    """Sized, re-iterable view of a page file's tasks; each pass parses them one at a time"""
+
+    def __init__(self, path: str, count: int):
+        self.path = path
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter_tasks(self.path)
+
+
+def iter_tasks(path: str) -> Iterator[Dict[str, Any]]:
+    """Parse the tasks of a page file one at a time"""
+    with _mapped(path) as (mm, _):
+        for start, end in _task_spans(mm, {}):
+            yield json.loads(mm[start:end])
+
+
+def read_page(path: str) -> Dict[str, Any]:
+    """A page's top-level fields, with its tasks as a TaskStream"""
+    with _mapped(path) as (mm, stamp):
+        _, layout, _ = _index(path, mm, stamp)
+        start, end = layout["tasks"]
+        page = json.loads(mm[:start] + b'[]' + mm[end:])
+    page["tasks"] = TaskStream(path, layout["count"])
+    return page
+
+
+def count_tasks(path: str) -> int:
+    """Number of tasks in a page file"""
+    with _mapped(path) as (mm, stamp):
+        return _index(path, mm, stamp)[1]["count"]
+
+
+def find_task(path: str, task_id: str) -> Dict[str, Any]:
+    """Parse one task by id (None if the page has no such task)"""
+    with _mapped(path) as (mm, stamp):
+        span = _index(path, mm, stamp)[2].get(task_id)
+        return json.loads(mm[span[0]:span[1]]) if span else None
+
+
+def _copy(mm, start: int, end: int) -> Iterator[bytes]:
+    for offset in range(start, end, COPY_CHUNK_BYTES):
+        yield mm[offset:min(offset + COPY_CHUNK_BYTES, end)]
+
+
+def _spliced(path: str, replacements: List[tuple]) -> Iterator[bytes]:
+    """The file's bytes with each (start, end, data) span replaced, streamed in slices"""
+    with _mapped(path) as (mm, _):
+        pos = 0
+        for start, end, data in sorted(replacements):
+            yield from _copy(mm, pos, start)
+            yield data
+            pos = end
+        yield from _copy(mm, pos, len(mm))
+
+
+def replace_task(path: str, task_id: str, task: Dict[str, Any], version: int) -> bool:
+    """Replace one task and set the page version, copying the rest of the file unparsed
+
+    The caller holds the page's write lock. Returns False if the page has no
+    such task or no top-level version to update.
+    """
+    with _mapped(path) as (mm, stamp):
+        _, layout, spans = _index(path, mm, stamp)
+    span = spans.get(task_id)
+    if not span or "version" not in layout:
+        return False
+
+    task_bytes = json.dumps(task, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    version_start, version_end, _ = layout["version"]
+    version_bytes = str(version).encode('ascii')
+    write_chunks(path, _spliced(path, [(span[0], span[1], task_bytes),
+                                       (version_start, version_end, version_bytes)]))
+
+    # Shift the spans that follow the replaced bytes instead of rescanning
+    edits = sorted([(span[1], len(task_bytes) - (span[1] - span[0])),
+                    (version_end, len(version_bytes) - (version_end - version_start))])
+
+    def moved(offset: int) -> int:
+        return offset + sum(delta for at, delta in edits if offset >= at)
+
+    new_spans = {key: (moved(start), moved(end)) for key, (start, end) in spans.items()}
+    new_spans[task_id] = (moved(span[0]), moved(span[0]) + len(task_bytes))
+    new_layout = {
+        "count": layout["count"],
+        "tasks": (moved(layout["tasks"][0]), moved(layout["tasks"][1])),
+        "version": (moved(version_start), moved(version_start) + len(version_bytes), version)
+    }
+    st = os.stat(path)
+    with _lock:
+        _indexes[path] = ((st.st_mtime_ns, st.st_size), new_layout, new_spans)
+    return True
@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
-import json
 import os
 
+from backend.file_manager import db, record_change
+from backend.http_cache import conditional, store_validator
+from backend.locks import write_lock
+from backend.storage import read_json, write_json
+
 countdown_bp = Blueprint('countdown', __name__)
 
 COUNTDOWN_DATA_PATH = 'backend/userdata/countdowns.json'
@@ -12,22 +16,47 @@ def ensure_countdown_file():
     os.makedirs(os.path.dirname(COUNTDOWN_DATA_PATH), exist_ok=True)
     
     if not os.path.exists(COUNTDOWN_DATA_PATH):
-        with open(COUNTDOWN_DATA_PATH, 'w') as f:
-            json.dump({'events': []}, f)
+        write_json(COUNTDOWN_DATA_PATH, {'events': []})
 
 def get_countdown_data():
     """Load countdown data"""
+    if db:
+        return {'events': db.get_countdown_events()}
     ensure_countdown_file()
-    with open(COUNTDOWN_DATA_PATH, 'r') as f:
-        return json.load(f)
+    return read_json(COUNTDOWN_DATA_PATH)
 
 def save_countdown_data(data):
     """Save countdown data"""
-    ensure_countdown_file()
-    with open(COUNTDOWN_DATA_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+    if db:
+        db.save_countdown_events(data['events'])
+    else:
+        ensure_countdown_file()
+        write_json(COUNTDOWN_DATA_PATH, data)
+    record_change('countdown', 'update', count=len(data['events']))
+
+def compute_countdown_stats(events):
+    """Event count and the next 5 upcoming events"""
+    now = datetime.now()
+    upcoming = []
+    
+    for event in events:
+        target_time = datetime.fromisoformat(event['targetDate'])
+        if target_time > now:
+            upcoming.append({
+                **event,
+                'daysLeft': (target_time - now).days
+            })
+    
+    # Sort by closest first
+    upcoming.sort(key=lambda e: e['daysLeft'])
+    
+    return {
+        'totalEvents': len(events),
+        'upcomingEvents': upcoming[:5]  # Next 5 events
+    }
 
 @countdown_bp.route('/api/countdown/events', methods=['GET'])
+@conditional(lambda: store_validator(COUNTDOWN_DATA_PATH))
 def get_events():
     """Get all countdown events"""
     try:
@@ -41,15 +70,16 @@ def create_event():
     """Create a new countdown event"""
     try:
         event_data = request.json
-        data = get_countdown_data()
+        with write_lock(COUNTDOWN_DATA_PATH):
+            data = get_countdown_data()
         
-        # Generate ID
-        event_id = str(len(data['events']) + 1)
-        event_data['id'] = event_id
-        event_data['createdAt'] = datetime.now().isoformat()
+            # Generate ID
+            event_id = str(len(data['events']) + 1)
+            event_data['id'] = event_id
+            event_data['createdAt'] = datetime.now().isoformat()
         
-        data['events'].append(event_data)
-        save_countdown_data(data)
+            data['events'].append(event_data)
+            save_countdown_data(data)
         
         return jsonify(event_data), 201
     except Exception as e:
@@ -60,13 +90,14 @@ def update_event(event_id):
     """Update a countdown event"""
     try:
         updated_event = request.json
-        data = get_countdown_data()
+        with write_lock(COUNTDOWN_DATA_PATH):
+            data = get_countdown_data()
         
-        for i, event in enumerate(data['events']):
-            if event['id'] == event_id:
-                data['events'][i] = {**event, **updated_event, 'id': event_id}
-                save_countdown_data(data)
-                return jsonify(data['events'][i]), 200
+            for i, event in enumerate(data['events']):
+                if event['id'] == event_id:
+                    data['events'][i] = {**event, **updated_event, 'id': event_id}
+                    save_countdown_data(data)
+                    return jsonify(data['events'][i]), 200
         
         return jsonify({'error': 'Event not found'}), 404
     except Exception as e:
@@ -76,9 +107,10 @@ def update_event(event_id):
 def delete_event(event_id):
     """Delete a countdown event"""
     try:
-        data = get_countdown_data()
-        data['events'] = [e for e in data['events'] if e['id'] != event_id]
-        save_countdown_data(data)
+        with write_lock(COUNTDOWN_DATA_PATH):
+            data = get_countdown_data()
+            data['events'] = [e for e in data['events'] if e['id'] != event_id]
+            save_countdown_data(data)
         return jsonify({'message': 'Event deleted'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -88,26 +120,6 @@ def get_stats():
     """Get countdown statistics for dashboard"""
     try:
         data = get_countdown_data()
-        events = data['events']
-        
-        # Get upcoming events
-        now = datetime.now()
-        upcoming = []
-        
-        for event in events:
-            target_time = datetime.fromisoformat(event['targetDate'])
-            if target_time > now:
-                upcoming.append({
-                    **event,
-                    'daysLeft': (target_time - now).days
-                })
-        
-        # Sort by closest first
-        upcoming.sort(key=lambda e: e['daysLeft'])
-        
-        return jsonify({
-            'totalEvents': len(events),
-            'upcomingEvents': upcoming[:5]  # Next 5 events
-        }), 200
+        return jsonify(compute_countdown_stats(data['events'])), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
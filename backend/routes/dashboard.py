@@ -0,0 +1,100 @@
+"""
+Dashboard routes for Udo API
+"""
+
+from datetime import date, timedelta
+
+from flask import Blueprint, jsonify
+from backend.file_manager import db, get_page, get_page_summary_map, get_generation
+from backend.routes.countdown import get_countdown_data, compute_countdown_stats
+from backend.routes.daytracker import get_all_tracked_dates, compute_range_stats
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+
+DASHBOARD_DAYS = 30
+RECENT_TASK_COUNT = 5
+
+# (generation, date, data) of the last computed dashboard
+_memo = None
+
+
+def _study_stats(today):
+    """Day tracker totals and streaks over the last DASHBOARD_DAYS days"""
+    start = (today - timedelta(days=DASHBOARD_DAYS - 1)).isoformat()
+    end = today.isoformat()
+    stats = compute_range_stats(start, end)
+
+    tracked = {d for d in get_all_tracked_dates() if start <= d <= end}
+    current = 0
+    day = today if end in tracked else today - timedelta(days=1)
+    while day.isoformat() in tracked:
+        current += 1
+        day -= timedelta(days=1)
+
+    longest = run = 0
+    for offset in range(DASHBOARD_DAYS):
+        if (today - timedelta(days=offset)).isoformat() in tracked:
+            run += 1
+            longest = max(longest, run)
+        else:
+            run = 0
+
+    stats.update({
+        'totalDays': len(tracked),
+        'currentStreak': current,
+        'longestStreak': longest,
+        'completionRate': round(len(tracked) * 100 / DASHBOARD_DAYS)
+    })
+    return stats
+
+
+def _compute_dashboard(today):
+    """Build the dashboard from page summaries and the other stores"""
+    summaries = get_page_summary_map()
+    pages = []
+    status_counts = {}
+    recent_tasks = []
+    for page_id, summary in summaries.items():
+        pages.append({"id": page_id, "name": summary.get("name"), "task_count": summary.get("task_count", 0)})
+        for status, count in summary.get("status_counts", {}).items():
+            status_counts[status] = status_counts.get(status, 0) + count
+        if len(recent_tasks) < RECENT_TASK_COUNT and summary.get("task_count"):
+            page = get_page(page_id)
+            for task in (page or {}).get("tasks", [])[:RECENT_TASK_COUNT - len(recent_tasks)]:
+                recent_tasks.append({**task, "page_id": page_id, "page_name": page.get("name", "Unknown")})
+
+    return {
+        "pages": pages,
+        "status_counts": status_counts,
+        "recent_tasks": recent_tasks,
+        "daytracker": _study_stats(today),
+        "countdown_events": get_countdown_data()['events']
+    }
+
+
+@dashboard_bp.route('/dashboard', methods=['GET'])
+def get_dashboard():
+    """Everything the dashboard shows, in one request
+
+    The result is memoized until any store is saved (tracked by the store
+    generation) or the date changes. Countdown stats are derived from the
+    memoized events on every request since they depend on the current time.
+    """
+    global _memo
+    generation = get_generation()
+    # With SQLite, writes by other processes only show in the database's change stamp
+    key = (generation, db.change_stamp() if db else None)
+    today = date.today()
+    memo = _memo
+    if memo and memo[0] == key and memo[1] == today:
+        data = memo[2]
+    else:
+        data = _compute_dashboard(today)
+        # Stored under the generation read before computing, so a save made
+        # meanwhile invalidates it
+        _memo = (key, today, data)
+
+    result = {key: value for key, value in data.items() if key != "countdown_events"}
+    result["countdown"] = compute_countdown_stats(data["countdown_events"])
+    return jsonify({"success": True, "generation": generation, **result})
@@ -1,8 +1,12 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
-import json
 import os
-import glob
+
+from backend import analytics, day_rollups
+from backend.file_manager import db, record_change
+from backend.http_cache import conditional, store_validator
+from backend.locks import write_lock
+from backend.storage import read_json, write_json
 
 daytracker_bp = Blueprint('daytracker', __name__)
 
@@ -19,29 +23,69 @@ def get_day_file_path(date_str):
 
 def get_day_data(date_str):
     """Load data for a specific day"""
+    if db:
+        return db.get_day_data(date_str) or {'date': date_str, 'entries': []}
     file_path = get_day_file_path(date_str)
     if not os.path.exists(file_path):
         return {'date': date_str, 'entries': []}
     
-    with open(file_path, 'r') as f:
-        return json.load(f)
+    return read_json(file_path)
 
 def save_day_data(date_str, data):
     """Save data for a specific day"""
-    file_path = get_day_file_path(date_str)
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=2)
+    if db:
+        db.save_day_data(date_str, data)
+    else:
+        write_json(get_day_file_path(date_str), data)
+    # Events name the day; clients showing it fetch the entries again
+    record_change('day', 'update', date=date_str, count=len(data.get('entries', [])))
+    day_rollups.update_day(date_str, data)
+
+def get_entry_columns():
+    """Day tracker entries as cached analytics columns (day, duration, subject)"""
+    def build():
+        records, days, durations, subjects = [], [], [], []
+        if db:
+            pairs = db.get_day_entries_between('0000-01-01', '9999-12-31')
+        else:
+            pairs = [(date_str, entry) for date_str in get_all_tracked_dates()
+                     for entry in get_day_data(date_str)['entries']]
+        for date_str, entry in pairs:
+            micros = day_rollups.entry_duration(entry)
+            if micros is None:
+                continue
+            records.append(entry)
+            days.append(datetime.fromisoformat(date_str).toordinal())
+            durations.append(micros / 1e6)
+            subjects.append(entry.get('subject', 'Other'))
+        return analytics.Columns(records, days, durations, subjects)
+    
+    # Every day save rewrites the rollup file, so its stamp versions the entries
+    return analytics.cached('daytracker_entries', day_rollups.version(), build)
+
+def invalid_times(entry):
+    """Why an entry's start/end times cannot be saved, or None if they are valid ISO datetimes"""
+    for field in ('startTime', 'endTime'):
+        value = entry.get(field)
+        if value is None:
+            continue
+        try:
+            datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return f'{field} must be an ISO date and time'
+    return None
 
 def get_all_tracked_dates():
     """Get list of all dates that have tracking data"""
-    ensure_daytracker_dir()
-    files = glob.glob(os.path.join(DAYTRACKER_DATA_DIR, 'day_*.json'))
-    dates = []
-    for file_path in files:
-        filename = os.path.basename(file_path)
-        date_str = filename.replace('day_', '').replace('.json', '')
-        dates.append(date_str)
-    return sorted(dates)
+    return day_rollups.tracked_dates()
+
+def compute_range_stats(start_date, end_date):
+    """Total time, entries and per-subject minutes between two dates (inclusive)"""
+    return {
+        'startDate': start_date,
+        'endDate': end_date,
+        **day_rollups.range_stats(start_date, end_date)
+    }
 
 @daytracker_bp.route('/api/daytracker/dates', methods=['GET'])
 def get_tracked_dates():
@@ -53,6 +97,7 @@ def get_tracked_dates():
         return jsonify({'error': str(e)}), 500
 
 @daytracker_bp.route('/api/daytracker/day/<date_str>', methods=['GET'])
+@conditional(lambda date_str: store_validator(get_day_file_path(date_str)))
 def get_day(date_str):
     """Get all entries for a specific day"""
     try:
@@ -70,20 +115,24 @@ def create_entry():
         
         if not date_str:
             return jsonify({'error': 'Date is required'}), 400
+        error = invalid_times(entry_data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        # Load day data
-        day_data = get_day_data(date_str)
+        with write_lock(get_day_file_path(date_str)):
+            # Load day data
+            day_data = get_day_data(date_str)
         
-        # Generate entry ID
-        entry_id = str(len(day_data['entries']) + 1)
-        entry_data['id'] = entry_id
-        entry_data['createdAt'] = datetime.now().isoformat()
+            # Generate entry ID
+            entry_id = str(len(day_data['entries']) + 1)
+            entry_data['id'] = entry_id
+            entry_data['createdAt'] = datetime.now().isoformat()
         
-        # Add entry
-        day_data['entries'].append(entry_data)
+            # Add entry
+            day_data['entries'].append(entry_data)
         
-        # Save
-        save_day_data(date_str, day_data)
+            # Save
+            save_day_data(date_str, day_data)
         
         return jsonify(entry_data), 201
     except Exception as e:
@@ -94,21 +143,25 @@ def update_entry(date_str, entry_id):
     """Update an existing entry"""
     try:
         updated_data = request.json
-        day_data = get_day_data(date_str)
+        error = invalid_times(updated_data)
+        if error:
+            return jsonify({'error': error}), 400
+        with write_lock(get_day_file_path(date_str)):
+            day_data = get_day_data(date_str)
         
-        # Find and update entry
-        for i, entry in enumerate(day_data['entries']):
-            if entry['id'] == entry_id:
-                # Preserve id and createdAt
-                updated_data['id'] = entry_id
-                updated_data['createdAt'] = entry.get('createdAt')
-                updated_data['updatedAt'] = datetime.now().isoformat()
-                day_data['entries'][i] = updated_data
-                break
-        else:
-            return jsonify({'error': 'Entry not found'}), 404
+            # Find and update entry
+            for i, entry in enumerate(day_data['entries']):
+                if entry['id'] == entry_id:
+                    # Preserve id and createdAt
+                    updated_data['id'] = entry_id
+                    updated_data['createdAt'] = entry.get('createdAt')
+                    updated_data['updatedAt'] = datetime.now().isoformat()
+                    day_data['entries'][i] = updated_data
+                    break
+            else:
+                return jsonify({'error': 'Entry not found'}), 404
         
-        save_day_data(date_str, day_data)
+            save_day_data(date_str, day_data)
         return jsonify(updated_data), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -117,9 +170,10 @@ def update_entry(date_str, entry_id):
 def delete_entry(date_str, entry_id):
     """Delete an entry"""
     try:
-        day_data = get_day_data(date_str)
-        day_data['entries'] = [e for e in day_data['entries'] if e['id'] != entry_id]
-        save_day_data(date_str, day_data)
+        with write_lock(get_day_file_path(date_str)):
+            day_data = get_day_data(date_str)
+            day_data['entries'] = [e for e in day_data['entries'] if e['id'] != entry_id]
+            save_day_data(date_str, day_data)
         return jsonify({'message': 'Entry deleted'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -137,10 +191,9 @@ def get_day_stats(date_str):
         
         for entry in entries:
             # Calculate duration
-            if entry.get('startTime') and entry.get('endTime'):
-                start = datetime.fromisoformat(entry['startTime'])
-                end = datetime.fromisoformat(entry['endTime'])
-                duration_minutes = (end - start).total_seconds() / 60
+            micros = day_rollups.entry_duration(entry)
+            if micros is not None:
+                duration_minutes = micros / day_rollups.MICROS_PER_MINUTE
                 total_minutes += duration_minutes
                 
                 # Track by subject
@@ -169,37 +222,63 @@ def get_range_stats():
         if not start_date or not end_date:
             return jsonify({'error': 'Start and end dates required'}), 400
         
-        # Get all dates in range that have data
-        all_dates = get_all_tracked_dates()
-        range_dates = [d for d in all_dates if start_date <= d <= end_date]
+        return jsonify(compute_range_stats(start_date, end_date)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@daytracker_bp.route('/api/daytracker/stats/periods', methods=['GET'])
+def get_period_stats():
+    """Get per-day, per-week (ISO) or per-month statistics for a date range"""
+    try:
+        period = request.args.get('period', 'day')
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+        
+        if period not in ('day', 'week', 'month'):
+            return jsonify({'error': 'Period must be day, week or month'}), 400
+        if not start_date or not end_date:
+            return jsonify({'error': 'Start and end dates required'}), 400
         
-        total_minutes = 0
-        total_entries = 0
-        all_subjects = {}
+        return jsonify({
+            'period': period,
+            'startDate': start_date,
+            'endDate': end_date,
+            'periods': day_rollups.period_stats(period, start_date, end_date)
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@daytracker_bp.route('/api/daytracker/stats/analytics', methods=['GET'])
+def get_analytics():
+    """Get per-day/week/subject totals, rolling average, streaks and duration percentiles"""
+    try:
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+        window = int(request.args.get('window', 7))
+        if window < 1:
+            return jsonify({'error': 'Window must be positive'}), 400
         
-        for date_str in range_dates:
-            day_data = get_day_data(date_str)
-            for entry in day_data['entries']:
-                total_entries += 1
-                if entry.get('startTime') and entry.get('endTime'):
-                    start = datetime.fromisoformat(entry['startTime'])
-                    end = datetime.fromisoformat(entry['endTime'])
-                    duration_minutes = (end - start).total_seconds() / 60
-                    total_minutes += duration_minutes
-                    
-                    subject = entry.get('subject', 'Other')
-                    if subject not in all_subjects:
-                        all_subjects[subject] = 0
-                    all_subjects[subject] += duration_minutes
+        columns = get_entry_columns().between(
+            datetime.fromisoformat(start_date).date() if start_date else None,
+            datetime.fromisoformat(end_date).date() if end_date else None
+        )
         
         return jsonify({
             'startDate': start_date,
             'endDate': end_date,
-            'totalMinutes': int(total_minutes),
-            'totalHours': round(total_minutes / 60, 2),
-            'totalEntries': total_entries,
-            'trackedDays': len(range_dates),
-            'subjectBreakdown': all_subjects
+            'totalEntries': len(columns),
+            'byDay': analytics.by_day(columns),
+            'byWeek': analytics.by_week(columns),
+            'bySubject': analytics.by_category(columns),
+            'rollingAverage': analytics.rolling_average(columns, window=window),
+            'streaks': analytics.streaks(columns),
+            'durationPercentiles': analytics.percentiles(columns)
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
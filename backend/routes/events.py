@@ -0,0 +1,103 @@
+"""
+Change event routes for Udo API
+"""
+
+import json
+import os
+import threading
+
+from flask import Blueprint, Response, request, stream_with_context
+from backend import events
+from backend.file_manager import SHARED_GENERATION, get_generation
+
+events_bp = Blueprint('events', __name__)
+
+
+# Idle streams send a comment this often; a stream whose client went away
+# is only noticed (and its slot freed) when writing to it fails
+HEARTBEAT_SECONDS = 5
+
+# Every open stream holds a server thread, so by default streams may take
+# at most half of the request threads (UDO_THREADS, set by start.py) and
+# the rest stay free for ordinary requests
+REQUEST_THREADS = int(os.environ.get('UDO_THREADS', 8))
+MAX_EVENT_STREAMS = int(os.environ.get('UDO_MAX_EVENT_STREAMS', max(1, REQUEST_THREADS // 2)))
+_streams = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+# A client turned away at the limit reloads by polling and tries the
+# stream again after this long
+BUSY_RETRY_MS = 30000
+
+
+def _format(event):
+    """One server-sent event"""
+    return f"id: {event['id']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def _control(name, seq, generation):
+    """A "ready" or "resync" event, whose id lets the client resume from seq"""
+    return f"id: {events.EPOCH}-{seq}\nevent: {name}\ndata: {json.dumps({'generation': generation})}\n\n"
+
+
+def _busy():
+    """The whole stream sent when no slot is free: a "busy" event, then the stream ends
+
+    EventSource gives up for good on an error status, but reconnects
+    (after the retry delay) when a stream ends, so the client keeps trying.
+    """
+    yield f"retry: {BUSY_RETRY_MS}\n\n"
+    yield "event: busy\ndata: {}\n\n"
+
+
+def _event_stream(body):
+    response = Response(body, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _stream(seq, generation, resync):
+    """Yield events after seq until the client disconnects"""
+    yield "retry: 3000\n\n"
+    yield _control("resync" if resync else "ready", seq, generation)
+    while True:
+        pending = events.wait(seq, HEARTBEAT_SECONDS)
+        if pending is None:
+            seq = events.last_seq()
+            generation = get_generation()
+            yield _control("resync", seq, generation)
+            continue
+        for event in pending:
+            seq = event["seq"]
+            generation = event["generation"]
+            yield _format(event)
+        if not pending:
+            # Saves in other worker processes only show up as a new shared generation
+            if SHARED_GENERATION and get_generation() != generation:
+                generation = get_generation()
+                yield _control("resync", seq, generation)
+            else:
+                yield ": heartbeat\n\n"
+
+
+@events_bp.route('/events', methods=['GET'])
+def stream_events():
+    """Server-sent change events: one per created, updated or deleted task, page or other store
+
+    The stream opens with a "ready" event. Clients resume with the
+    Last-Event-ID header (sent by EventSource on reconnect) or
+    ?last_event_id=; if the events after it are no longer buffered, a
+    "resync" event tells the client to reload what it shows instead. With
+    every stream slot taken, the client gets a "busy" event and polls.
+    """
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    seq = events.parse_cursor(cursor) if cursor else None
+    resync = bool(cursor) and (seq is None or seq > events.last_seq())
+    if seq is None or resync:
+        seq = events.last_seq()
+    if not _streams.acquire(blocking=False):
+        return _event_stream(_busy())
+
+    response = _event_stream(stream_with_context(_stream(seq, get_generation(), resync)))
+    response.call_on_close(_streams.release)
+    return response
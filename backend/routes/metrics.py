@@ -0,0 +1,30 @@
+"""
+Metrics routes for Udo API
+"""
+
+from flask import Blueprint, Response, jsonify, request
+from backend import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, storage and JSON metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@metrics_bp.route('/metrics/profiler', methods=['GET'])
+def get_profiler():
+    """Whether the sampling profiler is running, and where it writes slow request stacks"""
+    return jsonify({"success": True, "profiler": metrics.profiling_status()})
+
+
+@metrics_bp.route('/metrics/profiler', methods=['PUT'])
+def set_profiler():
+    """Start or stop the sampling profiler: {"enabled": true|false}"""
+    data = request.json
+    if not isinstance(data, dict) or not isinstance(data.get("enabled"), bool):
+        return jsonify({"success": False, "error": "enabled must be true or false"}), 400
+    metrics.set_profiling(data["enabled"])
+    return jsonify({"success": True, "profiler": metrics.profiling_status()})
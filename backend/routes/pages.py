@@ -2,35 +2,60 @@
 Page routes for Udo API
 """
 
-from flask import Blueprint, jsonify, request
+import json
+
+from flask import Blueprint, Response, jsonify, request
 from backend.file_manager import (
     get_all_pages, get_page, create_page, delete_page,
-    import_page_from_json, update_overdue_tasks, sync_tags_from_page,
-    update_page_name
+    sync_tags_from_page, update_page_name, page_etag,
+    get_page_version, PAGES_DIR
 )
+from backend.http_cache import conditional, store_validator
+from backend.importer import import_stream
+from backend.overdue import track_page, promote_due_tasks
 
 pages_bp = Blueprint('pages', __name__)
 
 
+def _page_validator(page_id):
+    """The page's version ETag, when it is known without loading the page"""
+    version = get_page_version(page_id)
+    return None if version is None else (str(version), None)
+
+
 @pages_bp.route('/pages', methods=['GET'])
+@conditional(lambda: store_validator(PAGES_DIR, generation=True))
 def list_pages():
     """Get list of all pages"""
-    update_overdue_tasks()  # Update overdue tasks before returning data
     pages = get_all_pages()
     return jsonify({"success": True, "pages": pages})
 
 
 @pages_bp.route('/page/<page_id>', methods=['GET'])
+@conditional(_page_validator)
 def get_page_by_id(page_id):
     """Get a specific page by ID"""
-    update_overdue_tasks()
     page = get_page(page_id)
     
     if page:
-        return jsonify({"success": True, "page": page})
+        response = jsonify({"success": True, "page": page})
+        response.headers['ETag'] = page_etag(page)
+        return response
     return jsonify({"success": False, "error": "Page not found"}), 404
 
 
+@pages_bp.route('/page/<page_id>/export', methods=['GET'])
+def export_page(page_id):
+    """Download a page as indented JSON, whatever its on-disk format (re-importable via /page/import)"""
+    page = get_page(page_id)
+    
+    if not page:
+        return jsonify({"success": False, "error": "Page not found"}), 404
+    response = Response(json.dumps(page, indent=2, ensure_ascii=False), mimetype='application/json')
+    response.headers['Content-Disposition'] = f'attachment; filename="{page_id}.json"'
+    return response
+
+
 @pages_bp.route('/page/create', methods=['POST'])
 def create_new_page():
     """Create a new page"""
@@ -48,17 +73,23 @@ def create_new_page():
 
 @pages_bp.route('/page/import', methods=['POST'])
 def import_page():
-    """Import a page from JSON data"""
-    data = request.json
-    
-    if not data:
-        return jsonify({"success": False, "error": "No data provided"}), 400
+    """Import a page file or board export, streamed from the request body
+
+    The response carries the new page's summary (id, name, task_count,
+    version) and the tasks skipped as invalid.
+    """
+    try:
+        report = import_stream(request.stream)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except OSError as e:
+        print(f"Error importing page: {e}")
+        return jsonify({"success": False, "error": "Failed to import page"}), 500
     
-    page = import_page_from_json(data)
-    
-    if page:
-        return jsonify({"success": True, "page": page}), 201
-    return jsonify({"success": False, "error": "Failed to import page"}), 500
+    track_page(report.page["id"])
+    promote_due_tasks()
+    return jsonify({"success": True, "page": report.page, "imported": report.tasks,
+                    "invalid": report.invalid, "errors": report.errors}), 201
 
 
 @pages_bp.route('/page/<page_id>', methods=['DELETE'])
@@ -0,0 +1,35 @@
+"""
+Search routes for Udo API
+"""
+
+from flask import Blueprint, jsonify, request
+from backend.search_index import search
+
+search_bp = Blueprint('search', __name__)
+
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 200
+
+
+@search_bp.route('/search', methods=['GET'])
+def search_tasks():
+    """Full-text search over task titles, descriptions and tags
+
+    Query parameters: q (words, each matched as a prefix), limit, and page
+    (repeated or comma-separated page ids to search in).
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"success": False, "error": "q is required"}), 400
+
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_SEARCH_LIMIT)), MAX_SEARCH_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"success": False, "error": "limit must be positive"}), 400
+
+    page_ids = [p for value in request.args.getlist('page') for p in value.split(',') if p]
+    result = search(query, limit=limit, page_ids=set(page_ids) or None)
+    return jsonify({"success": True, **result})
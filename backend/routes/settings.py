@@ -3,12 +3,15 @@ Settings routes for Udo API
 """
 
 from flask import Blueprint, jsonify, request
-from backend.file_manager import get_maindata, save_maindata, update_tag
+from backend.file_manager import get_maindata, save_maindata, update_tag, MAINDATA_FILE
+from backend.http_cache import conditional, store_validator
+from backend.locks import write_lock
 
 settings_bp = Blueprint('settings', __name__)
 
 
 @settings_bp.route('/settings', methods=['GET'])
+@conditional(lambda: store_validator(MAINDATA_FILE))
 def get_settings():
     """Get application settings"""
     settings = get_maindata()
@@ -23,10 +26,12 @@ def update_settings():
     if not data:
         return jsonify({"success": False, "error": "No data provided"}), 400
     
-    current_settings = get_maindata()
-    current_settings.update(data)
+    with write_lock(MAINDATA_FILE):
+        current_settings = get_maindata()
+        current_settings.update(data)
+        saved = save_maindata(current_settings)
     
-    if save_maindata(current_settings):
+    if saved:
         return jsonify({"success": True, "settings": current_settings})
     return jsonify({"success": False, "error": "Failed to update settings"}), 500
 
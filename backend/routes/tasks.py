@@ -4,17 +4,87 @@ Task routes for Udo API
 
 from flask import Blueprint, jsonify, request
 from backend.file_manager import (
-    create_task, update_task, delete_task, get_all_tasks
+    create_task, update_task, delete_task, get_task,
+    page_etag, apply_task_batch, TaskBatchError, PageVersionConflict, PAGES_DIR
 )
+from backend.calendar_index import overlapping
+from backend.dates import date_ordinal
+from backend.http_cache import conditional, store_validator, strong_etag
+from backend.overdue import refresh_task, track_task, promote_due_tasks
+from backend.task_index import all_tasks, query_tasks, InvalidCursor, InvalidQuery, SORT_FIELDS
 
 tasks_bp = Blueprint('tasks', __name__)
 
 
+TASK_QUERY_PARAMS = ('status', 'tag', 'page', 'from', 'to', 'q', 'sort', 'order', 'limit', 'cursor')
+DEFAULT_TASK_LIMIT = 100
+MAX_TASK_LIMIT = 1000
+MAX_BATCH_OPERATIONS = 5000
+
+
+def _list_param(name):
+    """Read a query parameter given as repeated or comma-separated values"""
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(v for v in value.split(',') if v)
+    return values or None
+
+
 @tasks_bp.route('/tasks', methods=['GET'])
+@conditional(lambda: store_validator(PAGES_DIR, generation=True))
 def list_all_tasks():
-    """Get all tasks from all pages"""
-    tasks = get_all_tasks()
-    return jsonify({"success": True, "tasks": tasks})
+    """Get tasks from all pages
+
+    Without query parameters every task is returned. With any of status,
+    tag, page, from, to, q, sort, order, limit or cursor the result is
+    filtered, sorted and paginated server-side.
+    """
+    if not any(name in request.args for name in TASK_QUERY_PARAMS):
+        return jsonify({"success": True, "tasks": all_tasks()})
+    
+    sort = request.args.get('sort', 'page')
+    if sort not in SORT_FIELDS:
+        return jsonify({"success": False, "error": f"sort must be one of: {', '.join(SORT_FIELDS)}"}), 400
+    
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_TASK_LIMIT)), MAX_TASK_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"success": False, "error": "limit must be positive"}), 400
+    
+    try:
+        result = query_tasks(
+            statuses=_list_param('status'),
+            tags=_list_param('tag'),
+            page_ids=_list_param('page'),
+            date_from=request.args.get('from'),
+            date_to=request.args.get('to'),
+            text=request.args.get('q', '').strip() or None,
+            sort=sort,
+            descending=request.args.get('order') == 'desc',
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except (InvalidCursor, InvalidQuery) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    return jsonify({"success": True, **result})
+
+
+@tasks_bp.route('/tasks/calendar', methods=['GET'])
+@conditional(lambda: store_validator(PAGES_DIR, generation=True))
+def calendar_tasks():
+    """Get the tasks whose date range overlaps start..end (YYYY-MM-DD, inclusive)"""
+    start = request.args.get('start', '')
+    end = request.args.get('end', '')
+    start_day, end_day = date_ordinal(start), date_ordinal(end)
+    if not start_day or not end_day or len(start) != 10 or len(end) != 10:
+        return jsonify({"success": False, "error": "start and end are required (YYYY-MM-DD)"}), 400
+    if end_day < start_day:
+        return jsonify({"success": False, "error": "end must not be before start"}), 400
+    
+    return jsonify({"success": True, "start": start, "end": end, "tasks": overlapping(start_day, end_day)})
 
 
 @tasks_bp.route('/task/create', methods=['POST'])
@@ -29,6 +99,9 @@ def create_new_task():
     task = create_task(page_id, data)
     
     if task:
+        refresh_task(page_id, task["id"])
+        # Re-read: refresh_task may have promoted the new task to overdue
+        task = get_task(page_id, task["id"]) or task
         return jsonify({"success": True, "task": task}), 201
     return jsonify({"success": False, "error": "Failed to create task"}), 500
 
@@ -44,8 +117,20 @@ def update_existing_task():
     page_id = data.pop("page_id")
     task_id = data.pop("task_id")
     
-    if update_task(page_id, task_id, data):
-        return jsonify({"success": True})
+    try:
+        version = update_task(page_id, task_id, data, if_match=strong_etag(request.headers.get('If-Match')))
+    except PageVersionConflict as e:
+        response = jsonify({"success": False, "error": str(e)})
+        response.headers['ETag'] = e.etag
+        return response, 409
+    
+    if version:
+        refresh_task(page_id, task_id)
+        response = jsonify({"success": True})
+        # The version this update wrote: a later save (even refresh_task
+        # promoting the task) must fail the client's next If-Match
+        response.headers['ETag'] = page_etag({"version": version})
+        return response
     return jsonify({"success": False, "error": "Failed to update task"}), 500
 
 
@@ -60,3 +145,39 @@ def delete_existing_task():
     if delete_task(data["page_id"], data["task_id"]):
         return jsonify({"success": True})
     return jsonify({"success": False, "error": "Failed to delete task"}), 500
+
+
+@tasks_bp.route('/tasks/batch', methods=['POST'])
+def batch_tasks():
+    """Apply create/update/delete task operations across pages, all or nothing
+
+    Body: {"operations": [{"op": "create", "page_id", "task"},
+                          {"op": "update", "page_id", "task_id", "updates"},
+                          {"op": "delete", "page_id", "task_id"}, ...],
+           "if_match": {page_id: etag}}  (if_match optional)
+    Each touched page is written once, however many operations it has.
+    """
+    data = request.json
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list):
+        return jsonify({"success": False, "error": "operations must be a list"}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({"success": False, "error": f"at most {MAX_BATCH_OPERATIONS} operations per batch"}), 400
+    if_match = data.get("if_match")
+    if if_match is not None and not isinstance(if_match, dict):
+        return jsonify({"success": False, "error": "if_match must map page ids to ETags"}), 400
+    
+    try:
+        result = apply_task_batch(operations, if_match)
+    except TaskBatchError as e:
+        return jsonify({"success": False, "error": str(e), "index": e.index}), e.status
+    except PageVersionConflict as e:
+        response = jsonify({"success": False, "error": str(e)})
+        response.headers['ETag'] = e.etag
+        return response, 409
+    
+    for item in result["results"]:
+        if "task" in item:
+            track_task(item["page_id"], item["task"])
+    promote_due_tasks()
+    return jsonify({"success": True, **result})
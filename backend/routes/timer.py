@@ -1,21 +1,22 @@
 from flask import Blueprint, jsonify, request
 from datetime import datetime
-import json
 import os
+import uuid
+
+from backend import analytics, session_log
+from backend.file_manager import db, record_change
+from backend.http_cache import conditional, store_validator
+from backend.locks import write_lock
+from backend.storage import read_json, write_json
 
 timer_bp = Blueprint('timer', __name__)
 
-TIMER_DATA_PATH = 'backend/userdata/timer_sessions.json'
 TIMER_SETTINGS_PATH = 'backend/userdata/timer_settings.json'
 ACTIVE_TIMER_PATH = 'backend/userdata/active_timer.json'
 
 def ensure_timer_files():
     """Ensure timer data files exist"""
-    os.makedirs(os.path.dirname(TIMER_DATA_PATH), exist_ok=True)
-    
-    if not os.path.exists(TIMER_DATA_PATH):
-        with open(TIMER_DATA_PATH, 'w') as f:
-            json.dump({'sessions': []}, f)
+    os.makedirs(os.path.dirname(TIMER_SETTINGS_PATH), exist_ok=True)
     
     if not os.path.exists(TIMER_SETTINGS_PATH):
         default_settings = {
@@ -26,48 +27,90 @@ def ensure_timer_files():
                 'sessionsBeforeLongBreak': 4
             }
         }
-        with open(TIMER_SETTINGS_PATH, 'w') as f:
-            json.dump(default_settings, f)
+        write_json(TIMER_SETTINGS_PATH, default_settings)
     
     if not os.path.exists(ACTIVE_TIMER_PATH):
-        with open(ACTIVE_TIMER_PATH, 'w') as f:
-            json.dump({'active': False}, f)
+        write_json(ACTIVE_TIMER_PATH, {'active': False})
 
 def get_timer_data():
     """Load timer sessions data"""
-    ensure_timer_files()
-    with open(TIMER_DATA_PATH, 'r') as f:
-        return json.load(f)
+    if db:
+        return {'sessions': db.get_timer_sessions()}
+    return {'sessions': session_log.all_sessions()}
 
-def save_timer_data(data):
-    """Save timer sessions data"""
-    ensure_timer_files()
-    with open(TIMER_DATA_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+def get_sessions_between(start_date, end_date):
+    """Load the sessions that started between two dates (inclusive)"""
+    if db:
+        return db.get_timer_sessions_between(start_date, end_date)
+    return session_log.sessions_between(start_date, end_date)
+
+def add_timer_session(session):
+    """Append one timer session"""
+    if db:
+        db.add_timer_session(session)
+    else:
+        session_log.add_session(session)
+    record_change('timer_session', 'create', session=session)
+
+def delete_timer_session(session_id):
+    """Delete a timer session; returns False if it did not exist"""
+    deleted = db.delete_timer_session(session_id) if db else session_log.delete_session(session_id)
+    if deleted:
+        record_change('timer_session', 'delete', session_id=session_id)
+    return deleted
 
 def get_timer_settings():
     """Load timer settings"""
+    if db:
+        settings = db.get_document('timer_settings')
+        if settings is not None:
+            return settings
     ensure_timer_files()
-    with open(TIMER_SETTINGS_PATH, 'r') as f:
-        return json.load(f)
+    return read_json(TIMER_SETTINGS_PATH)
 
 def save_timer_settings(settings):
     """Save timer settings"""
-    ensure_timer_files()
-    with open(TIMER_SETTINGS_PATH, 'w') as f:
-        json.dump(settings, f, indent=2)
+    if db:
+        db.save_document('timer_settings', settings)
+    else:
+        ensure_timer_files()
+        write_json(TIMER_SETTINGS_PATH, settings)
+    record_change('timer_settings', 'update', settings=settings)
 
 def get_active_timer():
     """Load active timer state"""
+    if db:
+        return db.get_document('active_timer') or {'active': False}
     ensure_timer_files()
-    with open(ACTIVE_TIMER_PATH, 'r') as f:
-        return json.load(f)
+    return read_json(ACTIVE_TIMER_PATH)
 
 def save_active_timer(timer_state):
     """Save active timer state"""
-    ensure_timer_files()
-    with open(ACTIVE_TIMER_PATH, 'w') as f:
-        json.dump(timer_state, f, indent=2)
+    if db:
+        db.save_document('active_timer', timer_state)
+    else:
+        ensure_timer_files()
+        write_json(ACTIVE_TIMER_PATH, timer_state)
+    record_change('active_timer', 'update', timer=timer_state)
+
+def get_session_columns():
+    """All timer sessions plus cached analytics columns (day, duration, session type)"""
+    key = db.change_stamp() if db else session_log.version()
+    return analytics.cached('timer_sessions', key, lambda: build_session_columns(get_timer_data()['sessions']))
+
+def build_session_columns(sessions):
+    """Analytics columns over sessions that have a start date"""
+    records, days, durations, types = [], [], [], []
+    for session in sessions:
+        try:
+            day = analytics.day_ordinal(session.get('startTime', ''))
+        except ValueError:
+            continue
+        records.append(session)
+        days.append(day)
+        durations.append(session.get('duration', 0))
+        types.append(session.get('type', 'other'))
+    return sessions, analytics.Columns(records, days, durations, types)
 
 def calculate_current_time(timer_state):
     """Calculate current timer value based on start time"""
@@ -134,10 +177,11 @@ def start_timer():
 def pause_timer():
     """Pause the active timer"""
     try:
-        timer_state = get_active_timer()
-        timer_state = calculate_current_time(timer_state)
-        timer_state['active'] = False
-        save_active_timer(timer_state)
+        with write_lock(ACTIVE_TIMER_PATH):
+            timer_state = get_active_timer()
+            timer_state = calculate_current_time(timer_state)
+            timer_state['active'] = False
+            save_active_timer(timer_state)
         return jsonify(timer_state), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -152,9 +196,14 @@ def stop_timer():
         return jsonify({'error': str(e)}), 500
 
 @timer_bp.route('/api/timer/sessions', methods=['GET'])
+@conditional(lambda: store_validator(session_log.LOG_FILE))
 def get_sessions():
-    """Get all timer sessions"""
+    """Get all timer sessions, or those started between ?start= and ?end= (YYYY-MM-DD)"""
     try:
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+        if start_date or end_date:
+            return jsonify(get_sessions_between(start_date or '0000-00-00', end_date or '9999-99-99'))
         data = get_timer_data()
         return jsonify(data['sessions'])
     except Exception as e:
@@ -165,15 +214,16 @@ def create_session():
     """Create a new timer session"""
     try:
         session_data = request.json
-        data = get_timer_data()
+        if not isinstance(session_data, dict):
+            return jsonify({'error': 'Session data is required'}), 400
+        if not isinstance(session_data.get('startTime', ''), str):
+            return jsonify({'error': 'startTime must be an ISO date string'}), 400
         
-        # Generate ID
-        session_id = str(len(data['sessions']) + 1)
-        session_data['id'] = session_id
+        # Generate ID (a count of existing sessions would reuse ids after a delete)
+        session_data['id'] = str(uuid.uuid4())
         session_data['createdAt'] = datetime.now().isoformat()
         
-        data['sessions'].append(session_data)
-        save_timer_data(data)
+        add_timer_session(session_data)
         
         return jsonify(session_data), 201
     except Exception as e:
@@ -183,9 +233,7 @@ def create_session():
 def delete_session(session_id):
     """Delete a timer session"""
     try:
-        data = get_timer_data()
-        data['sessions'] = [s for s in data['sessions'] if s['id'] != session_id]
-        save_timer_data(data)
+        delete_timer_session(session_id)
         return jsonify({'message': 'Session deleted'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -211,32 +259,26 @@ def update_settings():
 
 @timer_bp.route('/api/timer/stats', methods=['GET'])
 def get_stats():
-    """Get timer statistics for dashboard"""
+    """Get timer statistics for dashboard, optionally for sessions between ?start= and ?end="""
     try:
-        data = get_timer_data()
-        sessions = data['sessions']
-        
-        # Calculate stats
-        total_sessions = len(sessions)
-        total_time = sum(s.get('duration', 0) for s in sessions)  # in seconds
-        
-        # Group by date
-        sessions_by_date = {}
-        for session in sessions:
-            date = session.get('startTime', '')[:10]  # Extract date
-            if date not in sessions_by_date:
-                sessions_by_date[date] = {'count': 0, 'duration': 0}
-            sessions_by_date[date]['count'] += 1
-            sessions_by_date[date]['duration'] += session.get('duration', 0)
-        
-        # Recent sessions (last 7 days)
-        recent_sessions = sorted(sessions, key=lambda s: s.get('startTime', ''), reverse=True)[:10]
+        start_date = request.args.get('start')
+        end_date = request.args.get('end')
+        if start_date or end_date:
+            sessions, columns = build_session_columns(
+                get_sessions_between(start_date or '0000-00-00', end_date or '9999-99-99'))
+        else:
+            sessions, columns = get_session_columns()
         
         return jsonify({
-            'totalSessions': total_sessions,
-            'totalTime': total_time,
-            'sessionsByDate': sessions_by_date,
-            'recentSessions': recent_sessions
+            'totalSessions': len(sessions),
+            'totalTime': sum(s.get('duration', 0) for s in sessions),  # in seconds
+            'sessionsByDate': analytics.by_day(columns),
+            'sessionsByWeek': analytics.by_week(columns),
+            'sessionsByType': analytics.by_category(columns),
+            'rollingAverage': analytics.rolling_average(columns),
+            'streaks': analytics.streaks(columns),
+            'durationPercentiles': analytics.percentiles(columns),
+            'recentSessions': analytics.most_recent(sessions, 10)
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,323 @@
+"""
+Search Index for Udo
+Inverted index over task titles, descriptions and tags with prefix
+matching and BM25 ranking. Task creates and updates are applied one task
+at a time through a page listener; other saves and deletes re-index the
+page, and pages edited outside the app are picked up by their manifest
+stamp on the next search. Only terms are kept per task; the tasks of the
+results are looked up in task_index.
+"""
+
+import bisect
+import heapq
+import html
+import math
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+from typing import Dict, List, Any
+
+from backend import task_index
+from backend.file_manager import (
+    add_page_listener, get_page, get_page_summary_map, page_stamp
+)
+from backend.task_model import Task
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Terms are weighted by the field they occur in
+FIELD_WEIGHTS = (('title', 3), ('tag_names', 2), ('description', 1))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# A query term matches at most this many indexed terms by prefix (those in
+# the most tasks), and prefix-only matches score lower than exact ones
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_PENALTY = 0.8
+
+SNIPPET_CHARS = 160
+
+_Doc = namedtuple('_Doc', 'signature terms length')
+
+_lock = threading.Lock()
+_stamps = {}      # page_id -> stamp the page was indexed at
+_page_docs = {}   # page_id -> [key, ...] in task order
+_page_ids = {}    # page_id -> {task id: key} of the first task with each id
+_docs = {}        # (page_id, position) -> _Doc
+_postings = {}    # term -> {key: weighted term frequency}
+_vocabulary = []  # sorted terms, for prefix lookups
+_total_length = 0
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _signature(task: Task) -> int:
+    """Hash of the indexed fields of a task, to detect whether it needs re-indexing"""
+    return hash((task.title, task.description, task.tags))
+
+
+def _task_terms(task: Task) -> tuple:
+    """((term, weighted frequency), ...) of a task, terms interned across documents"""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        value = getattr(task, field)
+        if field == 'tag_names':
+            value = ' '.join(value)
+        for token in tokenize(value):
+            terms[sys.intern(token)] += weight
+    return tuple(terms.items())
+
+
+def _remove_doc(key: tuple):
+    global _total_length
+    doc = _docs.pop(key)
+    _total_length -= doc.length
+    for term, _ in doc.terms:
+        postings = _postings[term]
+        del postings[key]
+        if not postings:
+            del _postings[term]
+            del _vocabulary[bisect.bisect_left(_vocabulary, term)]
+
+
+def _add_doc(key: tuple, doc: _Doc):
+    global _total_length
+    _docs[key] = doc
+    _total_length += doc.length
+    for term, tf in doc.terms:
+        postings = _postings.get(term)
+        if postings is None:
+            postings = _postings[term] = {}
+            bisect.insort(_vocabulary, term)
+        postings[key] = tf
+
+
+def _apply_page(page_id: str, page: Dict[str, Any], stamp: tuple):
+    """Bring one page in the index up to date (caller holds _lock)
+
+    Only tasks whose title, description or tags changed are re-indexed.
+    """
+    old_keys = _page_docs.pop(page_id, [])
+    _page_ids.pop(page_id, None)
+    _stamps.pop(page_id, None)
+    if page is None:
+        for key in old_keys:
+            _remove_doc(key)
+        return
+
+    tasks = page.get('tasks', [])
+    for key in old_keys[len(tasks):]:
+        _remove_doc(key)
+
+    keys = []
+    ids = {}
+    for position, task in enumerate(tasks):
+        key = (page_id, position)
+        _index_task(key, task)
+        keys.append(key)
+        if isinstance(task, dict):
+            ids.setdefault(task.get('id'), key)
+
+    _page_docs[page_id] = keys
+    _page_ids[page_id] = ids
+    _stamps[page_id] = stamp
+
+
+def _index_task(key: tuple, task: Dict[str, Any]):
+    """Index one task at key, unless it is already indexed with the same fields"""
+    # Only read here; the Task kept for the results is task_index's
+    task = Task(key[0], key[1], task)
+    signature = _signature(task)
+    doc = _docs.get(key)
+    if not doc or doc.signature != signature:
+        if doc:
+            _remove_doc(key)
+        terms = _task_terms(task)
+        _add_doc(key, _Doc(signature, terms, sum(tf for _, tf in terms)))
+
+
+def _apply_changes(page_id: str, changes: List[tuple], stamp: tuple) -> bool:
+    """Apply the (op, task) changes of one save (caller holds _lock)
+
+    Updates are re-indexed in place and creates appended, without reading
+    the rest of the page. A delete shifts the positions of the tasks after
+    it, so changes with a delete (or a task not found by id) return False
+    and the caller re-indexes the whole page.
+    """
+    keys = _page_docs[page_id]
+    ids = _page_ids[page_id]
+    if any(op == 'delete' or (op == 'update' and task.get('id') not in ids) for op, task in changes):
+        return False
+    for op, task in changes:
+        if op == 'update':
+            _index_task(ids[task['id']], task)
+        else:
+            key = (page_id, len(keys))
+            _index_task(key, task)
+            keys.append(key)
+            ids.setdefault(task.get('id'), key)
+    _stamps[page_id] = stamp
+    return True
+
+
+def _on_page_changed(page_id: str, page: Dict[str, Any], summary: Dict[str, Any],
+                     changes: List[tuple] = None):
+    """Page listener: apply task changes in place, re-index other saves or drop a deleted page
+
+    As in calendar_index, changes are only applied on their own if the
+    index holds the version just before this save. A single-task update of
+    a large page (whose tasks are streamed from the file) is thus indexed
+    without parsing the other tasks.
+    """
+    stamp = page_stamp(summary) if summary else None
+    with _lock:
+        indexed = _stamps.get(page_id)
+        if (page is not None and changes is not None and indexed is not None
+                and indexed[0] == page.get('version', 0) - 1
+                and _apply_changes(page_id, changes, stamp)):
+            return
+        _apply_page(page_id, page, stamp)
+
+
+def sync():
+    """Re-index pages whose manifest stamp differs from the indexed one
+
+    Pages are read without holding the index lock (the page listener takes
+    it while a page lock is held), and a page is only applied if no save
+    indexed it in the meantime.
+    """
+    summaries = get_page_summary_map()
+    with _lock:
+        removed = [page_id for page_id in _stamps if page_id not in summaries]
+        for page_id in removed:
+            _apply_page(page_id, None, None)
+        stale = {page_id: _stamps.get(page_id) for page_id, summary in summaries.items()
+                 if _stamps.get(page_id) != page_stamp(summary)}
+
+    for page_id, seen in stale.items():
+        page = get_page(page_id)
+        with _lock:
+            if _stamps.get(page_id) == seen:
+                _apply_page(page_id, page, page_stamp(summaries[page_id]))
+
+
+def _expand(token: str) -> tuple:
+    """Indexed terms matching a query token: ([(term, weight)], truncated), exact match first
+
+    If more than MAX_PREFIX_EXPANSIONS terms start with the token, the ones
+    occurring in the most tasks are kept and truncated is true.
+    """
+    exact = token in _postings
+    start = bisect.bisect_left(_vocabulary, token)
+    # Every term starting with token sorts before token + U+10FFFF
+    end = bisect.bisect_left(_vocabulary, token + '\U0010ffff', start)
+    prefixed = [term for term in _vocabulary[start:end] if term != token]
+    room = MAX_PREFIX_EXPANSIONS - exact
+    truncated = len(prefixed) > room
+    if truncated:
+        prefixed = heapq.nlargest(room, prefixed, key=lambda term: len(_postings[term]))
+    matches = [(token, 1.0)] if exact else []
+    matches.extend((term, PREFIX_PENALTY) for term in prefixed)
+    return matches, truncated
+
+
+def _highlight(text: str, tokens: List[str]) -> str:
+    """HTML-escape text and wrap words starting with a query token in <mark>"""
+    parts = []
+    last = 0
+    for match in TOKEN_RE.finditer(text):
+        if match.group().lower().startswith(tuple(tokens)):
+            parts.append(html.escape(text[last:match.start()]))
+            parts.append(f'<mark>{html.escape(match.group())}</mark>')
+            last = match.end()
+    parts.append(html.escape(text[last:]))
+    return ''.join(parts)
+
+
+def _snippet(text: str, tokens: List[str]) -> str:
+    """A highlighted window of text around the first matching word"""
+    if not text:
+        return ''
+    start = 0
+    for match in TOKEN_RE.finditer(text):
+        if match.group().lower().startswith(tuple(tokens)):
+            if match.start() > SNIPPET_CHARS // 4:
+                # Start the window at a word boundary shortly before the match
+                start = match.start() - SNIPPET_CHARS // 4
+                space = text.find(' ', start, match.start())
+                start = space + 1 if space != -1 else start
+            break
+    end = min(len(text), start + SNIPPET_CHARS)
+    snippet = _highlight(text[start:end], tokens)
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+def search(query: str, limit: int = 20, page_ids: List[str] = None) -> Dict[str, Any]:
+    """Rank tasks matching every word of the query (each word as a prefix)
+
+    Returns {"results": [{"task", "score", "title", "snippet"}], "total",
+    "truncated"}, where title and snippet are HTML with matches wrapped in
+    <mark>. truncated is true when a word matched too many indexed words by
+    prefix and only the most common ones were searched, so some matches may
+    be missing.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return {"results": [], "total": 0, "truncated": False}
+
+    sync()
+
+    with _lock:
+        doc_count = len(_docs)
+        avg_length = _total_length / doc_count if doc_count else 0
+        scores = None
+        truncated = False
+        for token in tokens:
+            token_scores = {}
+            expansions, token_truncated = _expand(token)
+            truncated = truncated or token_truncated
+            for term, weight in expansions:
+                postings = _postings[term]
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    if scores is not None and key not in scores:
+                        continue
+                    norm = K1 * (1 - B + B * _docs[key].length / avg_length)
+                    score = weight * idf * tf * (K1 + 1) / (tf + norm)
+                    if score > token_scores.get(key, 0):
+                        token_scores[key] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {key: scores[key] + s for key, s in token_scores.items()}
+            if not scores:
+                break
+
+        if page_ids:
+            scores = {key: s for key, s in scores.items() if key[0] in page_ids}
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        hits = [(key, score, _docs[key].signature) for key, score in ranked[:limit]]
+
+    results = []
+    found = task_index.tasks_at([key for key, _, _ in hits])
+    for (key, score, signature), entry in zip(hits, found):
+        # A task saved again since it was scored is left out
+        if entry is None or _signature(entry[0]) != signature:
+            continue
+        task, page_name = entry
+        results.append({
+            "task": task.to_dict(page_name),
+            "score": round(score, 4),
+            "title": _highlight(task.title or '', tokens),
+            "snippet": _snippet(task.description or '', tokens)
+        })
+    return {"results": results, "total": len(scores), "truncated": truncated}
+
+
+add_page_listener(_on_page_changed)
@@ -0,0 +1,233 @@
+"""
+Timer Session Log for Udo
+Timer sessions are stored as an append-only JSON Lines log: one record per
+added session and a tombstone per delete, so adding a session costs one
+write and one fsync. A sidecar index keeps the byte offsets of each day's
+sessions for date-range reads, and compaction rewrites the log without
+deleted sessions once enough tombstones pile up.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Any
+
+from backend.file_manager import USERDATA_DIR
+from backend.locks import write_lock
+from backend.storage import atomic_write_text, write_json
+
+LOG_FILE = os.path.join(USERDATA_DIR, 'timer_sessions.jsonl')
+INDEX_FILE = os.path.join(USERDATA_DIR, 'timer_sessions.idx.json')
+LEGACY_FILE = os.path.join(USERDATA_DIR, 'timer_sessions.json')
+
+# Compact once tombstones outnumber this and a quarter of the logged sessions
+COMPACT_MIN_DELETES = 100
+
+# Persist the sidecar index when loading had to scan this much unindexed log
+INDEX_CHECKPOINT_BYTES = 256 * 1024
+
+# Lock order: write_lock(LOG_FILE) before _lock
+_lock = threading.Lock()
+_index = None  # {"ino", "size", "days": {day: [offset]}, "deleted": {id: offset}, "added": n}
+_migrated = False
+
+
+def _record(op: str, **fields) -> bytes:
+    return (json.dumps({"op": op, **fields}, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def _empty_index(ino) -> Dict[str, Any]:
+    return {"ino": ino, "size": 0, "days": {}, "deleted": {}, "added": 0}
+
+
+def _session_day(session: Dict[str, Any]) -> str:
+    """YYYY-MM-DD a session is indexed under; '' if its startTime is not a string"""
+    start = session.get('startTime')
+    return start[:10] if isinstance(start, str) else ''
+
+
+def _index_record(index: Dict[str, Any], record: Dict[str, Any], offset: int, length: int):
+    if record["op"] == "add":
+        index["days"].setdefault(_session_day(record["session"]), []).append(offset)
+        index["added"] += 1
+    elif record["op"] == "delete":
+        index["deleted"][record["id"]] = offset
+    index["size"] = offset + length
+
+
+def _scan(index: Dict[str, Any], end: int):
+    """Index the log records between index["size"] and end"""
+    with open(LOG_FILE, 'rb') as f:
+        f.seek(index["size"])
+        while index["size"] < end:
+            line = f.readline()
+            if not line.endswith(b'\n'):
+                break  # torn final record from a crash mid-append; ignored
+            _index_record(index, json.loads(line), index["size"], len(line))
+
+
+def _is_live(index: Dict[str, Any], session: Dict[str, Any], offset: int) -> bool:
+    tombstone = index["deleted"].get(session.get('id'))
+    return tombstone is None or tombstone < offset
+
+
+def _ensure_migrated():
+    """Convert a timer_sessions.json from before the log (kept as .bak) on first use"""
+    global _migrated
+    if _migrated:
+        return
+    if not os.path.exists(LOG_FILE) and os.path.exists(LEGACY_FILE):
+        with write_lock(LOG_FILE), _lock:
+            if not os.path.exists(LOG_FILE) and os.path.exists(LEGACY_FILE):
+                with open(LEGACY_FILE, 'r', encoding='utf-8') as f:
+                    _rewrite(json.load(f).get('sessions', []))
+                os.replace(LEGACY_FILE, LEGACY_FILE + '.bak')
+    _migrated = True
+
+
+def _load() -> Dict[str, Any]:
+    """The index, brought up to date with the log (caller holds _lock)
+
+    Appends by other processes are picked up by scanning only the new tail;
+    a log replaced by compaction (new inode) is re-indexed from the sidecar.
+    """
+    global _index
+    try:
+        st = os.stat(LOG_FILE)
+    except FileNotFoundError:
+        _index = _empty_index(None)
+        return _index
+
+    index = _index
+    if index is None or index["ino"] != st.st_ino or index["size"] > st.st_size:
+        try:
+            with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = None
+        if not index or index.get("ino") != st.st_ino or index.get("size", 0) > st.st_size:
+            index = _empty_index(st.st_ino)
+
+    if index["size"] < st.st_size:
+        scanned_from = index["size"]
+        _scan(index, st.st_size)
+        if index["size"] - scanned_from >= INDEX_CHECKPOINT_BYTES:
+            write_json(INDEX_FILE, index, indent=None)
+    _index = index
+    return index
+
+
+def _live_sessions(index: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every live session in log order (caller holds _lock)"""
+    sessions = []
+    if not index["size"]:
+        return sessions
+    with open(LOG_FILE, 'rb') as f:
+        offset = 0
+        while offset < index["size"]:
+            line = f.readline()
+            record = json.loads(line)
+            if record["op"] == "add" and _is_live(index, record["session"], offset):
+                sessions.append(record["session"])
+            offset += len(line)
+    return sessions
+
+
+def all_sessions() -> List[Dict[str, Any]]:
+    """All live sessions in the order they were added"""
+    _ensure_migrated()
+    with _lock:
+        return _live_sessions(_load())
+
+
+def sessions_between(start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Live sessions that started between two dates (inclusive), read by seeking to their offsets"""
+    _ensure_migrated()
+    with _lock:
+        index = _load()
+        offsets = sorted(offset for day, day_offsets in index["days"].items()
+                         if start_date <= day <= end_date for offset in day_offsets)
+        if not offsets:
+            return []
+        sessions = []
+        with open(LOG_FILE, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                session = json.loads(f.readline())["session"]
+                if _is_live(index, session, offset):
+                    sessions.append(session)
+        return sessions
+
+
+def version():
+    """Stamp that changes whenever the log changes (in any process)"""
+    _ensure_migrated()
+    try:
+        st = os.stat(LOG_FILE)
+        return (st.st_ino, st.st_size)
+    except FileNotFoundError:
+        return None
+
+
+def _rewrite(sessions: List[Dict[str, Any]]):
+    """Atomically replace the log with the given sessions and re-index it (caller holds both locks)"""
+    global _index
+    atomic_write_text(LOG_FILE, b''.join(_record("add", session=s) for s in sessions).decode('utf-8'))
+    st = os.stat(LOG_FILE)
+    _index = _empty_index(st.st_ino)
+    _scan(_index, st.st_size)
+    write_json(INDEX_FILE, _index, indent=None)
+
+
+def _append(index: Dict[str, Any], record: Dict[str, Any]):
+    """Append a record with one write and one fsync (caller holds both locks)
+
+    The record is encoded before anything is written, and indexing it
+    cannot fail, so the log and the index stay in step.
+    """
+    payload = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+    fd = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND)
+    try:
+        if os.fstat(fd).st_size != index["size"]:
+            os.ftruncate(fd, index["size"])  # drop a torn record left by a crash
+        os.write(fd, payload)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    # No other writer can have appended while the log lock is held
+    _index_record(index, record, index["size"], len(payload))
+
+
+def add_session(session: Dict[str, Any]):
+    """Append a session to the log with one write and one fsync"""
+    _ensure_migrated()
+    record = {"op": "add", "session": session}
+    with write_lock(LOG_FILE), _lock:
+        index = _load()
+        if index["ino"] is None:
+            _rewrite([session])  # creating the log also makes its directory entry durable
+        else:
+            _append(index, record)
+
+
+def delete_session(session_id: str) -> bool:
+    """Tombstone a session, compacting the log once tombstones pile up; False if there was none"""
+    _ensure_migrated()
+    with write_lock(LOG_FILE), _lock:
+        index = _load()
+        sessions = _live_sessions(index)
+        if not any(s.get('id') == session_id for s in sessions):
+            return False
+        if len(index["deleted"]) + 1 > max(COMPACT_MIN_DELETES, index["added"] // 4):
+            _rewrite([s for s in sessions if s.get('id') != session_id])
+            return True
+        _append(index, {"op": "delete", "id": session_id})
+        return True
+
+
+def replace_sessions(sessions: List[Dict[str, Any]]):
+    """Replace every session (imports and migrations)"""
+    global _migrated
+    with write_lock(LOG_FILE), _lock:
+        _rewrite(sessions)
+    _migrated = True
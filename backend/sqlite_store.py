@@ -0,0 +1,497 @@
+"""
+SQLite Store for Udo
+Optional storage backend (UDO_STORAGE_BACKEND=sqlite) with indexed tables.
+Documents are kept as JSON in a `data` column; the columns used for lookups
+and cross-page queries are stored alongside and indexed.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any
+
+from backend.dates import stamp_date_range, task_date_range
+from backend.storage import PageVersionConflict
+
+USERDATA_DIR = os.path.join(os.path.dirname(__file__), 'userdata')
+DB_FILE = os.environ.get('UDO_SQLITE_PATH', os.path.join(USERDATA_DIR, 'udo.db'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    store_id TEXT NOT NULL,
+    changes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_state (id, store_id, changes) VALUES (1, lower(hex(randomblob(16))), 0);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    page_id TEXT NOT NULL REFERENCES pages(id) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT,
+    start_date TEXT,
+    end_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (page_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_id ON tasks(page_id, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_start_date ON tasks(start_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_end_date ON tasks(end_date);
+CREATE TABLE IF NOT EXISTS task_tags (
+    page_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (page_id, position, tag),
+    FOREIGN KEY (page_id, position) REFERENCES tasks(page_id, position) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_task_tags_tag ON task_tags(tag);
+CREATE TABLE IF NOT EXISTS timer_sessions (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    start_time TEXT,
+    duration REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_timer_sessions_start ON timer_sessions(start_time);
+CREATE TABLE IF NOT EXISTS countdown_events (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    target_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_countdown_events_target ON countdown_events(target_date);
+CREATE TABLE IF NOT EXISTS daytracker_days (
+    date TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daytracker_entries (
+    date TEXT NOT NULL REFERENCES daytracker_days(date) ON DELETE CASCADE,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    subject TEXT,
+    start_time TEXT,
+    end_time TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (date, position)
+);
+"""
+
+_local = threading.local()
+_schema_ready = set()
+_schema_lock = threading.Lock()
+_summary_cache = (None, None)  # (change_stamp, get_page_summary_map result)
+
+
+def configure(db_file: str):
+    """Point the store at a different database file (used by tools)"""
+    global DB_FILE
+    DB_FILE = db_file
+    _local.__dict__.clear()
+
+
+def _conn() -> sqlite3.Connection:
+    """Get this thread's connection, creating the schema on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'db_file', None) != DB_FILE:
+        os.makedirs(os.path.dirname(os.path.abspath(DB_FILE)), exist_ok=True)
+        conn = sqlite3.connect(DB_FILE, timeout=30, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        with _schema_lock:
+            if DB_FILE not in _schema_ready:
+                conn.executescript(SCHEMA)
+                _schema_ready.add(DB_FILE)
+        _local.conn = conn
+        _local.db_file = DB_FILE
+    return conn
+
+
+@contextmanager
+def _transaction():
+    """Run statements in one write transaction, counting it in store_state"""
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+        conn.execute('UPDATE store_state SET changes = changes + 1')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def change_stamp() -> tuple:
+    """(store id, committed write transactions) of the database
+
+    Both are stored in the database, so the stamp survives restarts and
+    counts writes made by any process (tools, other workers) through this
+    module; a recreated database gets a new random store id.
+    """
+    return tuple(_conn().execute('SELECT store_id, changes FROM store_state').fetchone())
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+# Settings and single-document stores
+
+def get_document(key: str) -> Any:
+    """Load a JSON document stored under key (None if missing)"""
+    row = _conn().execute('SELECT data FROM settings WHERE key = ?', (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def save_document(key: str, data: Any):
+    """Store a JSON document under key"""
+    with _transaction() as conn:
+        conn.execute('INSERT OR REPLACE INTO settings (key, data) VALUES (?, ?)',
+                     (key, _dumps(data)))
+
+
+def get_maindata() -> Dict[str, Any]:
+    """Load main application data (None if never saved)"""
+    data = get_document('maindata')
+    if data is None:
+        return None
+    rows = _conn().execute('SELECT data FROM tags ORDER BY position').fetchall()
+    data['tags'] = [json.loads(row[0]) for row in rows]
+    return data
+
+
+def save_maindata(data: Dict[str, Any]):
+    """Save main application data, keeping tags in their own table"""
+    settings = {k: v for k, v in data.items() if k != 'tags'}
+    with _transaction() as conn:
+        conn.execute('INSERT OR REPLACE INTO settings (key, data) VALUES (?, ?)',
+                     ('maindata', _dumps(settings)))
+        conn.execute('DELETE FROM tags')
+        conn.executemany(
+            'INSERT INTO tags (id, position, data) VALUES (?, ?, ?)',
+            [(tag.get('id'), i, _dumps(tag)) for i, tag in enumerate(data.get('tags', []))]
+        )
+
+
+# Pages and tasks
+
+def _insert_task(conn, page_id: str, position: int, task: Dict[str, Any]):
+    """Insert one task row and its tag rows"""
+    stamp_date_range(task)
+    start_date, end_date = task_date_range(task)
+    conn.execute(
+        'INSERT INTO tasks (page_id, id, position, status, start_date, end_date, data) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (page_id, task.get('id'), position, task.get('status'),
+         start_date or None, end_date or None, _dumps(task))
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO task_tags (page_id, position, tag) VALUES (?, ?, ?)',
+        [(page_id, position, tag) for tag in task.get('tags', [])]
+    )
+
+
+def _bump_version(conn, page_id: str) -> int:
+    conn.execute('UPDATE pages SET version = version + 1 WHERE id = ?', (page_id,))
+    return conn.execute('SELECT version FROM pages WHERE id = ?', (page_id,)).fetchone()[0]
+
+
+def list_page_ids() -> List[str]:
+    """Get the ids of all pages"""
+    return [row[0] for row in _conn().execute('SELECT id FROM pages ORDER BY rowid')]
+
+
+def get_page_version(page_id: str) -> int:
+    """A page's version (None if missing)"""
+    row = _conn().execute('SELECT version FROM pages WHERE id = ?', (page_id,)).fetchone()
+    return row[0] if row else None
+
+
+def get_page(page_id: str) -> Dict[str, Any]:
+    """Load a page with its tasks (None if missing)"""
+    conn = _conn()
+    row = conn.execute('SELECT name, version, data FROM pages WHERE id = ?', (page_id,)).fetchone()
+    if not row:
+        return None
+    page = json.loads(row[2])
+    page.update({"id": page_id, "name": row[0], "version": row[1]})
+    page["tasks"] = [
+        json.loads(task_row[0]) for task_row in conn.execute(
+            'SELECT data FROM tasks WHERE page_id = ? ORDER BY position', (page_id,))
+    ]
+    return page
+
+
+def _save_page(conn, page_id: str, data: Dict[str, Any], version: int = None):
+    """Replace a page and all of its tasks, bumping its version (inside a transaction)
+
+    With version the page is stored at that version instead.
+    """
+    extra = {k: v for k, v in data.items() if k not in ('id', 'name', 'tasks', 'version')}
+    conn.execute(
+        'INSERT INTO pages (id, name, version, data) VALUES (?, ?, 0, ?) '
+        'ON CONFLICT(id) DO UPDATE SET name = excluded.name, data = excluded.data',
+        (page_id, data.get('name'), _dumps(extra))
+    )
+    conn.execute('DELETE FROM tasks WHERE page_id = ?', (page_id,))
+    for position, task in enumerate(data.get('tasks', [])):
+        _insert_task(conn, page_id, position, task)
+    if version is None:
+        data['version'] = _bump_version(conn, page_id)
+    else:
+        conn.execute('UPDATE pages SET version = ? WHERE id = ?', (version, page_id))
+        data['version'] = version
+
+
+def save_page(page_id: str, data: Dict[str, Any], version: int = None):
+    """Replace a page and all of its tasks, bumping its version
+
+    Migrations pass the version the page already had, so clients holding
+    its ETag see no change.
+    """
+    with _transaction() as conn:
+        _save_page(conn, page_id, data, version)
+
+
+def modify_pages(page_ids: List[str], apply: Callable[[Dict[str, Any]], Any]) -> Any:
+    """Load pages (None if missing), let apply(pages) change them in place and save them, in one transaction
+
+    If apply raises, nothing is saved.
+    """
+    with _transaction() as conn:
+        pages = {page_id: get_page(page_id) for page_id in page_ids}
+        result = apply(pages)
+        for page_id, page in pages.items():
+            if page is not None:
+                _save_page(conn, page_id, page)
+    return result
+
+
+def delete_page(page_id: str) -> bool:
+    """Delete a page and its tasks"""
+    with _transaction() as conn:
+        return conn.execute('DELETE FROM pages WHERE id = ?', (page_id,)).rowcount > 0
+
+
+def get_page_summary_map() -> Dict[str, Dict[str, Any]]:
+    """Get per-page counts and date spans from the task indexes, keyed by page id
+
+    The result is reused until the change stamp moves, so the indexes that
+    check it on every query do not re-aggregate every task.
+    """
+    global _summary_cache
+    stamp = change_stamp()
+    if _summary_cache[0] == stamp:
+        return dict(_summary_cache[1])
+    conn = _conn()
+    summaries = {}
+    for page_id, name, version, count, min_date, max_date in conn.execute(
+            'SELECT p.id, p.name, p.version, COUNT(t.id), MIN(t.start_date), MAX(t.end_date) '
+            'FROM pages p LEFT JOIN tasks t ON t.page_id = p.id '
+            'GROUP BY p.id ORDER BY p.rowid'):
+        summaries[page_id] = {
+            "id": page_id,
+            "name": name,
+            "task_count": count,
+            "version": version,
+            "status_counts": {},
+            "min_date": min_date,
+            "max_date": max_date
+        }
+    for page_id, status, count in conn.execute(
+            'SELECT page_id, status, COUNT(*) FROM tasks GROUP BY page_id, status'):
+        summaries[page_id]["status_counts"][status or "todo"] = count
+    _summary_cache = (stamp, summaries)
+    return dict(summaries)
+
+
+def get_task(page_id: str, task_id: str) -> Dict[str, Any]:
+    """Load one task (None if missing)"""
+    row = _conn().execute('SELECT data FROM tasks WHERE page_id = ? AND id = ? '
+                          'ORDER BY position LIMIT 1', (page_id, task_id)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def create_task(page_id: str, task: Dict[str, Any]) -> bool:
+    """Append a task to a page"""
+    with _transaction() as conn:
+        if not conn.execute('SELECT 1 FROM pages WHERE id = ?', (page_id,)).fetchone():
+            return False
+        position = conn.execute(
+            'SELECT COALESCE(MAX(position), -1) + 1 FROM tasks WHERE page_id = ?', (page_id,)
+        ).fetchone()[0]
+        _insert_task(conn, page_id, position, task)
+        _bump_version(conn, page_id)
+    return True
+
+
+def update_task(page_id: str, task_id: str, updates: Dict[str, Any],
+                if_match: str = None) -> int:
+    """Update one task row (If-Match is checked against the page version)
+
+    Returns the page version written, or False if the page or task does not exist.
+    """
+    with _transaction() as conn:
+        page = conn.execute('SELECT version FROM pages WHERE id = ?', (page_id,)).fetchone()
+        if not page:
+            return False
+        etag = f'"{page[0]}"'  # same format as file_manager.page_etag
+        if if_match and if_match != '*' and if_match != etag:
+            raise PageVersionConflict(etag)
+
+        row = conn.execute('SELECT position, data FROM tasks WHERE page_id = ? AND id = ? '
+                           'ORDER BY position LIMIT 1', (page_id, task_id)).fetchone()
+        if not row:
+            return False
+        task = json.loads(row[1])
+        task.update(updates)
+        conn.execute('DELETE FROM tasks WHERE page_id = ? AND position = ?', (page_id, row[0]))
+        _insert_task(conn, page_id, row[0], task)
+        version = _bump_version(conn, page_id)
+    return version
+
+
+def delete_task(page_id: str, task_id: str) -> bool:
+    """Delete one task"""
+    with _transaction() as conn:
+        if not conn.execute('SELECT 1 FROM pages WHERE id = ?', (page_id,)).fetchone():
+            return False
+        conn.execute('DELETE FROM tasks WHERE page_id = ? AND id = ?', (page_id, task_id))
+        _bump_version(conn, page_id)
+    return True
+
+
+def mark_overdue_before(today: str) -> int:
+    """Mark every open task whose end date is before today as overdue"""
+    with _transaction() as conn:
+        rows = conn.execute(
+            "SELECT page_id, position, data FROM tasks WHERE end_date < ? AND end_date <> '' "
+            "AND (status IS NULL OR status NOT IN ('completed', 'overdue'))", (today,)
+        ).fetchall()
+        for page_id, position, data in rows:
+            task = json.loads(data)
+            task["status"] = "overdue"
+            conn.execute('UPDATE tasks SET status = ?, data = ? WHERE page_id = ? AND position = ?',
+                         ("overdue", _dumps(task), page_id, position))
+        for page_id in {row[0] for row in rows}:
+            _bump_version(conn, page_id)
+    return len(rows)
+
+
+# Timer sessions and countdown events
+
+def get_timer_sessions() -> List[Dict[str, Any]]:
+    """Get all timer sessions in insertion order"""
+    return [json.loads(row[0]) for row in
+            _conn().execute('SELECT data FROM timer_sessions ORDER BY position')]
+
+
+def save_timer_sessions(sessions: List[Dict[str, Any]]):
+    """Replace all timer sessions"""
+    with _transaction() as conn:
+        conn.execute('DELETE FROM timer_sessions')
+        conn.executemany(
+            'INSERT INTO timer_sessions (id, position, start_time, duration, data) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(s.get('id'), i, s.get('startTime'), s.get('duration'), _dumps(s))
+             for i, s in enumerate(sessions)]
+        )
+
+
+def add_timer_session(session: Dict[str, Any]):
+    """Append one timer session"""
+    with _transaction() as conn:
+        conn.execute(
+            'INSERT INTO timer_sessions (id, position, start_time, duration, data) '
+            'VALUES (?, (SELECT COALESCE(MAX(position), -1) + 1 FROM timer_sessions), ?, ?, ?)',
+            (session.get('id'), session.get('startTime'), session.get('duration'), _dumps(session))
+        )
+
+
+def delete_timer_session(session_id: str) -> bool:
+    """Delete a timer session by id"""
+    with _transaction() as conn:
+        return conn.execute('DELETE FROM timer_sessions WHERE id = ?', (session_id,)).rowcount > 0
+
+
+def get_timer_sessions_between(start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Get timer sessions that started between two dates (inclusive) in insertion order"""
+    return [json.loads(row[0]) for row in _conn().execute(
+        'SELECT data FROM timer_sessions WHERE substr(start_time, 1, 10) BETWEEN ? AND ? '
+        'ORDER BY position', (start_date, end_date))]
+
+
+def get_countdown_events() -> List[Dict[str, Any]]:
+    """Get all countdown events in insertion order"""
+    return [json.loads(row[0]) for row in
+            _conn().execute('SELECT data FROM countdown_events ORDER BY position')]
+
+
+def save_countdown_events(events: List[Dict[str, Any]]):
+    """Replace all countdown events"""
+    with _transaction() as conn:
+        conn.execute('DELETE FROM countdown_events')
+        conn.executemany(
+            'INSERT INTO countdown_events (id, position, target_date, data) '
+            'VALUES (?, ?, ?, ?)',
+            [(e.get('id'), i, e.get('targetDate'), _dumps(e)) for i, e in enumerate(events)]
+        )
+
+
+# Daytracker
+
+def get_day_data(date_str: str) -> Dict[str, Any]:
+    """Load a tracked day with its entries (None if the day was never saved)"""
+    conn = _conn()
+    row = conn.execute('SELECT data FROM daytracker_days WHERE date = ?', (date_str,)).fetchone()
+    if not row:
+        return None
+    day = json.loads(row[0])
+    day['entries'] = [json.loads(entry[0]) for entry in conn.execute(
+        'SELECT data FROM daytracker_entries WHERE date = ? ORDER BY position', (date_str,))]
+    return day
+
+
+def save_day_data(date_str: str, data: Dict[str, Any]):
+    """Replace a tracked day and its entries"""
+    day = {k: v for k, v in data.items() if k != 'entries'}
+    with _transaction() as conn:
+        conn.execute('INSERT OR REPLACE INTO daytracker_days (date, data) VALUES (?, ?)',
+                     (date_str, _dumps(day)))
+        conn.execute('DELETE FROM daytracker_entries WHERE date = ?', (date_str,))
+        conn.executemany(
+            'INSERT INTO daytracker_entries '
+            '(date, id, position, subject, start_time, end_time, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(date_str, e.get('id'), i, e.get('subject'), e.get('startTime'), e.get('endTime'),
+              _dumps(e)) for i, e in enumerate(data.get('entries', []))]
+        )
+
+
+def get_tracked_dates() -> List[str]:
+    """Get all tracked dates in order"""
+    return [row[0] for row in _conn().execute('SELECT date FROM daytracker_days ORDER BY date')]
+
+
+def get_day_entries_between(start_date: str, end_date: str) -> List[tuple]:
+    """Get (date, entry) pairs for tracked days in [start_date, end_date]"""
+    return [(row[0], json.loads(row[1])) for row in _conn().execute(
+        'SELECT date, data FROM daytracker_entries WHERE date BETWEEN ? AND ? '
+        'ORDER BY date, position', (start_date, end_date))]
@@ -0,0 +1,180 @@
+"""
+Static Assets for Udo
+The built frontend (frontend/dist) is read into memory once: a manifest
+keeps every file's bytes, type, ETag and compressed variants, so serving
+an asset never stats or opens a file. Precompressed .br/.gz files written
+next to the build are used when present (gzip is otherwise made at load),
+and Vite's content-hashed assets are sent as immutable.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional, Any
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vite names bundled files assets/<name>-<content hash>.<ext>
+HASHED_ASSET_RE = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Smaller files are not worth a compressed variant
+PRECOMPRESS_MIN_BYTES = 256
+
+COMPRESSIBLE_TYPES = ('application/javascript', 'application/json', 'image/svg+xml',
+                      'application/manifest+json')
+
+# (Content-Encoding, file suffix), in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Before the frontend is built, look for it again at most this often
+RESCAN_SECONDS = 2
+
+_lock = threading.Lock()
+_dist_dir = None
+_manifest = {}  # relative path -> asset
+_loaded_at = 0.0
+
+
+def _compressible(path: str, mimetype: str) -> bool:
+    return (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES) and not path.endswith(('.br', '.gz'))
+
+
+def _read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _load_asset(dist_dir: str, rel_path: str, present: set) -> Dict[str, Any]:
+    """Read one file and its variants (the only filesystem access for an asset)"""
+    full_path = os.path.join(dist_dir, rel_path)
+    body = _read(full_path)
+    mtime = os.path.getmtime(full_path)
+    mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+
+    variants = {}
+    if _compressible(rel_path, mimetype) and len(body) >= PRECOMPRESS_MIN_BYTES:
+        for encoding, suffix in ENCODINGS:
+            variant = rel_path + suffix
+            # A variant older than its source is left over from a previous build
+            if variant in present and os.path.getmtime(full_path + suffix) >= mtime:
+                variants[encoding] = _read(full_path + suffix)
+        if 'gzip' not in variants:
+            variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+
+    return {
+        "body": body,
+        "mimetype": mimetype,
+        "etag": hashlib.blake2b(body, digest_size=8).hexdigest(),
+        "last_modified": int(mtime),
+        "immutable": bool(HASHED_ASSET_RE.match(rel_path)),
+        "variants": variants
+    }
+
+
+def load_manifest(dist_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Read every file of a build into an in-memory manifest keyed by URL path"""
+    paths = []
+    for root, _, files in os.walk(dist_dir):
+        for name in files:
+            paths.append(os.path.relpath(os.path.join(root, name), dist_dir).replace(os.sep, '/'))
+    present = set(paths)
+
+    manifest = {}
+    for rel_path in paths:
+        # foo.js.gz is a variant of foo.js, not an asset of its own
+        if rel_path.endswith(('.br', '.gz')) and rel_path[:-3] in present:
+            continue
+        manifest[rel_path] = _load_asset(dist_dir, rel_path, present)
+    return manifest
+
+
+def configure(dist_dir: str):
+    """Load the build at dist_dir; call again after rebuilding the frontend"""
+    global _dist_dir, _manifest, _loaded_at
+    manifest = load_manifest(dist_dir) if os.path.isdir(dist_dir) else {}
+    with _lock:
+        _dist_dir = dist_dir
+        _manifest = manifest
+        _loaded_at = time.monotonic()
+
+
+def get_asset(path: str) -> Optional[Dict[str, Any]]:
+    """The manifest entry for a URL path, or None"""
+    if "index.html" not in _manifest and _dist_dir and time.monotonic() - _loaded_at > RESCAN_SECONDS:
+        # Not built when the server started; pick up a build made since
+        configure(_dist_dir)
+    return _manifest.get(path)
+
+
+def _encoding(asset: Dict[str, Any]) -> Optional[str]:
+    accepted = request.accept_encodings
+    for encoding, _ in ENCODINGS:
+        if encoding in asset["variants"] and accepted[encoding]:
+            return encoding
+    return None
+
+
+def serve(path: str) -> Optional[Response]:
+    """Response for a built file (None if the build has no such file)
+
+    Hashed assets are cacheable forever; everything else (index.html) is
+    revalidated on each load through its ETag.
+    """
+    asset = get_asset(path)
+    if asset is None:
+        return None
+
+    encoding = _encoding(asset)
+    # Each encoding is its own representation with its own strong ETag
+    etag = f'{asset["etag"]}-{encoding}' if encoding else asset["etag"]
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(asset["variants"][encoding] if encoding else asset["body"],
+                            mimetype=asset["mimetype"])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.last_modified = asset["last_modified"]
+    if asset["variants"]:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    if asset["immutable"]:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def precompress(dist_dir: str) -> int:
+    """Write .gz (and, with the brotli package, .br) files next to a build's compressible files
+
+    Run after building the frontend so the server loads ready-made variants
+    at maximum compression instead of gzipping at startup. Returns the
+    number of files written.
+    """
+    written = 0
+    for root, _, files in os.walk(dist_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            mimetype = mimetypes.guess_type(name)[0] or ''
+            if not _compressible(name, mimetype) or os.path.getsize(path) < PRECOMPRESS_MIN_BYTES:
+                continue
+            body = _read(path)
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(body, compresslevel=9, mtime=0))
+            written += 1
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(body, quality=11))
+                written += 1
+    return written
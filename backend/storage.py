@@ -0,0 +1,371 @@
+"""
+Storage layer for Udo
+Crash-safe JSON writes shared by every data store
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator
+
+from backend import metrics
+from backend.locks import read_lock, write_lock
+
+USERDATA_DIR = os.path.join(os.path.dirname(__file__), 'userdata')
+JOURNAL_FILE = os.path.join(USERDATA_DIR, 'journal.log')
+
+# With the journal enabled, each write is appended to JOURNAL_FILE and only
+# the journal is fsynced (one fsync per batch of concurrent writers). Data
+# files are still replaced atomically but without their own fsync; they are
+# flushed and the journal truncated once it grows past the checkpoint size.
+# Several server processes may share the journal: writes hold a shared lock
+# on it and checkpoints and recovery an exclusive one.
+JOURNAL_ENABLED = os.environ.get('UDO_JOURNAL', '').lower() in ('1', 'true', 'yes')
+JOURNAL_CHECKPOINT_BYTES = int(os.environ.get('UDO_JOURNAL_CHECKPOINT_BYTES', 4 * 1024 * 1024))
+
+
+class PageVersionConflict(Exception):
+    """Raised when a page changed since the version the client last saw"""
+
+    def __init__(self, etag: str):
+        super().__init__(f"Page was modified (current version {etag})")
+        self.etag = etag
+
+
+def _fsync_dir(directory: str):
+    """Flush a directory entry update (no-op where unsupported)"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _atomic_write(path: str, fill, mode: str, fsync: bool):
+    """Write a temp file with fill(file) and atomically replace path with it"""
+    directory = os.path.dirname(path) or '.'
+    try:
+        st_mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        st_mode = 0o644
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory
+    )
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            fill(f)
+            f.flush()
+            metrics.record_write(path, os.fstat(f.fileno()).st_size)
+            if fsync:
+                os.fsync(f.fileno())
+        os.chmod(tmp_path, st_mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync:
+        _fsync_dir(directory)
+
+
+def atomic_write_text(path: str, text: str, fsync: bool = True):
+    """Write text to a temp file and atomically replace path with it"""
+    _atomic_write(path, lambda f: f.write(text), 'w', fsync)
+
+
+def atomic_write_chunks(path: str, chunks: Iterable[bytes], fsync: bool = True):
+    """Write byte chunks to a temp file and atomically replace path with it"""
+    _atomic_write(path, lambda f: f.writelines(chunks), 'wb', fsync)
+
+
+class Journal:
+    """Append-only write-ahead journal with group commit"""
+
+    def __init__(self, path: str, checkpoint_bytes: int):
+        self.path = path
+        self.checkpoint_bytes = checkpoint_bytes
+        self._cond = threading.Condition()
+        self._file = None
+        self._size = 0
+        self._pending = []
+        self._next_seq = 0
+        self._durable_seq = 0
+        self._failures = {}  # (first_seq, last_seq) of a failed batch -> [error, writers yet to see it]
+        self._flushing = False
+        self._checkpointing = False
+
+    def _append(self, lines):
+        """Append a batch of records and fsync once"""
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+        payload = ''.join(lines).encode('utf-8')
+        self._file.write(payload)
+        metrics.record_write(self.path, len(payload))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        # Other processes append to (and truncate) the same file
+        self._size = os.fstat(self._file.fileno()).st_size
+
+    def _commit(self, line: str):
+        """Queue a record and wait until it is durable (caller holds _cond)"""
+        self._next_seq += 1
+        seq = self._next_seq
+        self._pending.append(line)
+
+        while self._durable_seq < seq:
+            if self._flushing:
+                self._cond.wait()
+                continue
+
+            # Become the leader: flush everything queued so far in one fsync
+            batch, self._pending = self._pending, []
+            first_seq, last_seq = self._durable_seq + 1, self._next_seq
+            self._flushing = True
+            self._cond.release()
+            try:
+                self._append(batch)
+            except Exception as e:
+                self._failures[(first_seq, last_seq)] = [e, last_seq - first_seq + 1]
+                # Start the next batch on a freshly opened file
+                self._close_after_failure()
+            finally:
+                self._cond.acquire()
+                self._flushing = False
+                self._durable_seq = last_seq
+                self._cond.notify_all()
+
+        self._raise_if_failed(seq)
+
+    def _close_after_failure(self):
+        try:
+            if self._file is not None:
+                self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def _raise_if_failed(self, seq: int):
+        """Raise the error of seq's batch if it failed (caller holds _cond)
+
+        Each writer of a failed batch takes its share of the failure here,
+        so the entry is kept until all of them saw it, however many batches
+        failed or succeeded in between.
+        """
+        for seqs, failure in self._failures.items():
+            if seqs[0] <= seq <= seqs[1]:
+                failure[1] -= 1
+                if not failure[1]:
+                    del self._failures[seqs]
+                raise OSError(f"Journal write failed: {failure[0]}")
+
+    def write(self, path: str, text: str):
+        """Durably record a write, then replace the target file"""
+        self.write_many({path: text})
+
+    def write_many(self, texts: Dict[str, str], flush: bool = False):
+        """Durably record writes to several files as one record, then replace them
+
+        A crash part way through replacing the files is repaired by recover(),
+        so either every file or none ends up changed. With flush the files
+        are fsynced and the journal emptied before returning.
+        """
+        files = [{"path": os.path.abspath(path), "text": text} for path, text in texts.items()]
+        record = files[0] if len(files) == 1 else {"files": files}
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+
+        # The shared journal lock keeps checkpoints (in any process) out
+        # between journaling a write and replacing the files
+        with read_lock(self.path):
+            with self._cond:
+                self._commit(line)
+            for file in files:
+                atomic_write_text(file["path"], file["text"], fsync=False)
+            needs_checkpoint = self._size >= self.checkpoint_bytes
+
+        if flush:
+            with write_lock(self.path):
+                self._flush_and_truncate()
+        elif needs_checkpoint:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Flush every journaled file and empty the journal"""
+        with self._cond:
+            if self._checkpointing:
+                return
+            self._checkpointing = True
+
+        try:
+            with write_lock(self.path):
+                self._flush_and_truncate()
+        finally:
+            with self._cond:
+                self._checkpointing = False
+
+    def _records(self) -> Iterator[Dict[str, str]]:
+        """Every journaled file write ({"path", "text"}), from any process, oldest first"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn final record from a crash mid-append
+                yield from record.get("files", [record])
+
+    def _paths(self) -> set:
+        """Files with a record in the journal"""
+        return {record["path"] for record in self._records()}
+
+    def _flush_and_truncate(self):
+        """fsync the journaled files and empty the journal (caller holds the journal lock)"""
+        if not os.path.exists(self.path):
+            return
+        dirty = self._paths()
+        for path in dirty:
+            try:
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                pass
+        for directory in {os.path.dirname(path) for path in dirty}:
+            _fsync_dir(directory)
+        with open(self.path, 'r+b') as f:
+            f.truncate(0)
+            os.fsync(f.fileno())
+        self._size = 0
+
+    def recover(self) -> int:
+        """Re-apply the latest journaled version of each file, then empty the journal
+
+        Records of writes that already completed are re-applied unchanged, so
+        this is safe to run while other processes are serving.
+        """
+        with write_lock(self.path):
+            if not os.path.exists(self.path):
+                return 0
+
+            latest = {record["path"]: record["text"] for record in self._records()}
+
+            for path, text in latest.items():
+                if os.path.isdir(os.path.dirname(path)):
+                    atomic_write_text(path, text)
+
+            with open(self.path, 'wb') as f:
+                os.fsync(f.fileno())
+            return len(latest)
+
+
+_journal = Journal(JOURNAL_FILE, JOURNAL_CHECKPOINT_BYTES) if JOURNAL_ENABLED else None
+
+# Journal for multi-file writes when the journal is otherwise disabled
+_transient_journal = None
+_transient_journal_lock = threading.Lock()
+
+
+def read_json(path: str) -> Any:
+    """Read and parse a JSON file, counting its bytes and parse time"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    started = time.perf_counter()
+    data = json.loads(raw)
+    metrics.record_read(path, len(raw))
+    metrics.record_json(metrics.store_label(path), 'parse', time.perf_counter() - started, len(raw))
+    return data
+
+
+def _dumps(path: str, data: Any, indent: int, ensure_ascii: bool) -> str:
+    started = time.perf_counter()
+    # Without indentation, drop the spaces after separators too
+    separators = (',', ':') if indent is None else None
+    text = json.dumps(data, indent=indent, ensure_ascii=ensure_ascii, separators=separators)
+    metrics.record_json(metrics.store_label(path), 'serialize', time.perf_counter() - started, len(text))
+    return text
+
+
+def write_json(path: str, data: Any, indent: int = 2, ensure_ascii: bool = False):
+    """Serialize data and write it to path without leaving a partial file behind"""
+    text = _dumps(path, data, indent, ensure_ascii)
+    if _journal:
+        _journal.write(path, text)
+    else:
+        atomic_write_text(path, text)
+
+
+def write_json_files(files: Dict[str, Any], indent: int = 2, ensure_ascii: bool = False):
+    """Serialize and write several files so that either all or none of them change
+
+    The writes go through the journal as one record; with the journal
+    disabled a journal is used just for this write and emptied right after.
+    """
+    texts = {path: _dumps(path, data, indent, ensure_ascii) for path, data in files.items()}
+    if _journal:
+        _journal.write_many(texts)
+    elif len(texts) == 1:
+        atomic_write_text(*next(iter(texts.items())))
+    else:
+        _batch_journal().write_many(texts, flush=True)
+
+
+def _batch_journal() -> Journal:
+    global _transient_journal
+    with _transient_journal_lock:
+        if _transient_journal is None:
+            _transient_journal = Journal(JOURNAL_FILE, JOURNAL_CHECKPOINT_BYTES)
+        return _transient_journal
+
+
+def write_chunks(path: str, chunks: Iterable[bytes]):
+    """Write a file streamed as UTF-8 byte chunks without leaving a partial file behind
+
+    With the journal enabled the chunks are joined, since the journal
+    records whole files.
+    """
+    if _journal:
+        _journal.write(path, b''.join(chunks).decode('utf-8'))
+    else:
+        atomic_write_chunks(path, chunks)
+
+
+def place_file(tmp_path: str, path: str):
+    """Move a file written elsewhere (on the same filesystem) into place atomically
+
+    For files too large to pass through write_chunks in one piece. The file
+    is fsynced first, and with the journal enabled the journal is
+    checkpointed so no older record of path can be replayed over it.
+    """
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+        metrics.record_write(path, os.fstat(f.fileno()).st_size)
+    checkpoint_journal()
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path) or '.')
+
+
+def recover_journal() -> int:
+    """Replay writes left in the journal by a crash (call once at startup)"""
+    journal = _journal or Journal(JOURNAL_FILE, JOURNAL_CHECKPOINT_BYTES)
+    try:
+        return journal.recover()
+    except Exception as e:
+        print(f"Error recovering journal: {e}")
+        return 0
+
+
+def checkpoint_journal():
+    """Flush journaled writes to their files and empty the journal"""
+    if _journal:
+        _journal.checkpoint()
@@ -0,0 +1,258 @@
+"""
+Task Index for Udo
+In-memory secondary indexes (status, tag, end date) over the tasks of all
+pages, used for filtered, sorted and paginated task listings. Tasks are held
+as compact Task objects (see task_model) and turned back into dicts only for
+the tasks a response returns. A page is re-indexed only when its version or
+file stamp in the page manifest changes.
+
+These are the only Task objects kept in memory: the search and calendar
+indexes hold keys and look their hits up here (tasks_at, tasks_by_id).
+"""
+
+import base64
+import bisect
+import json
+import threading
+from typing import Dict, List, Any, Optional
+
+from backend.file_manager import get_page, get_page_summary_map, page_stamp
+from backend.dates import date_ordinal
+from backend.task_model import Task, find_symbol, symbol_id, symbol_name
+
+SORT_FIELDS = {
+    'page': lambda t: (_page_names[t.page_id] or '').lower(),
+    'start': lambda t: t.start,
+    'end': lambda t: t.end,
+    'title': lambda t: (t.title or '').lower(),
+    'status': lambda t: symbol_name(t.status) if t.status is not None else '',
+}
+SORT_FIELDS['timestamp'] = SORT_FIELDS['start']
+
+# Sorts whose cursor value is a date ordinal rather than a string
+ORDINAL_SORTS = ('start', 'end', 'timestamp')
+
+TODO = symbol_id('todo')
+
+_lock = threading.Lock()
+_stamps = {}      # page_id -> (version, mtime_ns, size) the page was indexed at
+_page_names = {}  # page_id -> page name
+_page_keys = {}   # page_id -> [(page_id, position), ...]
+_page_ids = {}    # page_id -> {task id: key}
+_entries = {}     # (page_id, position) -> Task
+_by_status = {}   # status id -> {key}
+_by_tag = {}      # tag id -> {key}
+_by_end = []      # end ordinals in ascending order, rebuilt lazily
+_by_end_keys = []  # the key of each _by_end entry
+_by_end_dirty = False
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class InvalidQuery(ValueError):
+    """Raised when a filter value cannot be used (e.g. a date that does not parse)"""
+
+
+def _unindex_page(page_id: str):
+    global _by_end_dirty
+    _page_ids.pop(page_id, None)
+    for key in _page_keys.pop(page_id, []):
+        task = _entries.pop(key)
+        _by_status.get(TODO if task.status is None else task.status, set()).discard(key)
+        for tag in task.tags or ():
+            _by_tag.get(tag, set()).discard(key)
+    _stamps.pop(page_id, None)
+    _page_names.pop(page_id, None)
+    _by_end_dirty = True
+
+
+def _index_page(page_id: str, page: Dict[str, Any], stamp: tuple):
+    global _by_end_dirty
+    keys = []
+    ids = {}
+    for position, task in enumerate(page.get('tasks', [])):
+        key = (page_id, position)
+        task = _entries[key] = Task(page_id, position, task)
+        _by_status.setdefault(TODO if task.status is None else task.status, set()).add(key)
+        for tag in task.tags or ():
+            _by_tag.setdefault(tag, set()).add(key)
+        keys.append(key)
+        if task.id is not None:
+            ids[task.id] = key  # a repeated id resolves to the last task
+    _page_names[page_id] = page.get('name', 'Unknown')
+    _page_keys[page_id] = keys
+    _page_ids[page_id] = ids
+    _stamps[page_id] = stamp
+    _by_end_dirty = True
+
+
+def refresh() -> Dict[str, Dict[str, Any]]:
+    """Re-index pages that changed since they were last indexed (caller holds _lock)
+
+    Returns the page summaries, in page order.
+    """
+    global _by_end, _by_end_keys, _by_end_dirty
+    summaries = get_page_summary_map()
+
+    for page_id in list(_stamps):
+        if page_id not in summaries:
+            _unindex_page(page_id)
+
+    for page_id, summary in summaries.items():
+        stamp = page_stamp(summary)
+        if _stamps.get(page_id) == stamp:
+            continue
+        _unindex_page(page_id)
+        page = get_page(page_id)
+        if page:
+            _index_page(page_id, page, stamp)
+
+    if _by_end_dirty:
+        keys = sorted(_entries, key=lambda key: _entries[key].end)
+        _by_end = [_entries[key].end for key in keys]
+        _by_end_keys = keys
+        _by_end_dirty = False
+    return summaries
+
+
+def _encode_cursor(sort: str, sort_key: tuple) -> str:
+    """Encode the sort position of the last returned task"""
+    payload = json.dumps([sort, *sort_key], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    """Decode a cursor produced by _encode_cursor for the same sort key"""
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        cursor_sort, sort_value, page_id, position = value
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if sort in ORDINAL_SORTS and isinstance(sort_value, str):
+        # Cursors issued before dates were indexed as ordinals
+        sort_value = date_ordinal(sort_value)
+    value_type = int if sort in ORDINAL_SORTS else str
+    if (cursor_sort != sort or type(sort_value) is not value_type
+            or not isinstance(page_id, str) or not isinstance(position, int)):
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return (sort_value, page_id, position)
+
+
+def _date_filter(name: str, value: Optional[str]) -> int:
+    """Ordinal of a from/to filter date (0 when not given)"""
+    if not value:
+        return 0
+    ordinal = date_ordinal(value)
+    if not ordinal or len(value) != 10:
+        raise InvalidQuery(f"{name} must be a date (YYYY-MM-DD)")
+    return ordinal
+
+
+def _symbol_keys(index: Dict[int, set], names: List[str]) -> set:
+    """Keys indexed under any of the given status or tag names"""
+    keys = set()
+    for name in names:
+        symbol = find_symbol(name)
+        if symbol is not None:
+            keys |= index.get(symbol, set())
+    return keys
+
+
+def tasks_at(keys: List[tuple]) -> List[tuple]:
+    """(Task, page name) for each (page_id, position) key, None for keys no longer indexed"""
+    with _lock:
+        refresh()
+        return [(_entries[key], _page_names[key[0]]) if key in _entries else None for key in keys]
+
+
+def tasks_by_id(keys: List[tuple]) -> List[tuple]:
+    """(Task, page name) for each (page_id, task id) key, None for tasks no longer indexed"""
+    with _lock:
+        refresh()
+        found = []
+        for page_id, task_id in keys:
+            key = _page_ids.get(page_id, {}).get(task_id)
+            found.append((_entries[key], _page_names[page_id]) if key else None)
+        return found
+
+
+def all_tasks() -> List[Dict[str, Any]]:
+    """Every task of every page, in page order, tagged with its page id and name"""
+    with _lock:
+        summaries = refresh()
+        return [_entries[key].to_dict(_page_names[page_id])
+                for page_id in summaries for key in _page_keys.get(page_id, [])]
+
+
+def query_tasks(statuses: List[str] = None, tags: List[str] = None, page_ids: List[str] = None,
+                date_from: str = None, date_to: str = None, text: str = None,
+                sort: str = 'page', descending: bool = False, limit: int = 100,
+                cursor: str = None) -> Dict[str, Any]:
+    """Filter, sort and paginate tasks across all pages
+
+    Tasks match when they have any of the given statuses, any of the given
+    tags, belong to any of the given pages, overlap [date_from, date_to] and
+    contain text in their title, description or page name.
+    """
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    after = _decode_cursor(cursor, sort) if cursor else None
+    sort_field = SORT_FIELDS[sort]
+    from_ordinal = _date_filter('from', date_from)
+    to_ordinal = _date_filter('to', date_to)
+
+    with _lock:
+        refresh()
+
+        candidates = []
+        if statuses:
+            candidates.append(_symbol_keys(_by_status, statuses))
+        if tags:
+            candidates.append(_symbol_keys(_by_tag, tags))
+        if page_ids:
+            candidates.append({key for p in page_ids for key in _page_keys.get(p, [])})
+        if from_ordinal:
+            start = bisect.bisect_left(_by_end, from_ordinal)
+            candidates.append(set(_by_end_keys[start:]))
+
+        if candidates:
+            candidates.sort(key=len)
+            keys = candidates[0].intersection(*candidates[1:])
+        else:
+            keys = _entries.keys()
+
+        matches = []
+        needle = text.lower() if text else None
+        for key in keys:
+            task = _entries[key]
+            if to_ordinal and not (task.start and task.start <= to_ordinal):
+                continue
+            if needle and not (needle in (task.title or '').lower()
+                               or needle in (task.description or '').lower()
+                               or needle in (_page_names[task.page_id] or '').lower()):
+                continue
+            matches.append(((sort_field(task), task.page_id, task.position), task))
+
+        matches.sort(key=lambda m: m[0])
+        sort_keys = [m[0] for m in matches]
+
+        if descending:
+            end = bisect.bisect_left(sort_keys, after) if after else len(matches)
+            start = max(0, end - limit)
+            selected = matches[start:end][::-1]
+            has_more = start > 0
+        else:
+            start = bisect.bisect_right(sort_keys, after) if after else 0
+            selected = matches[start:start + limit]
+            has_more = start + limit < len(matches)
+
+        # Only the returned page of results is serialized
+        tasks = [task.to_dict(_page_names[task.page_id]) for _, task in selected]
+
+    return {
+        "tasks": tasks,
+        "total": len(matches),
+        "next_cursor": _encode_cursor(sort, selected[-1][0]) if has_more and selected else None
+    }
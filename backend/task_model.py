@@ -0,0 +1,128 @@
+"""
+Task Model for Udo
+Compact in-memory representation of tasks for the cross-page indexes. A
+Task is a __slots__ object instead of a dict; statuses and tags are
+interned to small integer ids (and tag lists to shared tuples of ids), and
+the start/end dates are parsed once into ordinal ints. Tasks are turned
+back into the JSON shape stored on disk only when a response is built.
+"""
+
+import sys
+import threading
+from typing import Dict, List, Any
+
+from backend.dates import DATE_RANGE_FIELD, task_ordinals
+
+# Fields kept in slots, in the order they are written back out; anything
+# else (priority, meta, ...) or a field of an unexpected type goes to extra
+_STRING_FIELDS = ('id', 'title', 'description')
+_SLOT_FIELDS = frozenset(_STRING_FIELDS + ('tags', 'timestamp', 'status'))
+
+# Derived from the timestamp, so rebuilt from start/end instead of stored
+_DERIVED_FIELDS = frozenset((DATE_RANGE_FIELD,))
+
+_symbols_lock = threading.Lock()
+_symbols = []       # id -> status or tag name
+_symbol_ids = {}    # name -> id
+_tag_sets = {}      # tuple of tag ids -> the shared tuple
+
+
+def symbol_id(name: str) -> int:
+    """The interned id of a status or tag name"""
+    symbol = _symbol_ids.get(name)
+    if symbol is None:
+        with _symbols_lock:
+            symbol = _symbol_ids.get(name)
+            if symbol is None:
+                symbol = len(_symbols)
+                _symbols.append(name)
+                _symbol_ids[name] = symbol
+    return symbol
+
+
+def find_symbol(name: str):
+    """The id of a status or tag name, or None if no task uses it (never interns)"""
+    return _symbol_ids.get(name)
+
+
+def symbol_name(symbol: int) -> str:
+    return _symbols[symbol]
+
+
+def _tag_set(tags: List[str]) -> tuple:
+    ids = tuple(symbol_id(tag) for tag in tags)
+    return _tag_sets.setdefault(ids, ids)
+
+
+class Task:
+    """One task of a page as held by the indexes"""
+
+    __slots__ = ('page_id', 'position', 'id', 'title', 'description', 'tags',
+                 'timestamp', 'status', 'start', 'end', 'extra')
+
+    def __init__(self, page_id: str, position: int, task: Dict[str, Any]):
+        self.page_id = sys.intern(page_id)
+        self.position = position
+        extra = None
+        for field in _STRING_FIELDS:
+            value = task.get(field)
+            setattr(self, field, value if isinstance(value, str) else None)
+
+        tags = task.get('tags')
+        if isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
+            self.tags = _tag_set(tags)
+        else:
+            self.tags = None
+
+        timestamp = task.get('timestamp')
+        if isinstance(timestamp, str):
+            # Many tasks share a date; keep one copy of each string (the
+            # memoized parse also hands out shared ordinal ints)
+            self.timestamp = sys.intern(timestamp)
+        else:
+            self.timestamp = None
+        self.start, self.end = task_ordinals(task)
+
+        status = task.get('status')
+        self.status = symbol_id(status) if isinstance(status, str) else None
+
+        for key, value in task.items():
+            # Keys without a slot, and slot fields whose value did not fit
+            if key in _DERIVED_FIELDS:
+                continue
+            if key not in _SLOT_FIELDS or getattr(self, key) is None:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self.extra = extra
+
+    @property
+    def status_name(self) -> str:
+        """The task's status, "todo" if it has none"""
+        return _symbols[self.status] if self.status is not None else 'todo'
+
+    @property
+    def tag_names(self) -> List[str]:
+        return [_symbols[tag] for tag in self.tags] if self.tags else []
+
+    def to_dict(self, page_name: str = None) -> Dict[str, Any]:
+        """The task in its stored JSON shape, tagged with its page when page_name is given"""
+        task = {}
+        for field in _STRING_FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                task[field] = value
+        if self.tags is not None:
+            task['tags'] = [_symbols[tag] for tag in self.tags]
+        if self.timestamp is not None:
+            task['timestamp'] = self.timestamp
+        if self.status is not None:
+            task['status'] = _symbols[self.status]
+        if self.start:
+            task[DATE_RANGE_FIELD] = [self.start, self.end]
+        if self.extra:
+            task.update(self.extra)
+        if page_name is not None:
+            task['page_id'] = self.page_id
+            task['page_name'] = page_name
+        return task
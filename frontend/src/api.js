@@ -1,5 +1,8 @@
 export const API_BASE = '/api';
 
+// How often a view reloads while the change stream is unavailable
+const EVENT_POLL_MS = 10000;
+
 export const api = {
   // Pages
   getPages: async () => {
@@ -7,6 +10,11 @@ export const api = {
     return res.json();
   },
   
+  getDashboard: async () => {
+    const res = await fetch(`${API_BASE}/dashboard`);
+    return res.json();
+  },
+  
   getPage: async (pageId) => {
     const res = await fetch(`${API_BASE}/page/${pageId}`);
     return res.json();
@@ -43,6 +51,20 @@ export const api = {
     return res.json();
   },
   
+  // Server-side filtered/paginated listing, e.g. { status, tag, page, from, to, q, sort, order, limit, cursor }
+  queryTasks: async (params = {}) => {
+    const query = new URLSearchParams(
+      Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+    );
+    const res = await fetch(`${API_BASE}/tasks?${query}`);
+    return res.json();
+  },
+  
+  searchTasks: async (q, limit = 20) => {
+    const res = await fetch(`${API_BASE}/search?${new URLSearchParams({ q, limit })}`);
+    return res.json();
+  },
+  
   createTask: async (pageId, taskData) => {
     const res = await fetch(`${API_BASE}/task/create`, {
       method: 'POST',
@@ -69,7 +91,17 @@ export const api = {
     });
     return res.json();
   },
-  
+
+  // operations: [{ op: 'create' | 'update' | 'delete', page_id, task?, task_id?, updates? }]
+  batchTasks: async (operations, ifMatch) => {
+    const res = await fetch(`${API_BASE}/tasks/batch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ operations, if_match: ifMatch }),
+    });
+    return res.json();
+  },
+
   // Settings
   getSettings: async () => {
     const res = await fetch(`${API_BASE}/settings`);
@@ -109,4 +141,30 @@ export const api = {
     });
     return res.json();
   },
+
+  // Change feed: onEvent gets each change event, onResync is called when
+  // events were missed and the view should be reloaded. While the server
+  // has no stream to spare ("busy") onResync is polled instead, until the
+  // stream reconnects. Returns an unsubscribe function.
+  subscribeEvents: (onEvent, onResync) => {
+    const source = new EventSource(`${API_BASE}/events`);
+    let poll = null;
+    const stopPolling = () => {
+      clearInterval(poll);
+      poll = null;
+    };
+    source.onmessage = (e) => onEvent(JSON.parse(e.data));
+    source.addEventListener('ready', stopPolling);
+    source.addEventListener('resync', () => {
+      stopPolling();
+      if (onResync) onResync();
+    });
+    source.addEventListener('busy', () => {
+      if (!poll && onResync) poll = setInterval(onResync, EVENT_POLL_MS);
+    });
+    return () => {
+      stopPolling();
+      source.close();
+    };
+  },
 };
@@ -3,26 +3,34 @@ import { Topbar } from '../components/Topbar';
 import { api } from '../api';
 import { Search } from 'lucide-react';
 
+const PAGE_SIZE = 100;
+
 export function AllTasks({ theme, onThemeToggle }) {
-  const [tasks, setTasks] = useState([]);
   const [filteredTasks, setFilteredTasks] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [searchQuery, setSearchQuery] = useState('');
   const [statusFilter, setStatusFilter] = useState('all');
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    loadTasks();
-  }, []);
-
-  useEffect(() => {
-    filterTasks();
-  }, [searchQuery, statusFilter, tasks]);
+    // Debounce typing so each keystroke doesn't hit the server
+    const timeout = setTimeout(() => loadTasks(), searchQuery ? 200 : 0);
+    return () => clearTimeout(timeout);
+  }, [searchQuery, statusFilter]);
 
-  const loadTasks = async () => {
+  const loadTasks = async (cursor = null) => {
     try {
-      const result = await api.getAllTasks();
+      const result = await api.queryTasks({
+        status: statusFilter !== 'all' ? statusFilter : undefined,
+        q: searchQuery.trim(),
+        limit: PAGE_SIZE,
+        cursor,
+      });
       if (result.success) {
-        setTasks(result.tasks);
+        setFilteredTasks(prev => (cursor ? [...prev, ...result.tasks] : result.tasks));
+        setTotal(result.total);
+        setNextCursor(result.next_cursor);
       }
     } catch (error) {
       console.error('Failed to load tasks:', error);
@@ -31,27 +39,6 @@ export function AllTasks({ theme, onThemeToggle }) {
     }
   };
 
-  const filterTasks = () => {
-    let filtered = [...tasks];
-
-    // Filter by status
-    if (statusFilter !== 'all') {
-      filtered = filtered.filter(task => task.status === statusFilter);
-    }
-
-    // Filter by search query
-    if (searchQuery.trim()) {
-      const query = searchQuery.toLowerCase();
-      filtered = filtered.filter(task =>
-        task.title.toLowerCase().includes(query) ||
-        task.description?.toLowerCase().includes(query) ||
-        task.page_name.toLowerCase().includes(query)
-      );
-    }
-
-    setFilteredTasks(filtered);
-  };
-
   if (loading) {
     return (
       <div className="flex-1 flex flex-col">
@@ -97,7 +84,7 @@ export function AllTasks({ theme, onThemeToggle }) {
 
           {/* Tasks Count */}
           <div className="text-sm text-muted-foreground">
-            Showing {filteredTasks.length} of {tasks.length} tasks
+            Showing {filteredTasks.length} of {total} tasks
           </div>
 
           {/* Tasks List */}
@@ -108,7 +95,7 @@ export function AllTasks({ theme, onThemeToggle }) {
           ) : (
             <div className="space-y-3">
               {filteredTasks.map(task => (
-                <div key={task.id} className="card p-5 hover:shadow-md transition-shadow">
+                <div key={`${task.page_id}:${task.id}`} className="card p-5 hover:shadow-md transition-shadow">
                   <div className="flex items-start justify-between mb-2">
                     <div className="flex-1">
                       <h4 className="font-semibold mb-1">{task.title}</h4>
@@ -141,6 +128,11 @@ export function AllTasks({ theme, onThemeToggle }) {
                   )}
                 </div>
               ))}
+              {nextCursor && (
+                <button onClick={() => loadTasks(nextCursor)} className="btn-secondary w-full">
+                  Load more
+                </button>
+              )}
             </div>
           )}
         </div>
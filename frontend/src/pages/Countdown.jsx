@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Edit2, Trash2, X, Calendar, Clock, ChevronDown, ChevronUp } from 'lucide-react';
 import { Topbar } from '../components/Topbar';
+import { api } from '../api';
 
 const Countdown = ({ theme, onThemeToggle }) => {
   const [events, setEvents] = useState([]);
@@ -24,6 +25,13 @@ const Countdown = ({ theme, onThemeToggle }) => {
     return () => clearInterval(interval);
   }, []);
 
+  // Reload when events are saved elsewhere (the interval above only ticks the clock)
+  useEffect(() => {
+    return api.subscribeEvents((event) => {
+      if (event.type === 'countdown') fetchEvents();
+    }, fetchEvents);
+  }, []);
+
   useEffect(() => {
     // Update prevTimes for animation
     const newPrevTimes = {};
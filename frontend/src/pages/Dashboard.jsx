@@ -5,7 +5,8 @@ import { Kanban, Clock, Timer, Calendar, BookOpen, AlertTriangle } from 'lucide-
 
 export function Dashboard({ theme, onThemeToggle }) {
   const [pages, setPages] = useState([]);
-  const [tasks, setTasks] = useState([]);
+  const [statusCounts, setStatusCounts] = useState({ todo: 0, inProgress: 0, completed: 0, overdue: 0 });
+  const [recentTasks, setRecentTasks] = useState([]);
   const [dayTrackerStats, setDayTrackerStats] = useState(null);
   const [countdownStats, setCountdownStats] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -16,22 +17,19 @@ export function Dashboard({ theme, onThemeToggle }) {
 
   const loadData = async () => {
     try {
-      // Calculate date range for day tracker
-      const endDate = new Date().toISOString().split('T')[0];
-      const startDate = new Date(Date.now() - 30 * 24 * 60 * 60 * 1000).toISOString().split('T')[0];
-
-      const [pagesData, tasksData, dayTrackerData, countdownData] = await Promise.all([
-        api.getPages(),
-        api.getTasks(),
-        // Get date range for last 30 days
-        fetch(`/api/daytracker/stats/range?start=${startDate}&end=${endDate}`).then(r => r.json()).catch(() => null),
-        fetch('/api/countdown/stats').then(r => r.json()).catch(() => null)
-      ]);
-
-      setPages(pagesData);
-      setTasks(tasksData);
-      setDayTrackerStats(dayTrackerData);
-      setCountdownStats(countdownData);
+      const data = await api.getDashboard();
+      const counts = data.status_counts || {};
+
+      setPages(data.pages || []);
+      setStatusCounts({
+        todo: counts.todo || 0,
+        inProgress: counts['in-progress'] || 0,
+        completed: counts.completed || 0,
+        overdue: counts.overdue || 0
+      });
+      setRecentTasks(data.recent_tasks || []);
+      setDayTrackerStats(data.daytracker || null);
+      setCountdownStats(data.countdown || null);
     } catch (error) {
       console.error('Failed to load dashboard data:', error);
     } finally {
@@ -39,20 +37,6 @@ export function Dashboard({ theme, onThemeToggle }) {
     }
   };
 
-  const getStatusCounts = () => {
-    const counts = { todo: 0, inProgress: 0, completed: 0, overdue: 0 };
-    tasks.forEach(task => {
-      if (task.status === 'todo') counts.todo++;
-      else if (task.status === 'in-progress') counts.inProgress++;
-      else if (task.status === 'completed') counts.completed++;
-      else if (task.status === 'overdue') counts.overdue++;
-    });
-    return counts;
-  };
-
-  const statusCounts = getStatusCounts();
-  const recentTasks = tasks.slice(0, 5);
-
   if (loading) {
     return (
       <div className="flex-1 flex flex-col">
@@ -217,7 +201,7 @@ export function Dashboard({ theme, onThemeToggle }) {
                     : 'bg-secondary';
 
                   return (
-                    <div key={task.id} className="card p-4 animate-stagger-fade-in hover-lift" style={{ animationDelay: `${index * 0.03}s` }}>
+                    <div key={`${task.page_id}:${task.id}`} className="card p-4 animate-stagger-fade-in hover-lift" style={{ animationDelay: `${index * 0.03}s` }}>
                       <div className="flex items-start justify-between gap-3">
                         <div className="flex-1 min-w-0">
                           <div className="font-medium mobile-text truncate">{task.title}</div>
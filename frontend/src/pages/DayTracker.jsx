@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Plus, Edit2, Trash2, ChevronLeft, ChevronRight, Clock, Calendar as CalendarIcon } from 'lucide-react';
 import { Topbar } from '../components/Topbar';
+import { api } from '../api';
 
 const DayTracker = ({ theme, onThemeToggle }) => {
   const [selectedDate, setSelectedDate] = useState(new Date());
@@ -27,6 +28,19 @@ const DayTracker = ({ theme, onThemeToggle }) => {
     loadDayStats(formatDate(selectedDate));
   }, [selectedDate]);
 
+  // Day events only name the date; reload the entries when it is the one shown
+  useEffect(() => {
+    const dateStr = formatDate(selectedDate);
+    const reload = () => {
+      loadTrackedDates();
+      loadDayData(dateStr);
+      loadDayStats(dateStr);
+    };
+    return api.subscribeEvents((event) => {
+      if (event.type === 'day' && event.date === dateStr) reload();
+    }, reload);
+  }, [selectedDate]);
+
   const formatDate = (date) => {
     return date.toISOString().split('T')[0]; // YYYY-MM-DD
   };
@@ -33,6 +33,29 @@ export function PageBoard() {
     loadSettings();
   }, [pageId]);
 
+  // Apply task changes made elsewhere (other tabs, the overdue sweep) as they happen
+  useEffect(() => {
+    return api.subscribeEvents((event) => {
+      if (event.page_id !== pageId) return;
+      if (event.type === 'page') {
+        if (event.op === 'delete') navigate('/');
+        else loadPage();
+        return;
+      }
+      if (event.type !== 'task') return;
+      setPage(prev => {
+        if (!prev || event.version < prev.version) return prev;
+        let tasks = prev.tasks.filter(t => t.id !== event.task_id);
+        if (event.op === 'update') {
+          tasks = prev.tasks.map(t => (t.id === event.task_id ? event.task : t));
+        } else if (event.op === 'create') {
+          tasks = [...tasks, event.task];
+        }
+        return { ...prev, tasks, version: event.version };
+      });
+    }, loadPage);
+  }, [pageId]);
+
   const loadPage = async () => {
     try {
       const result = await api.getPage(pageId);
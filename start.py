@@ -2,12 +2,20 @@
 """
 Udo Launcher
 Checks for Node.js, builds frontend if available, and starts Flask backend
+
+    python start.py                      # Flask development server
+    python start.py --serve production   # gunicorn (waitress on Windows)
+    python start.py --fast               # in-process dev server, cached checks
 """
 
+import argparse
+import hashlib
+import json
 import os
 import sys
 import subprocess
 import shutil
+import time
 from pathlib import Path
 
 # Get the project root directory
@@ -15,6 +23,19 @@ PROJECT_ROOT = Path(__file__).parent.absolute()
 FRONTEND_DIR = PROJECT_ROOT / "frontend"
 BACKEND_DIR = PROJECT_ROOT / "backend"
 DIST_DIR = FRONTEND_DIR / "dist"
+REQUIREMENTS_FILE = BACKEND_DIR / "requirements.txt"
+LOCK_FILE = FRONTEND_DIR / "package-lock.json"
+
+# Results of --fast's dependency and build checks, keyed by lockfile hashes
+START_CACHE_FILE = PROJECT_ROOT / ".udo_start_cache.json"
+
+# Production server defaults (each overridable on the command line)
+DEFAULT_HOST = os.environ.get("UDO_HOST", "0.0.0.0")
+DEFAULT_PORT = int(os.environ.get("UDO_PORT", 5000))
+DEFAULT_WORKERS = int(os.environ.get("UDO_WORKERS", 2))
+DEFAULT_THREADS = int(os.environ.get("UDO_THREADS", 8))
+DEFAULT_KEEPALIVE = int(os.environ.get("UDO_KEEPALIVE", 5))
+DEFAULT_TIMEOUT = int(os.environ.get("UDO_TIMEOUT", 30))
 
 
 def print_header():
@@ -59,11 +80,9 @@ def check_python_dependencies():
 def install_python_dependencies():
     """Install Python dependencies"""
     print("\nInstalling Python dependencies...")
-    requirements_file = BACKEND_DIR / "requirements.txt"
-    
     try:
         subprocess.run(
-            [sys.executable, "-m", "pip", "install", "-r", str(requirements_file)],
+            [sys.executable, "-m", "pip", "install", "-r", str(REQUIREMENTS_FILE)],
             check=True
         )
         print("✓ Python dependencies installed successfully")
@@ -100,14 +119,62 @@ def build_frontend():
             check=True
         )
         print("✓ Frontend built successfully")
-        return True
     except subprocess.CalledProcessError:
         print("✗ Failed to build frontend")
         return False
+    
+    # Compressed copies of the build are served to browsers that accept them
+    from backend.static_assets import precompress
+    print(f"✓ Precompressed {precompress(str(DIST_DIR))} frontend files")
+    return True
 
 
-def start_backend():
+def find_production_server():
+    """Pick the installed production WSGI server: gunicorn, or waitress where gunicorn can't run"""
+    try:
+        if os.name != "nt":
+            import gunicorn  # noqa: F401
+            return "gunicorn"
+    except ImportError:
+        pass
+    try:
+        import waitress  # noqa: F401
+        return "waitress"
+    except ImportError:
+        return None
+
+
+def production_command(server, args):
+    """Command line running backend.app:app under the production server"""
+    if server == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"{args.host}:{args.port}",
+            "--workers", str(args.workers),
+            "--threads", str(args.threads),
+            "--worker-class", "gthread",
+            "--keep-alive", str(args.keepalive),
+            "--timeout", str(args.timeout),
+            "--graceful-timeout", str(args.timeout),
+            "backend.app:app",
+        ]
+    # waitress runs a single process; its channel timeout closes idle
+    # (kept-alive) connections and it has no per-request timeout
+    return [
+        sys.executable, "-m", "waitress",
+        f"--listen={args.host}:{args.port}",
+        f"--threads={args.threads}",
+        f"--channel-timeout={args.keepalive}",
+        "backend.app:app",
+    ]
+
+
+def start_backend(args):
     """Start the Flask backend server"""
+    if args.serve == "production":
+        start_production_backend(args)
+        return
+    
     print("\nStarting Flask backend...")
     print("Backend will be available at: http://localhost:5000")
     
@@ -135,10 +202,161 @@ def start_backend():
         sys.exit(1)
 
 
+def start_production_backend(args):
+    """Start the backend under a production WSGI server with debug off"""
+    server = find_production_server()
+    if server is None:
+        print("\n✗ No production server installed (gunicorn, or waitress on Windows)")
+        print("Please run: pip install -r backend/requirements.txt")
+        sys.exit(1)
+    
+    workers = args.workers if server == "gunicorn" else 1
+    print(f"\nStarting Udo with {server} ({workers} worker(s) x {args.threads} threads)...")
+    print(f"Backend will be available at: http://{args.host}:{args.port}")
+    print("\nPress Ctrl+C to stop the server\n")
+    print("-" * 50 + "\n")
+    
+    # Workers share data files; UDO_WORKERS tells the backend to share its
+    # store generation between processes too, and UDO_THREADS sizes its
+    # event stream limit
+    env = dict(os.environ, FLASK_DEBUG="0", UDO_WORKERS=str(workers), UDO_THREADS=str(args.threads))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    try:
+        subprocess.run(
+            production_command(server, args),
+            cwd=str(PROJECT_ROOT),
+            env=env,
+            check=True,
+        )
+    except KeyboardInterrupt:
+        print("\n\nShutting down Udo...")
+        print("Goodbye!")
+    except subprocess.CalledProcessError:
+        print(f"\n✗ {server} encountered an error")
+        sys.exit(1)
+
+
+def file_hash(path):
+    """sha256 of a file's contents ("" if it does not exist)"""
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return ""
+
+
+def load_start_cache():
+    """Check results saved by an earlier --fast start"""
+    try:
+        return json.loads(START_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_start_cache(cache):
+    try:
+        START_CACHE_FILE.write_text(json.dumps(cache))
+    except OSError:
+        pass
+
+
+def fast_start(args):
+    """Start the dev server in this process, skipping checks whose inputs are unchanged
+
+    Python dependencies are checked once per requirements.txt (and
+    interpreter), the frontend is built once per package-lock.json, no
+    questions are asked, and route modules are imported on first use.
+    """
+    started = time.perf_counter()
+    timings = []
+
+    def phase_done(name, since):
+        now = time.perf_counter()
+        timings.append((name, now - since))
+        return now
+
+    cache = load_start_cache()
+    mark = started
+
+    deps_key = f"{sys.executable}:{file_hash(REQUIREMENTS_FILE)}"
+    if cache.get("python_deps") != deps_key:
+        if not check_python_dependencies() and not install_python_dependencies():
+            print("\nError: Could not install Python dependencies")
+            print("Please run: pip install -r backend/requirements.txt")
+            sys.exit(1)
+        cache["python_deps"] = deps_key
+    mark = phase_done("dependency check", mark)
+
+    # Rebuild only when the lockfile changed or there is no build; edits to
+    # frontend sources need a start without --fast (or npm run build)
+    frontend_key = file_hash(LOCK_FILE)
+    if cache.get("frontend") != frontend_key or not (DIST_DIR / "index.html").exists():
+        if check_node():
+            if build_frontend():
+                cache["frontend"] = frontend_key
+        elif (DIST_DIR / "index.html").exists():
+            cache["frontend"] = frontend_key  # no Node.js to rebuild with; keep the existing build
+        else:
+            print("Note: Frontend not built. Only API endpoints will be available.")
+    mark = phase_done("frontend check", mark)
+    save_start_cache(cache)
+
+    os.environ["UDO_LAZY_ROUTES"] = "1"
+    from backend.app import app, STARTUP_TIMINGS
+    mark = phase_done("backend import", mark)
+
+    app.test_client().get("/api/health")
+    phase_done("first request", mark)
+
+    print("Startup timing:")
+    for name, seconds in timings[:3]:
+        print(f"  {name:<20} {seconds * 1000:7.1f} ms")
+    for name, seconds in STARTUP_TIMINGS:
+        print(f"    {name:<18} {seconds * 1000:7.1f} ms")
+    for name, seconds in timings[3:]:
+        print(f"  {name:<20} {seconds * 1000:7.1f} ms")
+    print(f"  {'total':<20} {(time.perf_counter() - started) * 1000:7.1f} ms")
+
+    print(f"\nUdo running at http://localhost:{args.port}")
+    print("\nPress Ctrl+C to stop the server\n")
+    print("-" * 50 + "\n")
+    try:
+        app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
+    except KeyboardInterrupt:
+        pass
+    print("\n\nShutting down Udo...")
+    print("Goodbye!")
+
+
+def parse_args():
+    """Parse launcher options"""
+    parser = argparse.ArgumentParser(description="Start Udo")
+    parser.add_argument("--serve", choices=["dev", "production"], default="dev",
+                        help="dev: Flask debug server; production: multi-threaded WSGI server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="worker processes (gunicorn only)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS,
+                        help="request threads per worker")
+    parser.add_argument("--keepalive", type=int, default=DEFAULT_KEEPALIVE,
+                        help="seconds to keep idle connections open")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT,
+                        help="seconds before a stuck worker is restarted (gunicorn only)")
+    parser.add_argument("--fast", action="store_true",
+                        help="dev server in this process: cached checks, no prompts, "
+                             "routes loaded on first use (ignored with --serve production)")
+    return parser.parse_args()
+
+
 def main():
     """Main launcher function"""
+    args = parse_args()
     print_header()
     
+    if args.fast and args.serve == "dev":
+        fast_start(args)
+        return
+    
     # Check Python dependencies
     if not check_python_dependencies():
         print("\nInstalling missing Python dependencies...")
@@ -154,8 +372,9 @@ def main():
         # Check if frontend is already built
         if DIST_DIR.exists():
             print("✓ Frontend already built")
-            rebuild = input("\nRebuild frontend? (y/N): ").lower().strip()
-            if rebuild == 'y':
+            # Production starts are unattended; only offer a rebuild in dev
+            rebuild = args.serve == "dev" and input("\nRebuild frontend? (y/N): ").lower().strip() == 'y'
+            if rebuild:
                 if not build_frontend():
                     print("\nWarning: Frontend build failed, continuing with existing build...")
         else:
@@ -166,7 +385,7 @@ def main():
         print("Backend API will still be accessible")
     
     # Start the backend server
-    start_backend()
+    start_backend(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,49 @@
+"""Shared fixtures: every test runs against a store in a temporary directory"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend import file_manager, locks, page_reader, storage  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point file_manager (JSON mode), the locks and the journal at tmp_path"""
+    userdata = tmp_path / 'userdata'
+    pages = userdata / 'pages'
+    pages.mkdir(parents=True)
+    monkeypatch.setattr(file_manager, 'db', None)
+    monkeypatch.setattr(file_manager, 'USERDATA_DIR', str(userdata))
+    monkeypatch.setattr(file_manager, 'PAGES_DIR', str(pages))
+    monkeypatch.setattr(file_manager, 'MAINDATA_FILE', str(userdata / 'maindata.json'))
+    monkeypatch.setattr(file_manager, 'MANIFEST_FILE', str(userdata / 'pages_manifest.json'))
+    monkeypatch.setattr(file_manager, 'GENERATION_FILE', str(userdata / 'generation'))
+    monkeypatch.setattr(file_manager, '_manifest', None)
+    monkeypatch.setattr(file_manager, '_manifest_stat', None)
+    monkeypatch.setattr(locks, 'LOCKS_DIR', str(userdata / '.locks'))
+    monkeypatch.setattr(storage, 'JOURNAL_FILE', str(userdata / 'journal.log'))
+    monkeypatch.setattr(storage, '_journal', None)
+    monkeypatch.setattr(storage, '_transient_journal', None)
+    file_manager.clear_page_cache()
+    with page_reader._lock:
+        page_reader._indexes.clear()
+    return userdata
+
+
+@pytest.fixture
+def daytracker(store, monkeypatch):
+    """The day tracker routes module, with its day files and rollups under the store"""
+    from backend import day_rollups
+    from backend.routes import daytracker as module
+    days = store / 'daytracker'
+    monkeypatch.setattr(module, 'DAYTRACKER_DATA_DIR', str(days))
+    monkeypatch.setattr(day_rollups, 'DAYTRACKER_DIR', str(days))
+    monkeypatch.setattr(day_rollups, 'ROLLUP_FILE', str(store / 'daytracker_rollups.json'))
+    monkeypatch.setattr(day_rollups, '_loaded_stat', False)
+    day_rollups._days.clear()
+    return module
@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+
+from backend import analytics
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        if numpy is None:
+            pytest.skip("NumPy is not installed")
+        monkeypatch.setattr(analytics, 'np', numpy)
+    else:
+        monkeypatch.setattr(analytics, 'np', None)
+    return request.param
+
+
+def _columns(durations):
+    days = [date(2026, 1, 5).toordinal(), date(2026, 1, 5).toordinal(), date(2026, 1, 6).toordinal()]
+    return analytics.Columns([{}] * 3, days, durations, ['focus', 'break', 'focus'])
+
+
+def test_whole_second_totals_stay_ints(backend):
+    cols = _columns([1500, 300, 1500])
+    assert analytics.by_day(cols) == {'2026-01-05': {'count': 2, 'duration': 1800},
+                                      '2026-01-06': {'count': 1, 'duration': 1500}}
+    for groups in (analytics.by_day(cols), analytics.by_week(cols), analytics.by_category(cols)):
+        for group in groups.values():
+            assert type(group['count']) is int and type(group['duration']) is int
+    view = cols.between(date(2026, 1, 6), None)
+    assert type(analytics.by_day(view)['2026-01-06']['duration']) is int
+
+
+def test_fractional_totals_stay_floats(backend):
+    groups = analytics.by_category(_columns([0.5, 1, 2.25]))
+    assert groups == {'break': {'count': 1, 'duration': 1}, 'focus': {'count': 2, 'duration': 2.75}}
+    assert type(groups['focus']['duration']) is float
@@ -0,0 +1,40 @@
+from backend import dates, file_manager
+from backend.dates import DATE_RANGE_FIELD, date_ordinal, stamp_date_range, task_ordinals
+from backend.task_model import Task
+
+
+def test_stored_range_is_read_without_parsing(monkeypatch):
+    def fail(timestamp):
+        raise AssertionError("timestamp parsed")
+    monkeypatch.setattr(dates, 'parse_date_range', fail)
+    task = {"timestamp": "2026-01-20:2026-01-30", DATE_RANGE_FIELD: [739636, 739646]}
+    assert task_ordinals(task) == (739636, 739646)
+    assert (Task('p', 0, task).start, Task('p', 0, task).end) == (739636, 739646)
+
+
+def test_missing_or_malformed_range_is_derived():
+    expected = (date_ordinal("2026-01-20"), date_ordinal("2026-01-30"))
+    for stored in (None, [1], ["a", "b"], [5, 2], [0, 0], [1.5, 2]):
+        task = {"timestamp": "2026-01-20:2026-01-30"}
+        if stored is not None:
+            task[DATE_RANGE_FIELD] = stored
+        assert task_ordinals(task) == expected
+
+
+def test_stamp_follows_a_changed_timestamp():
+    task = stamp_date_range({"timestamp": "2026-01-20"})
+    task["timestamp"] = "2026-02-01"
+    stamp_date_range(task)
+    assert task[DATE_RANGE_FIELD] == [date_ordinal("2026-02-01")] * 2
+    task["timestamp"] = "not a date"
+    assert DATE_RANGE_FIELD not in stamp_date_range(task)
+
+
+def test_updated_timestamp_is_restamped_on_save(store):
+    page = file_manager.create_page("Page")
+    task = file_manager.create_task(page["id"], {"title": "t", "timestamp": "2026-01-20"})
+    file_manager.update_task(page["id"], task["id"], {"timestamp": "2026-03-05"})
+    saved = file_manager.get_task(page["id"], task["id"])
+    assert saved[DATE_RANGE_FIELD] == [date_ordinal("2026-03-05")] * 2
+    assert file_manager.is_task_overdue(saved, "2026-03-06")
+    assert not file_manager.is_task_overdue(saved, "2026-03-05")
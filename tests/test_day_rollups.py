@@ -0,0 +1,55 @@
+import pytest
+from flask import Flask
+
+from backend import day_rollups
+
+
+@pytest.fixture
+def client(daytracker):
+    app = Flask(__name__)
+    app.register_blueprint(daytracker.daytracker_bp)
+    return app.test_client()
+
+
+def _entry(start, end, subject='Maths'):
+    return {'date': '2026-01-05', 'startTime': start, 'endTime': end, 'subject': subject}
+
+
+def test_entries_with_bad_times_add_no_time():
+    summary = day_rollups.summarize_day([
+        _entry('2026-01-05T09:00:00', '2026-01-05T10:30:00'),
+        _entry('9am', '2026-01-05T10:00:00'),
+        _entry('2026-01-05T09:00:00', None),
+        _entry(5, '2026-01-05T10:00:00'),
+    ])
+    assert summary == {"micros": 90 * day_rollups.MICROS_PER_MINUTE, "entries": 4,
+                       "subjects": {'Maths': 90 * day_rollups.MICROS_PER_MINUTE}}
+
+
+def test_malformed_times_are_rejected_before_saving(client):
+    assert client.post('/api/daytracker/entry', json=_entry('2026-01-05T09:00:00', '2026-01-05T10:00:00')).status_code == 201
+    response = client.post('/api/daytracker/entry', json=_entry('09:00', '2026-01-05T10:00:00'))
+    assert response.status_code == 400
+    response = client.put('/api/daytracker/entry/2026-01-05/1', json=_entry('2026-01-05T09:00:00', 'later'))
+    assert response.status_code == 400
+
+    stats = client.get('/api/daytracker/stats/range?start=2026-01-01&end=2026-01-31').get_json()
+    assert (stats['totalMinutes'], stats['totalEntries']) == (60, 1)
+
+
+def test_hand_edited_day_file_still_rolls_up(client, daytracker):
+    daytracker.save_day_data('2026-01-05', {'date': '2026-01-05', 'entries': [
+        _entry('2026-01-05T09:00:00', '2026-01-05T09:30:00'), _entry('bad', 'worse')]})
+    stats = client.get('/api/daytracker/stats/2026-01-05').get_json()
+    assert (stats['totalMinutes'], stats['entryCount']) == (30, 2)
+    assert client.get('/api/daytracker/stats/analytics').get_json()['totalEntries'] == 1
+
+
+@pytest.mark.parametrize('url', [
+    '/api/daytracker/stats/range?start=2026-01-01&end=soon',
+    '/api/daytracker/stats/periods?period=day&start=yesterday&end=2026-01-31',
+    '/api/daytracker/stats/periods?period=week&start=2026-01-01&end=2026-13-01',
+    '/api/daytracker/stats/analytics?start=01/01/2026',
+])
+def test_bad_query_dates_are_a_client_error(client, url):
+    assert client.get(url).status_code == 400
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from backend import events
+from backend.routes import events as events_route
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(events_route.events_bp, url_prefix='/api')
+    return app.test_client()
+
+
+def test_stream_opens_with_ready(client):
+    response = client.get('/api/events', buffered=False)
+    chunks = response.response
+    assert next(chunks) == b"retry: 3000\n\n"
+    assert b"event: ready" in next(chunks)
+    response.close()
+
+
+def test_full_server_sends_busy_instead_of_an_error(client, monkeypatch):
+    monkeypatch.setattr(events_route, '_streams', threading.BoundedSemaphore(1))
+    events_route._streams.acquire()
+    response = client.get('/api/events')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert f"retry: {events_route.BUSY_RETRY_MS}" in body
+    assert "event: busy" in body
+    # The busy stream never held a slot, so closing it frees none
+    assert not events_route._streams.acquire(blocking=False)
+
+
+def test_day_events_do_not_copy_entries(daytracker):
+    seq = events.last_seq()
+    entries = [{"id": str(i), "startTime": "2026-01-02T09:00:00",
+                "endTime": "2026-01-02T10:00:00"} for i in range(3)]
+    daytracker.save_day_data('2026-01-02', {'date': '2026-01-02', 'entries': entries})
+    event = events.wait(seq, 0)[-1]
+    assert (event["type"], event["date"], event["count"]) == ('day', '2026-01-02', 3)
+    assert "entries" not in event
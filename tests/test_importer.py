@@ -0,0 +1,102 @@
+import io
+import json
+import os
+
+import pytest
+
+from backend import file_manager, importer
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def source(store, tmp_path):
+    """A page file of 25 tasks to import"""
+    path = tmp_path / 'export.json'
+    tasks = [{"title": f"task {i}", "status": "todo"} for i in range(25)]
+    path.write_text(json.dumps({"id": "exported", "name": "Exported", "tasks": tasks}))
+    return str(path)
+
+
+def _interrupt_after(monkeypatch, chunks):
+    """Make the import stop while writing chunk number chunks + 1"""
+    tally = file_manager.tally_tasks
+    calls = []
+
+    def interrupted(tasks, counts=None):
+        calls.append(1)
+        if len(calls) > chunks:
+            raise Interrupted()
+        return tally(tasks, counts)
+    monkeypatch.setattr(file_manager, 'tally_tasks', interrupted)
+
+
+def _staging_files():
+    return sorted(name for name in os.listdir(file_manager.PAGES_DIR)
+                  if name.startswith(importer.STAGING_PREFIX))
+
+
+def test_interrupted_import_resumes_from_its_checkpoint(source, monkeypatch):
+    with monkeypatch.context() as patch:
+        _interrupt_after(patch, 2)
+        with pytest.raises(Interrupted):
+            importer.import_file(source, chunk_tasks=5)
+    assert [name.rsplit('.', 1)[1] for name in _staging_files()] == ['checkpoint', 'part']
+    assert file_manager.get_all_pages() == []
+
+    report = importer.import_file(source, chunk_tasks=5)
+    assert report.resumed_from == 10
+    assert report.items == report.tasks == 25
+    assert report.counts["task_count"] == 25
+    assert report.counts["status_counts"] == {"todo": 25}
+    assert _staging_files() == []
+
+    page = file_manager.get_page(report.page["id"])
+    assert [task["title"] for task in page["tasks"]] == [f"task {i}" for i in range(25)]
+    assert len({task["id"] for task in page["tasks"]}) == 25
+
+
+def test_import_starts_over_without_resume_or_after_the_source_changed(source, monkeypatch):
+    for run in range(2):
+        with monkeypatch.context() as patch:
+            _interrupt_after(patch, 2)
+            with pytest.raises(Interrupted):
+                importer.import_file(source, chunk_tasks=5)
+        if run == 0:
+            report = importer.import_file(source, chunk_tasks=5, resume=False)
+        else:
+            with open(source, 'a') as f:
+                f.write('\n')
+            report = importer.import_file(source, chunk_tasks=5)
+        assert report.resumed_from == 0
+        assert report.tasks == 25
+        assert len(file_manager.get_page(report.page["id"])["tasks"]) == 25
+        assert _staging_files() == []
+
+
+def test_page_file_tasks_are_imported_as_given(store):
+    tasks = [{"id": "a", "title": "ranged", "status": "Blocked",
+              "timestamp": "2026-02-02", "meta": {"duration_days": 2}},
+             {"id": "b", "title": "timed", "status": "todo", "timestamp": "2026-02-02T09:30:00"}]
+    document = json.dumps({"id": "p", "name": "Exported", "tasks": tasks}).encode()
+    report = importer.import_stream(io.BytesIO(document))
+
+    page = file_manager.get_page(report.page["id"])
+    assert [(t["status"], t["timestamp"]) for t in page["tasks"]] == [
+        ("Blocked", "2026-02-02"), ("todo", "2026-02-02T09:30:00")]
+    assert page["tasks"][0]["meta"] == {"duration_days": 2}
+
+
+def test_board_export_tasks_are_converted(store):
+    document = json.dumps({"page": {"id": "b", "name": "Board"}, "columns": [
+        {"id": "done", "tasks": [{"title": "ranged", "timestamp": "2026-02-02",
+                                  "meta": {"duration_days": 2}}]},
+        {"id": "inprogress", "tasks": [{"title": "timed", "timestamp": "2026-02-02T09:30:00"}]},
+    ]}).encode()
+    report = importer.import_stream(io.BytesIO(document))
+
+    page = file_manager.get_page(report.page["id"])
+    assert [(t["status"], t["timestamp"]) for t in page["tasks"]] == [
+        ("completed", "2026-02-02:2026-02-03"), ("in-progress", "2026-02-02")]
@@ -0,0 +1,76 @@
+from backend import calendar_index, file_manager, page_reader, search_index
+from backend.dates import date_ordinal
+from backend.task_model import Task
+
+
+def _day(iso):
+    return date_ordinal(iso), date_ordinal(iso)
+
+
+def test_calendar_and_search_render_task_index_tasks(store):
+    page = file_manager.create_page("Plans")
+    task = file_manager.create_task(page["id"], {"title": "Quarterly review",
+                                                 "timestamp": "2026-04-01:2026-04-03"})
+    file_manager.create_task(page["id"], {"title": "Undated"})
+
+    hits = calendar_index.overlapping(*_day("2026-04-02"))
+    assert [(t["id"], t["page_name"]) for t in hits] == [(task["id"], "Plans")]
+    results = search_index.search("quarter")["results"]
+    assert [r["task"]["id"] for r in results] == [task["id"]]
+    assert results[0]["title"] == "<mark>Quarterly</mark> review"
+
+    # Neither index keeps Task objects of its own
+    assert all(type(entry) is tuple for entry in calendar_index._entries.values())
+    assert not any(isinstance(value, Task) for doc in search_index._docs.values() for value in doc)
+
+
+def test_updates_reach_both_indexes(store):
+    page = file_manager.create_page("Plans")
+    task = file_manager.create_task(page["id"], {"title": "Draft", "timestamp": "2026-04-01"})
+    file_manager.update_task(page["id"], task["id"], {"title": "Final", "timestamp": "2026-05-01"})
+
+    assert calendar_index.overlapping(*_day("2026-04-01")) == []
+    assert [t["title"] for t in calendar_index.overlapping(*_day("2026-05-01"))] == ["Final"]
+    assert search_index.search("draft")["results"] == []
+    assert [r["task"]["title"] for r in search_index.search("final")["results"]] == ["Final"]
+
+    file_manager.delete_task(page["id"], task["id"])
+    assert calendar_index.overlapping(*_day("2026-05-01")) == []
+    assert search_index.search("final")["total"] == 0
+
+
+def test_prefix_expansions_keep_the_most_common_terms(store, monkeypatch):
+    monkeypatch.setattr(search_index, 'MAX_PREFIX_EXPANSIONS', 3)
+    page = file_manager.create_page("Words")
+    titles = ["cab", "cabin", "cable", "cable", "cable", "cabbage", "cabbage", "caboose"]
+    for title in titles:
+        file_manager.create_task(page["id"], {"title": title})
+
+    result = search_index.search("cab")
+    assert result["truncated"]
+    # The exact term plus the two prefixed terms in the most tasks
+    assert sorted({r["task"]["title"] for r in result["results"]}) == ["cab", "cabbage", "cable"]
+    assert result["total"] == 6
+
+    result = search_index.search("cabl")
+    assert not result["truncated"] and result["total"] == 3
+
+
+def test_large_page_update_is_indexed_without_parsing_the_page(store, monkeypatch):
+    monkeypatch.setattr(file_manager, 'STREAM_PAGE_BYTES', 0)
+    page = file_manager.create_page("Large")
+    for title in ("alpha", "beta", "gamma"):
+        file_manager.create_task(page["id"], {"title": title})
+    task_id = file_manager.get_page(page["id"])["tasks"][1]["id"]
+    search_index.search("beta")
+    calendar_index.overlapping(*_day("2026-04-01"))
+
+    parsed = []
+    iter_tasks = page_reader.iter_tasks
+    with monkeypatch.context() as patch:
+        patch.setattr(page_reader, 'iter_tasks', lambda path: parsed.append(path) or iter_tasks(path))
+        assert file_manager.update_task(page["id"], task_id, {"title": "delta"})
+    assert parsed == []
+
+    assert search_index.search("beta")["total"] == 0
+    assert [r["task"]["title"] for r in search_index.search("delta")["results"]] == ["delta"]
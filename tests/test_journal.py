@@ -0,0 +1,111 @@
+import json
+import threading
+
+import pytest
+
+from backend import storage
+from backend.storage import Journal
+
+
+@pytest.fixture
+def journal(store):
+    return Journal(storage.JOURNAL_FILE, 1024 * 1024)
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def _journal_lines(journal):
+    with open(journal.path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_write_is_journaled_then_checkpointed(store, journal):
+    target = str(store / 'a.json')
+    journal.write(target, '{"v": 1}')
+    assert _read(target) == '{"v": 1}'
+    assert _journal_lines(journal) == [{"path": target, "text": '{"v": 1}'}]
+    journal.checkpoint()
+    assert _read(journal.path) == ''
+
+
+def test_recover_replays_the_latest_record_of_each_file(store, journal):
+    a, b = str(store / 'a.json'), str(store / 'b.json')
+    with open(a, 'w') as f:
+        f.write('stale')
+    records = [{"path": a, "text": "1"}, {"path": a, "text": "2"},
+               {"files": [{"path": b, "text": "B"}, {"path": a, "text": "3"}]}]
+    with open(journal.path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(r) + '\n' for r in records)
+        f.write('{"path": "torn by a cras')  # final record cut short
+    assert journal.recover() == 2
+    assert (_read(a), _read(b)) == ('3', 'B')
+    assert _read(journal.path) == ''
+
+
+def test_crash_while_replacing_files_is_repaired(store, journal, monkeypatch):
+    a, b = str(store / 'a.json'), str(store / 'b.json')
+    for path in (a, b):
+        with open(path, 'w') as f:
+            f.write('old')
+    real = storage.atomic_write_text
+
+    def crash_after_first(path, text, fsync=True):
+        real(path, text, fsync)
+        raise SystemExit("crashed")
+    monkeypatch.setattr(storage, 'atomic_write_text', crash_after_first)
+    with pytest.raises(SystemExit):
+        journal.write_many({a: 'new a', b: 'new b'})
+    assert (_read(a), _read(b)) == ('new a', 'old')
+
+    monkeypatch.setattr(storage, 'atomic_write_text', real)
+    assert Journal(journal.path, journal.checkpoint_bytes).recover() == 2
+    assert (_read(a), _read(b)) == ('new a', 'new b')
+
+
+def test_recover_journal_at_startup_uses_the_configured_file(store):
+    target = str(store / 'maindata.json')
+    with open(storage.JOURNAL_FILE, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"path": target, "text": '{"theme": "dark"}'}) + '\n')
+    assert storage.recover_journal() == 1
+    assert storage.read_json(target) == {"theme": "dark"}
+
+
+def test_every_writer_of_a_failed_batch_gets_the_error(store, journal, monkeypatch):
+    def fail(lines):
+        raise OSError("disk full")
+    monkeypatch.setattr(journal, '_append', fail)
+    errors = []
+    succeeded = []
+
+    def writer(n):
+        for i in range(25):
+            try:
+                journal.write(str(store / f'{n}-{i}.json'), 'x')
+                succeeded.append((n, i))
+            except OSError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert succeeded == []
+    assert len(errors) == 200
+    assert journal._failures == {}
+
+
+def test_failures_are_kept_per_batch(journal):
+    journal._failures = {(1, 2): [OSError("first"), 2], (3, 3): [OSError("second"), 1]}
+    with journal._cond:
+        with pytest.raises(OSError, match="second"):
+            journal._raise_if_failed(3)
+        with pytest.raises(OSError, match="first"):
+            journal._raise_if_failed(1)
+        journal._raise_if_failed(4)  # a batch that succeeded
+        with pytest.raises(OSError, match="first"):
+            journal._raise_if_failed(2)
+    assert journal._failures == {}
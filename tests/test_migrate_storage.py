@@ -0,0 +1,45 @@
+import importlib.util
+import os
+
+import pytest
+
+from backend import session_log, sqlite_store
+from tests.conftest import ROOT
+
+
+@pytest.fixture
+def migrate(store, monkeypatch):
+    """tools/migrate_storage.py with its data paths under the store"""
+    spec = importlib.util.spec_from_file_location(
+        'migrate_storage', os.path.join(ROOT, 'tools', 'migrate_storage.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name in ('PAGES_DIR', 'DAYTRACKER_DIR', 'MAINDATA_FILE', 'TIMER_SETTINGS_FILE',
+                 'ACTIVE_TIMER_FILE', 'COUNTDOWNS_FILE'):
+        monkeypatch.setattr(module, name, store / getattr(module, name).relative_to(module.USERDATA_DIR))
+    monkeypatch.setattr(module, 'USERDATA_DIR', store)
+    for name in ('LOG_FILE', 'INDEX_FILE', 'LEGACY_FILE'):
+        monkeypatch.setattr(session_log, name, str(store / os.path.basename(getattr(session_log, name))))
+    monkeypatch.setattr(session_log, '_index', None)
+    return module
+
+
+def test_page_versions_survive_a_round_trip(store, migrate):
+    from backend.storage import read_json, write_json
+    write_json(str(store / 'pages' / 'p1.json'),
+               {"id": "p1", "name": "Kept", "version": 17, "tasks": [{"id": "t", "title": "x"}]})
+    write_json(str(store / 'pages' / 'p2.json'), {"id": "p2", "name": "Unversioned", "tasks": []})
+
+    migrate.json_to_sqlite(str(store / 'udo.db'))
+    assert sqlite_store.get_page_version('p1') == 17
+    assert sqlite_store.get_page_version('p2') == 0
+    assert sqlite_store.get_page('p1')['tasks'][0]['title'] == 'x'
+
+    # A later save moves on from the migrated version
+    page = sqlite_store.get_page('p1')
+    sqlite_store.save_page('p1', page)
+    assert page['version'] == 18
+
+    os.remove(store / 'pages' / 'p1.json')
+    migrate.sqlite_to_json(str(store / 'udo.db'))
+    assert read_json(str(store / 'pages' / 'p1.json'))['version'] == 18
@@ -0,0 +1,84 @@
+"""page_reader: scanning large page files, including damaged ones"""
+
+import json
+import time
+
+import pytest
+
+from backend import file_manager, page_reader
+
+
+def _page(count=50, version=3):
+    return {
+        "id": "big",
+        "name": "Big",
+        "tasks": [{"id": f"t{i}", "title": f'Task {i} "[{{', "tags": ["a", "b]"],
+                   "timestamp": "2026-01-05", "status": "todo"} for i in range(count)],
+        "version": version
+    }
+
+
+def _write(path, data: bytes):
+    path.write_bytes(data)
+    page_reader.forget(str(path))
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_read_page_matches_json(tmp_path, indent):
+    path = tmp_path / 'big.json'
+    page = _page()
+    _write(path, json.dumps(page, indent=indent).encode())
+
+    read = page_reader.read_page(str(path))
+    assert read["version"] == 3 and read["name"] == "Big"
+    assert list(read["tasks"]) == page["tasks"]
+    assert page_reader.find_task(str(path), "t7") == page["tasks"][7]
+
+
+def test_replace_task_splices_one_task(tmp_path):
+    path = tmp_path / 'big.json'
+    page = _page()
+    _write(path, json.dumps(page, indent=2).encode())
+
+    task = dict(page["tasks"][10], title="Changed")
+    assert page_reader.replace_task(str(path), "t10", task, 4)
+    on_disk = json.loads(path.read_bytes())
+    assert on_disk["version"] == 4
+    assert on_disk["tasks"][10] == task
+    assert on_disk["tasks"][11] == page["tasks"][11]
+    assert page_reader.find_task(str(path), "t11") == page["tasks"][11]
+
+
+@pytest.mark.parametrize('tail', [
+    b'"t",' * 20000,                  # truncated inside a flat array (used to backtrack exponentially)
+    b'"t", "unterminated',            # truncated inside a string
+    b'"t"]}, {"id": "b"}]}]}',        # one closing bracket too many
+    b'"t"}]}',                        # mismatched bracket
+])
+def test_damaged_page_raises_format_error_quickly(tmp_path, tail):
+    path = tmp_path / 'bad.json'
+    _write(path, b'{"version": 1, "tasks": [{"id": "a", "title": "xxxxx", "tags": [' + tail)
+
+    started = time.perf_counter()
+    with pytest.raises(page_reader.PageFormatError):
+        page_reader.read_page(str(path))
+    assert time.perf_counter() - started < 1
+
+
+def test_truncated_large_page_falls_back_to_full_parse(store, monkeypatch):
+    monkeypatch.setattr(file_manager, 'STREAM_PAGE_BYTES', 1024)
+    text = json.dumps(_page(count=200), indent=2)
+    page_file = store / 'pages' / 'big.json'
+    page_file.write_text(text[:len(text) // 2])
+
+    started = time.perf_counter()
+    with pytest.raises(ValueError):
+        file_manager.get_page_lazy('big')
+    with pytest.raises(ValueError):
+        file_manager.get_task('big', 't1')
+    assert time.perf_counter() - started < 1
+
+    # A large file page_reader cannot scan (no tasks array) but json can read loads whole
+    page = {"id": "big", "name": "Big", "version": 1, "notes": ["x" * 100] * 20}
+    page_file.write_text(json.dumps(page))
+    assert file_manager.get_page_lazy('big') == page
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+from flask import Flask
+
+from backend import session_log
+
+
+@pytest.fixture
+def log(store, monkeypatch):
+    """session_log with its log, index and legacy file under the store"""
+    for name in ('LOG_FILE', 'INDEX_FILE', 'LEGACY_FILE'):
+        monkeypatch.setattr(session_log, name, str(store / os.path.basename(getattr(session_log, name))))
+    monkeypatch.setattr(session_log, '_index', None)
+    monkeypatch.setattr(session_log, '_migrated', False)
+    return session_log
+
+
+def _session(n, day='2026-03-01'):
+    return {"id": f"s{n}", "startTime": f"{day}T09:00:00", "duration": 1500, "type": "study"}
+
+
+def _records(log):
+    with open(log.LOG_FILE, 'rb') as f:
+        return f.read().splitlines()
+
+
+def test_add_delete_and_read_by_date(log):
+    for n, day in enumerate(['2026-03-01', '2026-03-02', '2026-03-02', '2026-03-04']):
+        log.add_session(_session(n, day))
+    assert log.delete_session('s1')
+    assert not log.delete_session('s1')
+    assert [s["id"] for s in log.all_sessions()] == ['s0', 's2', 's3']
+    assert [s["id"] for s in log.sessions_between('2026-03-02', '2026-03-03')] == ['s2']
+    assert log.sessions_between('2026-04-01', '2026-04-30') == []
+
+    # Re-adding a deleted id after its tombstone makes it live again
+    log.add_session(_session(1, '2026-03-02'))
+    assert [s["id"] for s in log.sessions_between('2026-03-02', '2026-03-02')] == ['s2', 's1']
+
+
+def test_compaction_drops_tombstones(log, monkeypatch):
+    monkeypatch.setattr(log, 'COMPACT_MIN_DELETES', 2)
+    for n in range(6):
+        log.add_session(_session(n))
+    log.delete_session('s0')
+    log.delete_session('s1')
+    assert len(_records(log)) == 8
+    ino = os.stat(log.LOG_FILE).st_ino
+
+    log.delete_session('s2')
+    assert len(_records(log)) == 3
+    assert os.stat(log.LOG_FILE).st_ino != ino
+    assert [s["id"] for s in log.all_sessions()] == ['s3', 's4', 's5']
+
+
+def test_torn_final_record_is_ignored_and_overwritten(log):
+    log.add_session(_session(0))
+    log.add_session(_session(1))
+    with open(log.LOG_FILE, 'ab') as f:
+        f.write(b'{"op": "add", "session": {"id": "s')
+    log._index = None  # as after a restart
+    assert [s["id"] for s in log.all_sessions()] == ['s0', 's1']
+
+    log.add_session(_session(2))
+    assert len(_records(log)) == 3
+    log._index = None
+    assert [s["id"] for s in log.all_sessions()] == ['s0', 's1', 's2']
+
+
+def test_log_replaced_by_another_process_is_reloaded(log):
+    log.add_session(_session(0))
+    log.add_session(_session(1))
+    stale = log._index
+    log.replace_sessions([_session(2)])
+    log._index = stale
+    assert [s["id"] for s in log.all_sessions()] == ['s2']
+    assert [s["id"] for s in log.sessions_between('2026-03-01', '2026-03-01')] == ['s2']
+
+
+def test_session_without_a_string_start_time_does_not_break_the_log(log):
+    log.add_session(_session(0))
+    log.add_session({"id": "bad", "startTime": 12345, "duration": 60})
+    log._index = None
+    assert [s["id"] for s in log.all_sessions()] == ['s0', 'bad']
+    assert [s["id"] for s in log.sessions_between('2026-03-01', '2026-03-01')] == ['s0']
+
+
+def test_create_session_rejects_a_non_string_start_time(log, monkeypatch):
+    from backend.routes import timer
+    monkeypatch.setattr(timer, 'db', None)
+    app = Flask(__name__)
+    app.register_blueprint(timer.timer_bp)
+    client = app.test_client()
+
+    response = client.post('/api/timer/sessions', json={"startTime": 12345, "duration": 60})
+    assert response.status_code == 400
+    response = client.post('/api/timer/sessions', json={"startTime": "2026-03-01T09:00:00", "duration": 60})
+    assert response.status_code == 201
+    assert client.get('/api/timer/sessions').status_code == 200
+    assert len(log.all_sessions()) == 1
@@ -0,0 +1,51 @@
+"""sqlite_store: the persisted change stamp behind SQLite ETags"""
+
+import subprocess
+import sys
+
+import pytest
+
+from backend import http_cache, sqlite_store
+from tests.conftest import ROOT
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    db_file = str(tmp_path / 'udo.db')
+    sqlite_store.configure(db_file)
+    monkeypatch.setattr(http_cache, 'db', sqlite_store)
+    yield db_file
+    sqlite_store.configure(sqlite_store.DB_FILE)
+
+
+def test_change_stamp_counts_writes_and_survives_restart(sqlite_db):
+    before = sqlite_store.change_stamp()
+    sqlite_store.save_page('p', {"name": "P", "tasks": [{"id": "a", "title": "A"}]})
+    after = sqlite_store.change_stamp()
+    assert after[0] == before[0] and after[1] == before[1] + 1
+
+    # A new connection (as after a restart) reads the same stamp
+    sqlite_store._schema_ready.discard(sqlite_db)
+    sqlite_store.configure(sqlite_db)
+    assert sqlite_store.change_stamp() == after
+
+
+def test_failed_transaction_does_not_count(sqlite_db):
+    before = sqlite_store.change_stamp()
+    with pytest.raises(RuntimeError):
+        sqlite_store.modify_pages(['p'], lambda pages: (_ for _ in ()).throw(RuntimeError()))
+    assert sqlite_store.change_stamp() == before
+
+
+def test_etag_changes_with_writes_from_another_process(sqlite_db):
+    etag, _ = http_cache.store_validator()
+    code = (f"import sys; sys.path.insert(0, {ROOT!r}); from backend import sqlite_store; "
+            f"sqlite_store.configure({sqlite_db!r}); sqlite_store.save_document('timer_settings', {{}})")
+    subprocess.run([sys.executable, '-c', code], check=True)
+    assert http_cache.store_validator()[0] != etag
+
+
+def test_new_database_gets_a_new_store_id(tmp_path, sqlite_db):
+    first = sqlite_store.change_stamp()
+    sqlite_store.configure(str(tmp_path / 'other.db'))
+    assert sqlite_store.change_stamp()[0] != first[0]
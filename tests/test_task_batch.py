@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from flask import Flask
+
+from backend import file_manager
+
+
+@pytest.fixture
+def client(store):
+    from backend.routes.tasks import tasks_bp
+    app = Flask(__name__)
+    app.register_blueprint(tasks_bp, url_prefix='/api')
+    return app.test_client()
+
+
+@pytest.fixture
+def pages(store):
+    ids = []
+    for name in ("A", "B"):
+        page = file_manager.create_page(name)
+        file_manager.create_task(page["id"], {"title": f"{name} task"})
+        ids.append(page["id"])
+    return ids
+
+
+def _page_file(page_id):
+    with open(f"{file_manager.PAGES_DIR}/{page_id}.json", 'rb') as f:
+        return f.read()
+
+
+def _snapshot(page_ids):
+    return {page_id: (_page_file(page_id), json.dumps(file_manager.get_page(page_id)))
+            for page_id in page_ids}
+
+
+def test_failed_batch_operation_rolls_back_every_page(client, pages):
+    a, b = pages
+    before = _snapshot(pages)
+    task_a = file_manager.get_page(a)["tasks"][0]["id"]
+    response = client.post('/api/tasks/batch', json={"operations": [
+        {"op": "update", "page_id": a, "task_id": task_a, "updates": {"title": "changed"}},
+        {"op": "create", "page_id": b, "task": {"title": "new"}},
+        {"op": "delete", "page_id": b, "task_id": "missing"},
+    ]})
+    assert response.status_code == 404
+    assert response.get_json()["index"] == 2
+    assert _snapshot(pages) == before
+
+
+def test_batch_etag_conflict_writes_nothing(client, pages):
+    a, b = pages
+    before = _snapshot(pages)
+    response = client.post('/api/tasks/batch', json={
+        "operations": [{"op": "create", "page_id": a, "task": {"title": "new"}},
+                       {"op": "create", "page_id": b, "task": {"title": "new"}}],
+        "if_match": {a: file_manager.page_etag(file_manager.get_page(a)), b: '"0"'}})
+    assert response.status_code == 409
+    assert _snapshot(pages) == before
+
+
+def test_batch_write_failure_leaves_pages_unchanged(pages, monkeypatch):
+    before = _snapshot(pages)
+
+    def fail(files, indent=2, ensure_ascii=False):
+        raise OSError("disk full")
+    monkeypatch.setattr(file_manager, 'write_json_files', fail)
+    with pytest.raises(OSError):
+        file_manager.apply_task_batch([{"op": "create", "page_id": page_id, "task": {"title": "new"}}
+                                       for page_id in pages])
+    assert _snapshot(pages) == before
+
+
+def test_batch_applies_to_every_page_once(client, pages):
+    a, b = pages
+    versions = {page_id: file_manager.get_page(page_id)["version"] for page_id in pages}
+    response = client.post('/api/tasks/batch', json={"operations": [
+        {"op": "create", "page_id": a, "task": {"title": "one"}},
+        {"op": "create", "page_id": a, "task": {"title": "two"}},
+        {"op": "create", "page_id": b, "task": {"title": "three"}},
+    ]})
+    assert response.status_code == 200
+    for page_id in pages:
+        assert file_manager.get_page(page_id)["version"] == versions[page_id] + 1
+    assert [t["title"] for t in file_manager.get_page(a)["tasks"]] == ["A task", "one", "two"]
@@ -0,0 +1,93 @@
+import pytest
+from flask import Flask
+
+from backend import file_manager, http_cache
+from backend.storage import PageVersionConflict
+
+
+@pytest.fixture
+def client(store):
+    from backend.routes.pages import pages_bp
+    from backend.routes.tasks import tasks_bp
+    app = Flask(__name__)
+    http_cache.init_app(app)
+    app.register_blueprint(pages_bp, url_prefix='/api')
+    app.register_blueprint(tasks_bp, url_prefix='/api')
+    return app.test_client()
+
+
+@pytest.fixture(params=['whole', 'spliced'])
+def page(request, store, monkeypatch):
+    """A page with two tasks, updated by rewriting it whole or by splicing one task"""
+    if request.param == 'spliced':
+        monkeypatch.setattr(file_manager, 'STREAM_PAGE_BYTES', 0)
+    page = file_manager.create_page("Board")
+    for title in ("first", "second"):
+        file_manager.create_task(page["id"], {"title": title})
+    return file_manager.get_page(page["id"])
+
+
+def _page_file(page_id):
+    with open(f"{file_manager.PAGES_DIR}/{page_id}.json", 'rb') as f:
+        return f.read()
+
+
+def test_update_with_a_stale_etag_is_a_conflict(client, page):
+    task_id = page["tasks"][0]["id"]
+    etag = client.get(f'/api/page/{page["id"]}').headers['ETag']
+
+    response = client.put('/api/task/update', json={"page_id": page["id"], "task_id": task_id,
+                                                    "title": "renamed"}, headers={'If-Match': etag})
+    assert response.status_code == 200
+    new_etag = response.headers['ETag']
+    assert new_etag != etag
+
+    before = _page_file(page["id"])
+    response = client.put('/api/task/update', json={"page_id": page["id"], "task_id": task_id,
+                                                    "title": "lost update"}, headers={'If-Match': etag})
+    assert response.status_code == 409
+    assert response.headers['ETag'] == new_etag
+    assert _page_file(page["id"]) == before
+    assert file_manager.get_task(page["id"], task_id)["title"] == "renamed"
+
+
+def test_weak_and_wildcard_etags_match(client, page):
+    task_id = page["tasks"][1]["id"]
+    etag = client.get(f'/api/page/{page["id"]}').headers['ETag']
+    for if_match in ('W/' + etag, '*'):
+        response = client.put('/api/task/update', json={"page_id": page["id"], "task_id": task_id,
+                                                        "status": "done"}, headers={'If-Match': if_match})
+        assert response.status_code == 200
+
+
+def test_update_task_raises_on_conflict(page):
+    with pytest.raises(PageVersionConflict) as conflict:
+        file_manager.update_task(page["id"], page["tasks"][0]["id"], {"title": "x"}, if_match='"999"')
+    assert conflict.value.etag == file_manager.page_etag(page)
+
+
+def test_etag_is_the_version_the_update_wrote(client, page, monkeypatch):
+    from backend.routes import tasks
+    first, second = (task["id"] for task in page["tasks"])
+
+    def concurrent_save(page_id, task_id):
+        file_manager.update_task(page_id, second, {"title": "saved meanwhile"})
+    monkeypatch.setattr(tasks, 'refresh_task', concurrent_save)
+
+    response = client.put('/api/task/update', json={"page_id": page["id"], "task_id": first,
+                                                    "title": "renamed"})
+    assert response.headers['ETag'] == f'"{page["version"] + 1}"'
+    response = client.put('/api/task/update', json={"page_id": page["id"], "task_id": first, "title": "again"},
+                          headers={'If-Match': response.headers['ETag']})
+    assert response.status_code == 409
+    assert file_manager.get_task(page["id"], second)["title"] == "saved meanwhile"
+
+
+def test_created_task_is_returned_after_overdue_promotion(client, store):
+    page = file_manager.create_page("Board")
+    response = client.post('/api/task/create', json={"page_id": page["id"], "title": "late",
+                                                     "status": "todo", "timestamp": "2020-01-01"})
+    assert response.status_code == 201
+    task = response.get_json()["task"]
+    assert task["status"] == "overdue"
+    assert file_manager.get_task(page["id"], task["id"]) == task
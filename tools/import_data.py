@@ -1,104 +1,65 @@
-"""Import a board-style data.json into Udo page format.
-Reads /workspaces/Udo/data.json and writes a page JSON to backend/userdata/pages/
+"""Import board exports (like data.json) or Udo page files as new pages.
+
+    python tools/import_data.py                      # ./data.json
+    python tools/import_data.py a.json b.json --workers 4
+    python tools/import_data.py big.json --restart   # ignore an earlier partial import
+
+Files are streamed through backend/importer.py a chunk of tasks at a time,
+so memory use does not grow with their size, and several files are
+imported in parallel worker processes. An interrupted import resumes from
+its last chunk when run again on the unchanged file. Pages go to the store
+the server uses (UDO_STORAGE_BACKEND).
 """
-import json
-import os
+import argparse
 import sys
 from pathlib import Path
-from datetime import datetime
 
 ROOT = Path(__file__).resolve().parents[1]
-DATA_FILE = ROOT / 'data.json'
-PAGES_DIR = ROOT / 'backend' / 'userdata' / 'pages'
-
-STATUS_MAP = {
-    'todo': 'todo',
-    'inprogress': 'in-progress',
-    'in-progress': 'in-progress',
-    'done': 'completed',
-    'completed': 'completed',
-    'overdue': 'overdue'
-}
-
-
-def date_to_simple(iso_ts: str) -> str:
-    # Convert ISO datetime to YYYY-MM-DD
-    if not iso_ts:
-        return ''
-    if 'T' in iso_ts:
-        return iso_ts.split('T')[0]
-    return iso_ts
-
+sys.path.insert(0, str(ROOT))
 
-def load_and_convert():
-    if not DATA_FILE.exists():
-        print(f"Data file not found: {DATA_FILE}")
-        sys.exit(1)
-
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    page_meta = data.get('page', {})
-    page_id = page_meta.get('id') or f"imported-{int(datetime.utcnow().timestamp())}"
-    page_name = page_meta.get('name') or page_id
-
-    tasks = []
+from backend import importer  # noqa: E402
 
-    for col in data.get('columns', []):
-        col_id = col.get('id', '').lower()
-        mapped_status = STATUS_MAP.get(col_id, col_id)
-        for t in col.get('tasks', []):
-            task = {}
-            task['id'] = t.get('id') or f"task-{int(datetime.utcnow().timestamp())}"
-            task['title'] = t.get('title', '')
-            task['description'] = t.get('description', '')
-            # Keep tags as-is
-            task['tags'] = t.get('tags', [])
-            # Timestamp: convert to YYYY-MM-DD
-            ts = t.get('timestamp', '')
-            simple = date_to_simple(ts)
-            task['timestamp'] = simple
-            # If duration_days in meta, create range end date
-            meta = t.get('meta', {}) or {}
-            duration_days = meta.get('duration_days')
-            if duration_days and simple:
-                try:
-                    start = datetime.strptime(simple, '%Y-%m-%d')
-                    end = start + timedelta(days=int(duration_days) - 1)
-                    task['timestamp'] = f"{simple}:{end.strftime('%Y-%m-%d')}"
-                except Exception:
-                    # ignore and keep single date
-                    pass
-            # status mapping
-            task['status'] = mapped_status
-            # copy priority/meta if present
-            if 'priority' in t:
-                task['priority'] = t['priority']
-            if meta:
-                task['meta'] = meta
+DATA_FILE = ROOT / 'data.json'
 
-            tasks.append(task)
 
-    page_data = {
-        'id': page_id,
-        'name': page_name,
-        'tasks': tasks
-    }
+def print_progress(report):
+    print(f"{report.source}: {report.fraction:6.1%}  {report.tasks} tasks", flush=True)
 
-    # Ensure pages dir exists
-    PAGES_DIR.mkdir(parents=True, exist_ok=True)
 
-    out_file = PAGES_DIR / f"{page_id}.json"
-    # if exists, append timestamp to filename
-    if out_file.exists():
-        out_file = PAGES_DIR / f"{page_id}-{int(datetime.utcnow().timestamp())}.json"
+def main():
+    parser = argparse.ArgumentParser(description='Import board exports or page files into Udo')
+    parser.add_argument('files', nargs='*', default=[str(DATA_FILE)], help='JSON files to import')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='parallel worker processes (default: one per CPU, at most one per file)')
+    parser.add_argument('--chunk-size', type=int, default=importer.CHUNK_TASKS,
+                        help='tasks written and checkpointed at a time')
+    parser.add_argument('--restart', action='store_true',
+                        help='start over instead of resuming interrupted imports')
+    args = parser.parse_args()
 
-    with open(out_file, 'w', encoding='utf-8') as f:
-        json.dump(page_data, f, indent=2, ensure_ascii=False)
+    missing = [path for path in args.files if not Path(path).is_file()]
+    if missing:
+        print(f"Data file not found: {', '.join(missing)}")
+        sys.exit(1)
 
-    print(f"Imported page written to: {out_file}")
+    reports = importer.import_files(args.files, args.workers, args.chunk_size,
+                                    resume=not args.restart, progress=print_progress)
+    failed = 0
+    for report in reports:
+        if report.error:
+            failed += 1
+            print(f"{report.source}: failed: {report.error}")
+            continue
+        resumed = f", resumed after {report.resumed_from}" if report.resumed_from else ""
+        print(f"{report.source}: imported {report.tasks} tasks as page "
+              f"{report.page['name']!r} ({report.page['id']}){resumed}")
+        if report.invalid:
+            print(f"  skipped {report.invalid} invalid tasks")
+            for error in report.errors:
+                print(f"    {error}")
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
-    from datetime import timedelta
-    load_and_convert()
+    main()
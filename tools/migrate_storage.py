@@ -0,0 +1,139 @@
+"""Migrate Udo data between the JSON file layout and the SQLite store.
+
+    python tools/migrate_storage.py to-sqlite [--db PATH]
+    python tools/migrate_storage.py to-json [--db PATH]
+    python tools/migrate_storage.py to-compact    # minified page/maindata files
+    python tools/migrate_storage.py to-pretty     # indented, readable files
+
+Run the server with UDO_STORAGE_BACKEND=sqlite (and UDO_SQLITE_PATH if a
+custom --db was used) after migrating to SQLite, and with
+UDO_STORAGE_FORMAT=compact after to-compact so later saves stay minified.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backend import session_log, sqlite_store  # noqa: E402
+from backend.storage import write_json  # noqa: E402
+
+USERDATA_DIR = ROOT / 'backend' / 'userdata'
+PAGES_DIR = USERDATA_DIR / 'pages'
+DAYTRACKER_DIR = USERDATA_DIR / 'daytracker'
+MAINDATA_FILE = USERDATA_DIR / 'maindata.json'
+TIMER_SETTINGS_FILE = USERDATA_DIR / 'timer_settings.json'
+ACTIVE_TIMER_FILE = USERDATA_DIR / 'active_timer.json'
+COUNTDOWNS_FILE = USERDATA_DIR / 'countdowns.json'
+
+
+def load_json(path: Path):
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def json_to_sqlite(db_file: str):
+    sqlite_store.configure(db_file)
+
+    maindata = load_json(MAINDATA_FILE)
+    if maindata is not None:
+        sqlite_store.save_maindata(maindata)
+
+    pages = sorted(PAGES_DIR.glob('*.json'))
+    for page_file in pages:
+        page = load_json(page_file)
+        # Keep the page version, which clients hold as the page's ETag
+        version = page.get('version')
+        sqlite_store.save_page(page_file.stem, page, version if isinstance(version, int) else 0)
+
+    sessions = {'sessions': session_log.all_sessions()}
+    sqlite_store.save_timer_sessions(sessions['sessions'])
+    for key, path in (('timer_settings', TIMER_SETTINGS_FILE), ('active_timer', ACTIVE_TIMER_FILE)):
+        data = load_json(path)
+        if data is not None:
+            sqlite_store.save_document(key, data)
+
+    countdowns = load_json(COUNTDOWNS_FILE) or {'events': []}
+    sqlite_store.save_countdown_events(countdowns.get('events', []))
+
+    days = sorted(DAYTRACKER_DIR.glob('day_*.json'))
+    for day_file in days:
+        date_str = day_file.stem[len('day_'):]
+        sqlite_store.save_day_data(date_str, load_json(day_file))
+
+    print(f"Migrated {len(pages)} pages, {len(sessions.get('sessions', []))} timer sessions, "
+          f"{len(countdowns.get('events', []))} countdown events and {len(days)} tracked days "
+          f"to {db_file}")
+
+
+def sqlite_to_json(db_file: str):
+    if not Path(db_file).exists():
+        print(f"Database not found: {db_file}")
+        sys.exit(1)
+    sqlite_store.configure(db_file)
+
+    maindata = sqlite_store.get_maindata()
+    if maindata is not None:
+        write_json(str(MAINDATA_FILE), maindata)
+
+    PAGES_DIR.mkdir(parents=True, exist_ok=True)
+    page_ids = sqlite_store.list_page_ids()
+    for page_id in page_ids:
+        write_json(str(PAGES_DIR / f'{page_id}.json'), sqlite_store.get_page(page_id))
+
+    stale = [p.name for p in PAGES_DIR.glob('*.json') if p.stem not in set(page_ids)]
+    if stale:
+        print(f"Left {len(stale)} page files that are not in the database: {', '.join(stale)}")
+
+    sessions = sqlite_store.get_timer_sessions()
+    session_log.replace_sessions(sessions)
+    for key, path in (('timer_settings', TIMER_SETTINGS_FILE), ('active_timer', ACTIVE_TIMER_FILE)):
+        data = sqlite_store.get_document(key)
+        if data is not None:
+            write_json(str(path), data)
+
+    events = sqlite_store.get_countdown_events()
+    write_json(str(COUNTDOWNS_FILE), {'events': events})
+
+    DAYTRACKER_DIR.mkdir(parents=True, exist_ok=True)
+    dates = sqlite_store.get_tracked_dates()
+    for date_str in dates:
+        write_json(str(DAYTRACKER_DIR / f'day_{date_str}.json'), sqlite_store.get_day_data(date_str))
+
+    print(f"Exported {len(page_ids)} pages, {len(sessions)} timer sessions, "
+          f"{len(events)} countdown events and {len(dates)} tracked days to {USERDATA_DIR}")
+
+
+def rewrite_json_files(indent):
+    """Rewrite page and maindata files in place, indented or minified"""
+    files = sorted(PAGES_DIR.glob('*.json'))
+    if MAINDATA_FILE.exists():
+        files.append(MAINDATA_FILE)
+    before = after = 0
+    for path in files:
+        before += path.stat().st_size
+        write_json(str(path), load_json(path), indent=indent)
+        after += path.stat().st_size
+    print(f"Rewrote {len(files)} files: {before} -> {after} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate Udo data between JSON files and SQLite')
+    parser.add_argument('direction', choices=['to-sqlite', 'to-json', 'to-compact', 'to-pretty'])
+    parser.add_argument('--db', default=sqlite_store.DB_FILE, help='SQLite database file')
+    args = parser.parse_args()
+
+    if args.direction == 'to-sqlite':
+        json_to_sqlite(args.db)
+    elif args.direction == 'to-json':
+        sqlite_to_json(args.db)
+    else:
+        rewrite_json_files(None if args.direction == 'to-compact' else 2)
+
+
+if __name__ == '__main__':
+    main()